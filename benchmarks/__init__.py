@@ -0,0 +1,4 @@
+"""
+Offline benchmarks for nhlapi, run against a local stand-in for the stats
+API. See benchmarks/run.py.
+"""
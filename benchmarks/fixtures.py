@@ -0,0 +1,316 @@
+"""
+Payloads served by the fake stats API.
+
+Payloads are synthesized with the same layout as the real API responses
+(a fixed seed keeps them identical between runs). A directory of recorded
+responses can be used instead: any of feed_live.json, boxscore.json,
+content.json, teams.json, conferences.json and divisions.json found there
+replaces the synthesized payload of the same name.
+"""
+import copy
+import json
+import os
+import random
+
+
+COPYRIGHT = ("NHL and the NHL Shield are registered trademarks of the National Hockey League. "
+             "NHL and NHL team marks are the property of the NHL and its teams. "
+             "© NHL 2019. All Rights Reserved.")
+
+# 10 digit placeholder swapped for the requested game id in encoded feeds
+GAME_PK_SENTINEL = 9999999999
+
+CONFERENCES = [(5, "Western", "W"), (6, "Eastern", "E")]
+
+# id, name, short name, abbreviation, conference id
+DIVISIONS = [(15, "Pacific", "PAC", "P", 5), (16, "Central", "CEN", "C", 5),
+             (17, "Atlantic", "ATL", "A", 6), (18, "Metropolitan", "Metro", "M", 6)]
+
+# id, location, team name, abbreviation, division id
+TEAMS = [(1, "New Jersey", "Devils", "NJD", 18), (2, "New York", "Islanders", "NYI", 18),
+         (3, "New York", "Rangers", "NYR", 18), (4, "Philadelphia", "Flyers", "PHI", 18),
+         (5, "Pittsburgh", "Penguins", "PIT", 18), (6, "Boston", "Bruins", "BOS", 17),
+         (7, "Buffalo", "Sabres", "BUF", 17), (8, "Montréal", "Canadiens", "MTL", 17),
+         (9, "Ottawa", "Senators", "OTT", 17), (10, "Toronto", "Maple Leafs", "TOR", 17),
+         (12, "Carolina", "Hurricanes", "CAR", 18), (13, "Florida", "Panthers", "FLA", 17),
+         (14, "Tampa Bay", "Lightning", "TBL", 17), (15, "Washington", "Capitals", "WSH", 18),
+         (16, "Chicago", "Blackhawks", "CHI", 16), (17, "Detroit", "Red Wings", "DET", 17),
+         (18, "Nashville", "Predators", "NSH", 16), (19, "St. Louis", "Blues", "STL", 16),
+         (20, "Calgary", "Flames", "CGY", 15), (21, "Colorado", "Avalanche", "COL", 16),
+         (22, "Edmonton", "Oilers", "EDM", 15), (23, "Vancouver", "Canucks", "VAN", 15),
+         (24, "Anaheim", "Ducks", "ANA", 15), (25, "Dallas", "Stars", "DAL", 16),
+         (26, "Los Angeles", "Kings", "LAK", 15), (28, "San Jose", "Sharks", "SJS", 15),
+         (29, "Columbus", "Blue Jackets", "CBJ", 18), (30, "Minnesota", "Wild", "MIN", 16),
+         (52, "Winnipeg", "Jets", "WPG", 16), (53, "Arizona", "Coyotes", "ARI", 15),
+         (54, "Vegas", "Golden Knights", "VGK", 15)]
+
+EVENT_TYPES = ["FACEOFF", "SHOT", "HIT", "GIVEAWAY", "TAKEAWAY", "BLOCKED_SHOT",
+               "MISSED_SHOT", "STOP", "PENALTY", "GOAL"]
+EVENT_WEIGHTS = [60, 60, 45, 15, 12, 30, 25, 40, 8, 5]
+
+PLAYS_PER_GAME = 320
+SKATERS_PER_TEAM = 18
+GOALIES_PER_TEAM = 2
+
+FILES = {"feed/live": "feed_live.json", "boxscore": "boxscore.json", "content": "content.json",
+         "teams": "teams.json", "conferences": "conferences.json", "divisions": "divisions.json"}
+
+
+def _clock(seconds):
+    return "%02d:%02d" % divmod(seconds, 60)
+
+
+def _conference(cid):
+    for c in CONFERENCES:
+        if c[0] == cid:
+            return {"id": c[0], "name": c[1], "link": "/api/v1/conferences/%d" % c[0]}
+
+
+def _division(did):
+    for d in DIVISIONS:
+        if d[0] == did:
+            return {"id": d[0], "name": d[1], "nameShort": d[2],
+                    "link": "/api/v1/divisions/%d" % d[0], "abbreviation": d[3]}
+
+
+def team(row):
+    tid, location, name, abbreviation, did = row
+    division = _division(did)
+    conference = _conference([d[4] for d in DIVISIONS if d[0] == did][0])
+    return {"id": tid, "name": " ".join([location, name]), "link": "/api/v1/teams/%d" % tid,
+            "venue": {"name": "%s Arena" % name, "link": "/api/v1/venues/null",
+                      "city": location, "timeZone": {"id": "America/New_York", "offset": -4,
+                                                     "tz": "EDT"}},
+            "abbreviation": abbreviation, "teamName": name, "locationName": location,
+            "firstYearOfPlay": "1967", "division": division, "conference": conference,
+            "franchise": {"franchiseId": tid, "teamName": name,
+                          "link": "/api/v1/franchises/%d" % tid},
+            "shortName": location, "officialSiteUrl": "http://www.nhl.com/",
+            "franchiseId": tid, "active": True}
+
+
+def teams():
+    return {"copyright": COPYRIGHT, "teams": [team(t) for t in TEAMS]}
+
+
+def conferences():
+    out = []
+    for cid, name, abbreviation in CONFERENCES:
+        js = _conference(cid)
+        js.update({"abbreviation": abbreviation, "shortName": name[:4], "active": True})
+        out.append(js)
+    return {"copyright": COPYRIGHT, "conferences": out}
+
+
+def divisions():
+    out = []
+    for d in DIVISIONS:
+        js = _division(d[0])
+        js.update({"conference": _conference(d[4]), "active": True})
+        out.append(js)
+    return {"copyright": COPYRIGHT, "divisions": out}
+
+
+def _player(rng, pid, goalie):
+    person = {"id": pid, "fullName": "Player %d" % pid, "link": "/api/v1/people/%d" % pid,
+              "shootsCatches": rng.choice("LR"), "rosterStatus": "Y"}
+    if goalie:
+        shots = rng.randint(20, 40)
+        stats = {"goalieStats": {"timeOnIce": _clock(rng.randint(0, 3600)), "assists": 0,
+                                 "goals": 0, "pim": 0, "shots": shots,
+                                 "saves": shots - rng.randint(0, 5),
+                                 "powerPlaySaves": rng.randint(0, 6), "shortHandedSaves": 0,
+                                 "evenSaves": rng.randint(15, 30), "shortHandedShotsAgainst": 0,
+                                 "evenShotsAgainst": rng.randint(15, 33),
+                                 "powerPlayShotsAgainst": rng.randint(0, 7),
+                                 "decision": rng.choice(["W", "L", ""])}}
+        position = {"code": "G", "name": "Goalie", "type": "Goalie", "abbreviation": "G"}
+    else:
+        stats = {"skaterStats": {"timeOnIce": _clock(rng.randint(300, 1500)),
+                                 "assists": rng.randint(0, 2), "goals": rng.randint(0, 1),
+                                 "shots": rng.randint(0, 6), "hits": rng.randint(0, 5),
+                                 "powerPlayGoals": 0, "powerPlayAssists": 0,
+                                 "penaltyMinutes": rng.choice([0, 0, 0, 2]),
+                                 "faceOffWins": rng.randint(0, 10), "faceoffTaken": rng.randint(0, 20),
+                                 "takeaways": rng.randint(0, 3), "giveaways": rng.randint(0, 3),
+                                 "shortHandedGoals": 0, "shortHandedAssists": 0,
+                                 "blocked": rng.randint(0, 4), "plusMinus": rng.randint(-2, 2),
+                                 "evenTimeOnIce": _clock(rng.randint(300, 1200)),
+                                 "powerPlayTimeOnIce": _clock(rng.randint(0, 240)),
+                                 "shortHandedTimeOnIce": _clock(rng.randint(0, 180))}}
+        position = rng.choice([{"code": "C", "name": "Center", "type": "Forward", "abbreviation": "C"},
+                               {"code": "L", "name": "Left Wing", "type": "Forward", "abbreviation": "LW"},
+                               {"code": "R", "name": "Right Wing", "type": "Forward", "abbreviation": "RW"},
+                               {"code": "D", "name": "Defenseman", "type": "Defenseman", "abbreviation": "D"}])
+    return {"person": person, "jerseyNumber": str(rng.randint(1, 98)), "position": position,
+            "stats": stats}
+
+
+def _team_boxscore(rng, team_row, scale):
+    n_skaters = max(1, int(SKATERS_PER_TEAM * scale))
+    players = {}
+    base = 8470000 + team_row[0] * 1000
+    for i in range(n_skaters + GOALIES_PER_TEAM):
+        pid = base + i
+        players["ID%d" % pid] = _player(rng, pid, goalie=i >= n_skaters)
+    ids = [p["person"]["id"] for p in players.values()]
+    return {"team": {"id": team_row[0], "name": " ".join(team_row[1:3]),
+                     "link": "/api/v1/teams/%d" % team_row[0], "abbreviation": team_row[3]},
+            "teamStats": {"teamSkaterStats": {"goals": rng.randint(0, 6), "pim": rng.randint(0, 20),
+                                              "shots": rng.randint(20, 45),
+                                              "faceOffWinPercentage": "%.1f" % rng.uniform(40, 60),
+                                              "powerPlayPercentage": "0.0", "powerPlayGoals": 0.0,
+                                              "powerPlayOpportunities": float(rng.randint(0, 5)),
+                                              "blocked": rng.randint(5, 20),
+                                              "takeaways": rng.randint(2, 12),
+                                              "giveaways": rng.randint(2, 15),
+                                              "hits": rng.randint(10, 35)}},
+            "players": players, "goalies": ids[n_skaters:], "skaters": ids[:n_skaters],
+            "onIce": [], "onIcePlus": [], "scratches": [], "penaltyBox": [],
+            "coaches": [{"person": {"fullName": "Coach %d" % team_row[0]},
+                         "position": {"code": "HC", "name": "Head Coach"}}]}
+
+
+def boxscore(scale=1.0, seed=0):
+    rng = random.Random(seed)
+    away, home = rng.sample(TEAMS, 2)
+    return {"copyright": COPYRIGHT,
+            "teams": {"away": _team_boxscore(rng, away, scale),
+                      "home": _team_boxscore(rng, home, scale)},
+            "officials": [{"official": {"id": 2000 + i, "fullName": "Official %d" % i},
+                           "officialType": "Referee" if i < 2 else "Linesman"} for i in range(4)]}
+
+
+def play(rng, idx, away, home, player_ids):
+    period = min(3, idx * 3 // PLAYS_PER_GAME + 1)
+    event = rng.choices(EVENT_TYPES, EVENT_WEIGHTS)[0]
+    js = {"result": {"event": event.replace("_", " ").title(), "eventCode": "EDM%d" % idx,
+                     "eventTypeId": event, "description": "%s event %d" % (event, idx)},
+          "about": {"eventIdx": idx, "eventId": idx + 1, "period": period,
+                    "periodType": "REGULAR", "ordinalNum": "%dst" % period,
+                    "periodTime": _clock(rng.randint(0, 1199)),
+                    "periodTimeRemaining": _clock(rng.randint(0, 1199)),
+                    "dateTime": "2017-10-05T00:00:00Z", "goals": {"away": 0, "home": 0}},
+          "coordinates": {}}
+    if event not in ("STOP",):
+        side = rng.choice([away, home])
+        js["team"] = {"id": side[0], "name": " ".join(side[1:3]),
+                      "link": "/api/v1/teams/%d" % side[0], "triCode": side[3]}
+        js["coordinates"] = {"x": float(rng.randint(-99, 99)), "y": float(rng.randint(-42, 42))}
+        js["players"] = [{"player": {"id": pid, "fullName": "Player %d" % pid,
+                                     "link": "/api/v1/people/%d" % pid},
+                          "playerType": role}
+                         for pid, role in zip(rng.sample(player_ids, 2), ["Shooter", "Goalie"])]
+        if event in ("SHOT", "MISSED_SHOT", "GOAL"):
+            js["result"]["secondaryType"] = rng.choice(["Wrist Shot", "Slap Shot", "Snap Shot",
+                                                        "Backhand", "Tip-In"])
+    return js
+
+
+def feed_live(scale=1.0, seed=0):
+    rng = random.Random(seed)
+    box = boxscore(scale, seed)
+    box.pop("copyright")
+    away = [t for t in TEAMS if t[0] == box["teams"]["away"]["team"]["id"]][0]
+    home = [t for t in TEAMS if t[0] == box["teams"]["home"]["team"]["id"]][0]
+    player_ids = box["teams"]["away"]["skaters"] + box["teams"]["home"]["skaters"]
+    plays = [play(rng, i, away, home, player_ids) for i in range(int(PLAYS_PER_GAME * scale))]
+    players = {}
+    for side in ("away", "home"):
+        for key, p in box["teams"][side]["players"].items():
+            players[key] = dict(p["person"], primaryPosition=p["position"],
+                                currentTeam=box["teams"][side]["team"])
+    return {"copyright": COPYRIGHT, "gamePk": GAME_PK_SENTINEL,
+            "link": "/api/v1/game/%d/feed/live" % GAME_PK_SENTINEL,
+            "metaData": {"wait": 10, "timeStamp": "20171005_000000"},
+            "gameData": {"game": {"pk": GAME_PK_SENTINEL, "season": "20172018", "type": "R"},
+                         "datetime": {"dateTime": "2017-10-04T23:00:00Z",
+                                      "endDateTime": "2017-10-05T01:30:00Z"},
+                         "status": {"abstractGameState": "Final", "codedGameState": "7",
+                                    "detailedState": "Final", "statusCode": "7",
+                                    "startTimeTBD": False},
+                         "teams": {"away": team(away), "home": team(home)},
+                         "players": players,
+                         "venue": {"name": "%s Arena" % home[2], "link": "/api/v1/venues/null"}},
+            "liveData": {"plays": {"allPlays": plays,
+                                   "scoringPlays": [i for i, p in enumerate(plays)
+                                                    if p["result"]["eventTypeId"] == "GOAL"],
+                                   "penaltyPlays": [i for i, p in enumerate(plays)
+                                                    if p["result"]["eventTypeId"] == "PENALTY"],
+                                   "playsByPeriod": [], "currentPlay": plays[-1] if plays else {}},
+                         "linescore": {"currentPeriod": 3, "currentPeriodOrdinal": "3rd",
+                                       "currentPeriodTimeRemaining": "Final",
+                                       "teams": {"away": {"team": {"id": away[0]}, "goals": 2,
+                                                          "shotsOnGoal": 30},
+                                                 "home": {"team": {"id": home[0]}, "goals": 3,
+                                                          "shotsOnGoal": 28}}},
+                         "boxscore": box,
+                         "decisions": {"winner": {"id": box["teams"]["home"]["goalies"][0]},
+                                       "loser": {"id": box["teams"]["away"]["goalies"][0]}}}}
+
+
+def content(scale=1.0, seed=0):
+    rng = random.Random(seed)
+    items = [{"type": "video", "id": str(i), "title": "Highlight %d" % i,
+              "blurb": "Highlight %d" % i, "duration": _clock(rng.randint(20, 120)),
+              "playbacks": [{"name": "FLASH_%dK" % k, "width": "640", "height": "360",
+                             "url": "https://example.invalid/%d_%d.mp4" % (i, k)}
+                            for k in (192, 450, 1200, 1800)]}
+             for i in range(max(1, int(12 * scale)))]
+    return {"copyright": COPYRIGHT, "link": "/api/v1/game/%d/content" % GAME_PK_SENTINEL,
+            "editorial": {"preview": {"title": "Preview", "items": []},
+                          "recap": {"title": "Recap", "items": []}},
+            "media": {"epg": [], "milestones": {"title": "Milestones", "items": []}},
+            "highlights": {"scoreboard": {"title": "Scoreboard", "items": items},
+                           "gameCenter": {"title": "Game Center", "items": items}}}
+
+
+class Fixtures(object):
+    """
+    The set of payloads for one server. Payloads are built once; encoded()
+    returns the JSON bytes with the game id filled in.
+    """
+
+    builders = {"feed/live": feed_live, "boxscore": boxscore, "content": content,
+                "teams": lambda scale, seed: teams(),
+                "conferences": lambda scale, seed: conferences(),
+                "divisions": lambda scale, seed: divisions()}
+
+    def __init__(self, directory=None, scale=1.0, seed=0):
+        self.payloads = {}
+        for name, build in Fixtures.builders.items():
+            path = None if directory is None else os.path.join(directory, FILES[name])
+            if path is not None and os.path.exists(path):
+                with open(path, encoding="utf-8") as f:
+                    self.payloads[name] = json.load(f)
+            else:
+                self.payloads[name] = build(scale, seed)
+        self._encoded = dict((name, json.dumps(js).encode("utf-8"))
+                             for name, js in self.payloads.items())
+
+    def encoded(self, name, gid=None):
+        body = self._encoded[name]
+        if gid is not None:
+            body = body.replace(str(GAME_PK_SENTINEL).encode(), str(gid).encode())
+        return body
+
+    def live_feed(self, gid, plays, timecode):
+        """
+        feed/live for a game in progress: the fixture feed cut down to its
+        first plays plays, with a Live status and the given timestamp.
+        """
+        js = self.payloads["feed/live"]
+        game_data = dict(js["gameData"], status=dict(js["gameData"]["status"],
+                                                     abstractGameState="Live",
+                                                     detailedState="In Progress"))
+        all_plays = js["liveData"]["plays"]["allPlays"]
+        live_data = dict(js["liveData"], plays=dict(js["liveData"]["plays"],
+                                                    allPlays=all_plays[:plays]))
+        out = dict(js, metaData=dict(js.get("metaData", {}), timeStamp=timecode),
+                   gameData=game_data, liveData=live_data)
+        body = json.dumps(out).encode("utf-8")
+        return body.replace(str(GAME_PK_SENTINEL).encode(), str(gid).encode())
+
+    def next_play(self, index):
+        plays = self.payloads["feed/live"]["liveData"]["plays"]["allPlays"]
+        return copy.deepcopy(plays[index % len(plays)]) if plays else {}
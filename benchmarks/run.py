@@ -0,0 +1,221 @@
+"""
+Benchmark runner.
+
+Starts a FakeStatsAPI in this process and runs each workload in a fresh
+child process, so peak RSS and CPU time are those of the workload alone.
+Usage:
+
+    python -m benchmarks [workload ...] [--latency S] [--error-rate P] ...
+
+Nothing leaves the machine: every request goes to the local server.
+"""
+import argparse
+import json
+import multiprocessing
+import sys
+from itertools import islice
+from time import perf_counter
+from benchmarks.server import FakeStatsAPI
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+class _Recorder(object):
+    """
+    Metrics sink keeping every request's latency and outcome, for exact
+    percentiles.
+    """
+
+    def __init__(self):
+        self.latencies = []
+        self.outcomes = {}
+        self.retries = 0
+        self.bytes = 0
+
+    def __call__(self, event):
+        self.latencies.append(event.latency)
+        self.outcomes[event.outcome] = self.outcomes.get(event.outcome, 0) + 1
+        self.retries += event.retries
+        self.bytes += event.bytes
+
+
+def _percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _transport(recorder, options):
+    from nhlapi.metrics import Instrumentation
+    from nhlapi.ratelimit import RequestScheduler
+    from nhlapi.transport import Transport
+    # The real API's pacing would dominate every number; only the retry
+    # policy is kept, with short backoffs.
+    scheduler = RequestScheduler(rate=1e9, burst=1e9, backoff_base=0.01, backoff_max=0.25,
+                                 breaker_cooldown=0.25)
+    return Transport(pool_size=options["workers"] * 2, scheduler=scheduler,
+                     instrumentation=Instrumentation([recorder]))
+
+
+def season_game_ids(url, options):
+    from nhlapi.endpoints import Game
+    from nhlapi.transport import Transport
+    game = Game(transport=Transport(scheduler=False), base_url=url)
+    gids = game.season_game_ids(options["season"], 2)
+    if options["games"]:
+        gids = list(islice(gids, options["games"]))
+    return gids
+
+
+def season_boxscores(url, recorder, options):
+    """
+    Full regular season of boxscores through Game.
+    """
+    from nhlapi.endpoints import Game
+    game = Game(max_workers=options["workers"], transport=_transport(recorder, options),
+                base_url=url)
+    if options["games"]:
+        results = list(game.fetch_many(season_game_ids(url, options), "boxscore"))
+        return {"games": sum(1 for r in results if r[2] is None),
+                "errors": sum(1 for r in results if r[2] is not None)}
+    js = game.boxscore(options["season"], 2)
+    return {"games": len(js["games"]), "errors": len(js["errors"])}
+
+
+def live_polling(url, recorder, options):
+    """
+    LiveTracker following live_games games until all are final.
+    """
+    from nhlapi.live import LiveTracker
+    tracker = LiveTracker(season_game_ids(url, dict(options, games=options["live_games"])),
+                          transport=_transport(recorder, options), base_url=url,
+                          interval=0, max_workers=options["workers"])
+    polls = []
+    tracker.run(callback=lambda t, results: polls.append(results))
+    errors = sum(1 for r in polls for v in r.values() if isinstance(v, Exception))
+    return {"games": len(tracker.games), "polls": len(polls), "errors": errors}
+
+
+def reference_lookups(url, recorder, options):
+    """
+    Teams, conferences and divisions, each round starting with an empty
+    reference cache so every lookup goes to the server (conditionally).
+    """
+    from nhlapi.cache import MemoryCache
+    from nhlapi.endpoints import Conferences, Divisions, Teams
+    transport = _transport(recorder, options)
+    for _ in range(options["rounds"]):
+        cache = MemoryCache()
+        kwargs = dict(transport=transport, base_url=url, reference_cache=cache)
+        Teams(**kwargs).get()
+        Conferences(**kwargs).current
+        Divisions(**kwargs).current
+        # second lookup of each in the round is served from the cache
+        Teams(**kwargs).get()
+        Conferences(**kwargs).current
+        Divisions(**kwargs).current
+    return {"rounds": options["rounds"]}
+
+
+WORKLOADS = {"season_boxscores": season_boxscores,
+             "live_polling": live_polling,
+             "reference_lookups": reference_lookups}
+
+
+def _rusage():
+    if resource is None:
+        return None, None
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    rss = usage.ru_maxrss / (1024.0 * 1024.0 if sys.platform == "darwin" else 1024.0)
+    return usage.ru_utime + usage.ru_stime, rss
+
+
+def measure(name, url, options):
+    """
+    Runs one workload in the current process and returns its report.
+    """
+    recorder = _Recorder()
+    cpu0, _ = _rusage()
+    start = perf_counter()
+    info = WORKLOADS[name](url, recorder, options)
+    wall = perf_counter() - start
+    cpu1, rss = _rusage()
+    requests = len(recorder.latencies) - recorder.outcomes.get("cache_hit", 0)
+    return {"workload": name, "requests": requests, "seconds": wall,
+            "requests_per_sec": requests / wall if wall else None,
+            "p50_ms": _ms(_percentile(recorder.latencies, 0.5)),
+            "p99_ms": _ms(_percentile(recorder.latencies, 0.99)),
+            "peak_rss_mb": rss, "cpu_seconds": None if cpu0 is None else cpu1 - cpu0,
+            "retries": recorder.retries, "bytes": recorder.bytes,
+            "outcomes": recorder.outcomes, "info": info}
+
+
+def _ms(seconds):
+    return None if seconds is None else seconds * 1000.0
+
+
+def _fmt(value, spec):
+    return "-" if value is None else format(value, spec)
+
+
+def report(results, out=sys.stdout):
+    header = "%-18s %9s %9s %9s %9s %9s %10s %8s" % ("workload", "requests", "req/s", "p50 ms",
+                                                   "p99 ms", "cpu s", "peak MiB", "retries")
+    out.write(header + "\n" + "-" * len(header) + "\n")
+    for r in results:
+        out.write("%-18s %9d %9s %9s %9s %9s %10s %8d\n" % (
+            r["workload"], r["requests"], _fmt(r["requests_per_sec"], ".1f"),
+            _fmt(r["p50_ms"], ".2f"), _fmt(r["p99_ms"], ".2f"), _fmt(r["cpu_seconds"], ".2f"),
+            _fmt(r["peak_rss_mb"], ".1f"), r["retries"]))
+
+
+def parser():
+    p = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__.split("\n\n")[0])
+    p.add_argument("workloads", nargs="*", metavar="workload",
+                   help="one of %s (default: all)" % ", ".join(sorted(WORKLOADS)))
+    p.add_argument("--latency", type=float, default=0.005, help="server latency per request, seconds")
+    p.add_argument("--jitter", type=float, default=0.0, help="extra random latency, seconds")
+    p.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests failing with 503")
+    p.add_argument("--payload-scale", type=float, default=1.0, help="size multiplier for payloads")
+    p.add_argument("--fixtures", default=None, help="directory of recorded responses")
+    p.add_argument("--season", default="2017", help="season for the boxscore pull")
+    p.add_argument("--games", type=int, default=None, help="limit the boxscore pull to N games")
+    p.add_argument("--live-games", type=int, default=8, help="games followed by live_polling")
+    p.add_argument("--live-patches", type=int, default=20, help="patches until a live game ends")
+    p.add_argument("--rounds", type=int, default=50, help="rounds of reference lookups")
+    p.add_argument("--workers", type=int, default=5, help="client worker threads")
+    p.add_argument("--json", default=None, help="also write the results to this file")
+    return p
+
+
+def main(argv=None):
+    p = parser()
+    args = p.parse_args(argv)
+    unknown = [w for w in args.workloads if w not in WORKLOADS]
+    if unknown:
+        p.error("unknown workload %s" % ", ".join(unknown))
+    options = vars(args)
+    names = args.workloads or sorted(WORKLOADS)
+    results = []
+    ctx = multiprocessing.get_context("spawn")
+    with FakeStatsAPI(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                      payload_scale=args.payload_scale, fixtures=args.fixtures,
+                      live_patches=args.live_patches) as api:
+        for name in names:
+            api.reset()
+            if name == "live_polling":
+                api.go_live(season_game_ids(api.url, dict(options, games=args.live_games)))
+            with ctx.Pool(1) as pool:
+                result = pool.apply(measure, (name, api.url, options))
+            result["server_requests"] = api.requests
+            results.append(result)
+    report(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"options": options, "results": results}, f, indent=2)
+    return results
@@ -0,0 +1,224 @@
+"""
+Local stand-in for the NHL stats API used by the benchmarks.
+"""
+import hashlib
+import json
+import random
+import threading
+import time
+from datetime import date, timedelta
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+from benchmarks.fixtures import Fixtures
+
+
+GAMES_PER_DAY = 8
+
+
+def _timecode(n):
+    return "20171005_%06d" % n
+
+
+def _iso(value):
+    return date(int(value[:4]), int(value[5:7]), int(value[8:10]))
+
+
+class _Handler(BaseHTTPRequestHandler):
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body=b"", headers=None):
+        self.send_response(status)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def do_GET(self):
+        api = self.server.api
+        api.count()
+        delay, fail = api.draw()
+        if delay:
+            time.sleep(delay)
+        if fail:
+            return self._send(503)
+        split = urlsplit(self.path)
+        params = dict((k, v[0]) for k, v in parse_qs(split.query).items())
+        body = api.route(split.path.strip("/").split("/"), params)
+        if body is None:
+            return self._send(404, b'{"messageNumber": 10, "message": "Object not found"}',
+                              {"Content-Type": "application/json"})
+        etag = '"%s"' % hashlib.sha1(body).hexdigest()
+        if self.headers.get("If-None-Match") == etag:
+            return self._send(304, headers={"ETag": etag})
+        self._send(200, body, {"Content-Type": "application/json", "ETag": etag})
+
+
+class FakeStatsAPI(object):
+    """
+    Threaded HTTP server answering game (feed/live, diffPatch, boxscore,
+    content), schedule, teams, conferences and divisions requests from
+    Fixtures.
+
+    Every season has a regular season of season_games games, played
+    GAMES_PER_DAY a day from October 4th; /schedule lists them by season,
+    date or date range. Other game types have no scheduled games.
+
+    Every request waits latency seconds plus up to jitter seconds, and fails
+    with a 503 with probability error_rate. payload_scale grows or shrinks
+    the synthesized payloads (plays per feed, players per boxscore).
+
+    Games passed to go_live() are simulated as in progress: each
+    feed/live/diffPatch request adds one play and advances the timestamp,
+    and the game goes Final after live_patches patches. Every other game is
+    served as already final.
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, payload_scale=1.0,
+                 fixtures=None, live_patches=10, season_games=1271, host="127.0.0.1",
+                 port=0, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.fixtures = Fixtures(fixtures, scale=payload_scale, seed=seed)
+        self.live_patches = live_patches
+        self.season_games = season_games
+        self.requests = 0
+        self._live = {}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.api = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return "http://%s:%d/api" % (host, port)
+
+    def count(self):
+        with self._lock:
+            self.requests += 1
+
+    def draw(self):
+        with self._lock:
+            delay = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0.0)
+            fail = self.error_rate > 0 and self._rng.random() < self.error_rate
+        return delay, fail
+
+    def route(self, parts, params):
+        if parts[:2] != ["api", "v1"] or len(parts) < 3:
+            return None
+        resource, rest = parts[2], parts[3:]
+        if resource == "game" and rest:
+            detail = "/".join(rest[1:])
+            if detail == "feed/live/diffPatch":
+                return self._diff_patch(rest[0], params.get("startTimecode"))
+            if detail == "feed/live":
+                return self._feed(rest[0])
+            if detail in ("boxscore", "content"):
+                return self.fixtures.encoded(detail, rest[0])
+            return None
+        if resource == "schedule" and not rest:
+            return self._schedule(params)
+        if resource in ("teams", "conferences", "divisions"):
+            if not rest:
+                return self.fixtures.encoded(resource)
+            js = self.fixtures.payloads[resource]
+            found = [x for x in js[resource] if str(x["id"]) == rest[0]]
+            if not found:
+                return None
+            return json.dumps({"copyright": js.get("copyright"), resource: found}).encode("utf-8")
+        return None
+
+    def _schedule(self, params):
+        start = params.get("startDate") or params.get("date")
+        end = params.get("endDate") or params.get("date")
+        season = params.get("season")
+        if season is None and start is not None:
+            first = _iso(start)
+            season = "%d%d" % ((first.year, first.year + 1) if first.month >= 9
+                               else (first.year - 1, first.year))
+        dates = {}
+        if season is not None and params.get("gameType", "R") == "R":
+            opening = date(int(season[:4]), 10, 4)
+            with self._lock:
+                live = dict(self._live)
+            for n in range(1, self.season_games + 1):
+                day = (opening + timedelta(days=(n - 1) // GAMES_PER_DAY)).isoformat()
+                if (start is not None and day < _iso(start).isoformat()) or \
+                        (end is not None and day > _iso(end).isoformat()):
+                    continue
+                gid = "%s02%04d" % (season[:4], n)
+                state = "Live" if live.get(gid, self.live_patches) < self.live_patches \
+                    else "Final"
+                dates.setdefault(day, []).append({"gamePk": int(gid), "gameType": "R",
+                                                  "season": season,
+                                                  "status": {"abstractGameState": state}})
+        return json.dumps({"copyright": self.fixtures.payloads["teams"].get("copyright"),
+                           "totalGames": sum(len(g) for g in dates.values()),
+                           "dates": [{"date": d, "games": g} for d, g in sorted(dates.items())]}
+                          ).encode("utf-8")
+
+    def _feed(self, gid):
+        with self._lock:
+            n = self._live.get(gid)
+        if n is None or n >= self.live_patches:
+            return self.fixtures.encoded("feed/live", gid)
+        return self.fixtures.live_feed(gid, n + 1, _timecode(n))
+
+    def _diff_patch(self, gid, start):
+        with self._lock:
+            n = self._live.get(gid)
+            if n is None:
+                return b"[]"
+            if start != _timecode(n):
+                stale = True
+            else:
+                stale = False
+                if n < self.live_patches:
+                    self._live[gid] = n + 1
+        if stale:
+            # clients fall back to the full document when they're out of sync
+            return self._feed(gid)
+        if n >= self.live_patches:
+            return b"[]"
+        ops = [{"op": "replace", "path": "/metaData/timeStamp", "value": _timecode(n + 1)},
+               {"op": "add", "path": "/liveData/plays/allPlays/-",
+                "value": self.fixtures.next_play(n + 1)}]
+        if n + 1 >= self.live_patches:
+            ops.append({"op": "replace", "path": "/gameData/status/abstractGameState",
+                        "value": "Final"})
+        return json.dumps([{"diff": ops}]).encode("utf-8")
+
+    def go_live(self, game_ids):
+        with self._lock:
+            for gid in game_ids:
+                self._live[str(gid)] = 0
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self._live.clear()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
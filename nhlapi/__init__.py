@@ -1 +1 @@
-__all__ = ['base', 'config', 'endpoints', 'utils']
\ No newline at end of file
+__all__ = ['aio', 'archive', 'base', 'cache', 'config', 'decoder', 'endpoints', 'export', 'feed', 'league', 'live', 'metrics', 'models', 'pipeline', 'players', 'plays', 'ratelimit', 'registry', 'standings', 'store', 'transport', 'utils']
\ No newline at end of file
@@ -0,0 +1,337 @@
+"""
+asyncio client mirroring the blocking classes in nhlapi.endpoints.
+
+Requires aiohttp. All requests made through one AsyncTransport share a
+single connection pool and a semaphore bounding the number in flight, so
+thousands of game requests can be scheduled on one event loop. They are
+paced and retried by an AsyncRequestScheduler, the event loop counterpart
+of nhlapi.ratelimit.RequestScheduler.
+"""
+import asyncio
+from datetime import datetime as dt
+from datetime import timedelta as td
+from nhlapi import config
+from nhlapi.endpoints import Game as _Game, Schedule as _Schedule, Teams as _Teams
+from nhlapi.ratelimit import RequestScheduler
+from nhlapi.utils import season_index
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+
+async def _wait_for(check, poll=None):
+    # check() returns 0 when ready, else the seconds to wait before asking
+    # again; poll caps the wait for checks that can become ready early.
+    while True:
+        wait = check()
+        if not wait:
+            return
+        await asyncio.sleep(wait if poll is None else min(wait, poll))
+
+
+class AsyncRequestScheduler(RequestScheduler):
+    """
+    RequestScheduler for coroutines: the same adaptive token bucket,
+    backoff with jitter, Retry-After handling and circuit breaker, waiting
+    with asyncio.sleep instead of blocking the event loop.
+    last_retries is not tracked, as coroutines share a thread.
+    """
+
+    async def call(self, send):
+        """
+        Awaits send() (which performs one request and returns the aiohttp
+        response) under the rate limit, retrying retryable failures.
+        Returns the last response, or re-raises the last connection error.
+        """
+        attempt = 0
+        while True:
+            await _wait_for(self.breaker.admit, poll=0.1)
+            await _wait_for(self.bucket.take)
+            try:
+                resp = await send()
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                delay = self._on_error(attempt)
+                if delay is None:
+                    raise
+            else:
+                delay = self._on_response(resp.status, resp, attempt)
+                if delay is None:
+                    return resp
+                resp.release()
+            attempt += 1
+            self.retries += 1
+            await asyncio.sleep(min(delay, self.backoff_max))
+
+
+class AsyncTransport(object):
+    """
+    Requests are paced and retried by scheduler; pass scheduler=False to
+    send them directly.
+    """
+
+    def __init__(self, concurrency=config.MAX_WORKERS, timeout=config.TIMEOUT,
+                 compress=True, headers=None, session=None, scheduler=None):
+        if aiohttp is None:
+            raise ImportError("nhlapi.aio requires aiohttp. "
+                              "install it with 'pip install aiohttp'")
+        if scheduler is None:
+            scheduler = AsyncRequestScheduler()
+        self.scheduler = scheduler or None
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.headers = {"Accept-Encoding": "gzip, deflate" if compress else "identity"}
+        if headers is not None:
+            self.headers.update(headers)
+        self.session = session
+        self._semaphore = None
+
+    def _ensure_session(self):
+        # aiohttp sessions and semaphores must be created inside the running loop.
+        if self.session is None:
+            connect, read = self.timeout
+            self.session = aiohttp.ClientSession(
+                headers=self.headers,
+                connector=aiohttp.TCPConnector(limit=self.concurrency),
+                timeout=aiohttp.ClientTimeout(connect=connect, sock_read=read))
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self.session
+
+    async def get_json(self, url, params=None, headers=None):
+        session = self._ensure_session()
+        async with self._semaphore:
+            if self.scheduler is None:
+                resp = await session.get(url, params=params, headers=headers)
+            else:
+                resp = await self.scheduler.call(
+                    lambda: session.get(url, params=params, headers=headers))
+            async with resp:
+                resp.raise_for_status()
+                return await resp.json(content_type=None)
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+class AsyncEndpoint(object):
+
+    def __init__(self, transport=None, base_url=None):
+        self.transport = AsyncTransport() if transport is None else transport
+        self.api_url = config.BASE_URL if base_url is None else base_url
+        self.url_template = "/".join([self.api_url, "v" + str(config.VERSION)])
+        self.request_headers = {}
+        self.request_params = {}
+
+    async def _get(self, url, params=None):
+        return await self.transport.get_json(
+            url, params=self.request_params if params is None else params,
+            headers=self.request_headers)
+
+
+class Game(AsyncEndpoint):
+
+    def __init__(self, use_schedule=True, **kwargs):
+        super().__init__(**kwargs)
+        self.base_url = "/".join([self.url_template, "game"])
+        self.use_schedule = use_schedule
+        self.season_string = None
+
+    async def season_game_ids(self, season, game_type):
+        """
+        Game IDs for a season and game type. Uses the schedule when
+        use_schedule is set, and falls back to enumerating every possible
+        game number from the season index if the schedule is unavailable.
+        """
+        yr0 = _Game._check_date_format(season, type_="season")
+        gt = _Game._check_game_type(game_type)
+        season_string = "".join([yr0, str(int(yr0) + 1)])
+        if self.use_schedule:
+            params = {"season": season_string, "gameType": _Schedule.game_types[gt]}
+            try:
+                js = await self._get("/".join([self.url_template, "schedule"]), params=params)
+                gids = sorted(set(str(g['gamePk']) for d in js.get('dates', [])
+                                  for g in d.get('games', [])))
+            except Exception:
+                gids = []
+            gids = [g for g in gids if g[4:6] == gt]
+            if gids:
+                return gids
+        return ["".join([yr0, gt, i]) for i in season_index().game_numbers(season_string, gt)]
+
+    async def _game_ids(self, season, game_type, game_number):
+        yr0 = _Game._check_date_format(season, type_="season")
+        gt = _Game._check_game_type(game_type)
+        self.season_string = "".join([yr0, str(int(yr0) + 1)])
+        if game_number == 0:
+            return await self.season_game_ids(season, game_type)
+        gnum = _Game._check_game_number(game_number, self.season_string, gt)
+        return ["".join([yr0, gt, gnum])]
+
+    async def _fetch(self, gid, detail, params=None):
+        try:
+            js = await self._get("/".join([self.base_url, gid, detail]), params=params)
+        except Exception as e:
+            return gid, None, e
+        if isinstance(js, dict):
+            js.pop("copyright", None)
+        return gid, js, None
+
+    async def _stream(self, gids, detail, params=None):
+        tasks = [asyncio.ensure_future(self._fetch(gid, detail, params)) for gid in gids]
+        try:
+            for fut in asyncio.as_completed(tasks):
+                yield await fut
+        finally:
+            for t in tasks:
+                t.cancel()
+
+    async def _process(self, detail, season, game_type, game_number, params=None):
+        gids = await self._game_ids(season, game_type, game_number)
+        results = await asyncio.gather(*[self._fetch(gid, detail, params) for gid in gids])
+        data = {"games": [], "errors": []}
+        for gid, js, err in results:
+            if err is None:
+                data['games'].append(js)
+            elif game_number != 0:
+                raise err
+            else:
+                data['errors'].append({"gamePk": gid, "error": repr(err)})
+        return data
+
+    async def stream(self, detail, season, game_type):
+        """
+        Async generator of (game_pk, data, error) tuples for every game of
+        the season, yielded in completion order.
+        """
+        gids = await self._game_ids(season, game_type, 0)
+        async for result in self._stream(gids, detail):
+            yield result
+
+    async def feed(self, season, game_type, game_number=0):
+        return await self._process("feed/live", season, game_type, game_number)
+
+    async def boxscore(self, season, game_type, game_number=0):
+        return await self._process("boxscore", season, game_type, game_number)
+
+    async def content(self, season, game_type, game_number=0):
+        return await self._process("content", season, game_type, game_number)
+
+    async def updates(self, season, game_type, game_date, game_number=0,
+                      from_time=None, n_minutes=None):
+        """
+        Single diffPatch pull for the game(s) since from_time (HHMMSS) or
+        since n_minutes ago. Unlike the blocking client this does not loop;
+        schedule repeated calls on the event loop instead.
+        """
+        if (from_time is None) == (n_minutes is None):
+            raise ValueError("either from_time OR n_minutes must be specified")
+        dat = _Game._check_date_format(game_date, type_="date")
+        if from_time is not None:
+            tt = _Game._check_time_format(from_time)
+        else:
+            tt = (dt.now() - td(minutes=n_minutes)).strftime("%H%M%S")
+        params = dict(self.request_params, startTimecode="_".join([dat, tt]))
+        return await self._process("feed/live/diffPatch", season, game_type,
+                                   game_number, params=params)
+
+
+class Teams(AsyncEndpoint):
+
+    def __init__(self, ID=None, expand=None, season=None, **kwargs):
+        super().__init__(**kwargs)
+        self.base_url = "/".join([self.url_template, "teams"])
+        self.ID = ID
+        self.expand = [] if expand is None else list(expand)
+        self.season = season
+
+        if type(self.ID) is list:
+            self.request_params.update({"teamId": ",".join([str(i) for i in self.ID])})
+        elif self.ID is not None:
+            self.request_params.update({"teamId": str(self.ID)})
+        if self.season is not None:
+            self.request_params.update({"season": _Teams._format_season(season=self.season)})
+
+    async def _expanded(self, *extra):
+        ext = [i for i in self.expand + list(extra) if _Teams._check_expand_arg(i) is True]
+        params = dict(self.request_params)
+        if ext:
+            params.update({"expand": ",".join(ext)})
+        js = await self._get(self.base_url, params=params)
+        return {"teams": js['teams']}
+
+    async def get(self):
+        return await self._expanded()
+
+    async def roster(self):
+        return await self._expanded("team.roster")
+
+    async def stats(self):
+        return await self._expanded("team.stats")
+
+
+class Conferences(AsyncEndpoint):
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.base_url = "/".join([self.url_template, "conferences"])
+
+    async def current(self):
+        js = await self._get(self.base_url)
+        for c in js['conferences']:
+            c.update({"active": True})
+        return js
+
+    async def inactive(self, current=None):
+        curr = await self.current() if current is None else current
+        min_id = min([c['id'] for c in curr['conferences']])
+        found = await _fetch_ids(self, "conferences", range(1, min_id))
+        for c in found:
+            c.update({"active": False})
+        found.append({"id": 7, "name": "World Cup of Hockey",
+                      "link": "/api/v1/conferences/7", "abbreviation": "WCH",
+                      "shortName": "WCup", "active": False})
+        return {"conferences": found}
+
+
+class Divisions(AsyncEndpoint):
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.base_url = "/".join([self.url_template, "divisions"])
+
+    async def current(self):
+        return await self._get(self.base_url)
+
+    async def inactive(self, current=None):
+        curr = await self.current() if current is None else current
+        min_id = min([d['id'] for d in curr['divisions']])
+        found = await _fetch_ids(self, "divisions", range(1, min_id))
+        return {"divisions": found}
+
+
+async def _fetch_ids(endpoint, key, ids):
+    # IDs the API doesn't know answer 404; any other failure is raised so a
+    # partial list isn't mistaken for the full one.
+    async def one(i):
+        try:
+            js = await endpoint._get("/".join([endpoint.base_url, str(i)]))
+        except aiohttp.ClientResponseError as e:
+            if e.status == 404:
+                return []
+            raise
+        return js.get(key, [])
+
+    found = []
+    for items in await asyncio.gather(*[one(i) for i in ids]):
+        found.extend(items)
+    return found
@@ -0,0 +1,283 @@
+import hashlib
+import mmap
+import os
+import struct
+import zlib
+from datetime import timedelta
+from http import HTTPStatus
+from threading import Lock
+from time import perf_counter
+from urllib.parse import urlencode
+import requests
+from requests.structures import CaseInsensitiveDict
+from nhlapi import config
+from nhlapi.transport import Transport
+
+
+# Index entry: request digest, segment number, record offset, raw size, status.
+_ENTRY = struct.Struct("<16sIQIH2x")
+# Record header in a segment: request key length, compressed body length.
+_RECORD = struct.Struct("<HI")
+
+
+def request_key(url, params=None):
+    """
+    Canonical form of a GET request, url plus its params sorted by name.
+    """
+    if not params:
+        return url
+    return "?".join([url, urlencode(sorted(params.items(), key=lambda kv: kv[0]), doseq=True)])
+
+
+class Archive(object):
+    """
+    Append-only archive of raw API responses keyed by URL and params.
+
+    Responses are zlib compressed and appended to segment files, rolling
+    over to a new segment after segment_bytes. Each record is located
+    through index.bin, a flat file of fixed size entries that is memory
+    mapped; reads decompress straight from the mapped segment. Storing a
+    request again appends a new record and the latest one wins. Index
+    entries that don't point at a complete record of their request (a tail
+    left by an interrupted write) are dropped when the archive is opened.
+
+    One process may write an archive at a time; any number may read it.
+    """
+
+    def __init__(self, path=config.ARCHIVE_DIR, segment_bytes=config.ARCHIVE_SEGMENT_BYTES,
+                 level=config.ARCHIVE_LEVEL):
+        self.path = os.path.abspath(path)
+        self.segment_bytes = segment_bytes
+        self.level = level
+        self._lock = Lock()
+        self._maps = {}
+        self._writer = None
+        os.makedirs(self.path, exist_ok=True)
+        self._index_path = os.path.join(self.path, "index.bin")
+        with open(self._index_path, mode="ab") as f:
+            # Drop a partial entry left by an interrupted write.
+            size = f.tell()
+            if size % _ENTRY.size:
+                f.truncate(size - size % _ENTRY.size)
+        self._index = open(self._index_path, mode="r+b")
+        self._index_map = None
+        self._slots = {}
+        self._segment = 0
+        self._load_index()
+
+    def _segment_path(self, n):
+        return os.path.join(self.path, "segment-%06d.dat" % n)
+
+    def _remap_index(self):
+        if self._index_map is not None:
+            self._index_map.close()
+        size = os.fstat(self._index.fileno()).st_size
+        self._index_map = mmap.mmap(self._index.fileno(), size, access=mmap.ACCESS_READ) \
+            if size else None
+
+    def _load_index(self):
+        self._remap_index()
+        m = self._index_map
+        n = 0 if m is None else len(m) // _ENTRY.size
+        sizes = {}
+        for slot in range(n):
+            digest, segment, offset, _, _ = _ENTRY.unpack_from(m, slot * _ENTRY.size)
+            if not self._valid(digest, segment, offset, sizes):
+                # Junk left by an interrupted write or a damaged disk; keep
+                # the entries before it.
+                self._index.truncate(slot * _ENTRY.size)
+                self._remap_index()
+                break
+            self._slots[digest] = slot
+            self._segment = max(self._segment, segment)
+
+    def _valid(self, digest, segment, offset, sizes):
+        # An entry is valid when its whole record is in the segment and
+        # holds the request the entry is for.
+        size = sizes.get(segment)
+        if size is None:
+            try:
+                size = os.path.getsize(self._segment_path(segment))
+            except OSError:
+                size = 0
+            sizes[segment] = size
+        if offset + _RECORD.size > size:
+            return False
+        m = self._map(segment, offset + _RECORD.size)
+        key_len, body_len = _RECORD.unpack_from(m, offset)
+        start = offset + _RECORD.size
+        if start + key_len + body_len > size:
+            return False
+        return hashlib.blake2b(m[start:start + key_len], digest_size=16).digest() == digest
+
+    def _entry(self, digest):
+        slot = self._slots.get(digest)
+        if slot is None:
+            return None
+        if self._index_map is None or (slot + 1) * _ENTRY.size > len(self._index_map):
+            self._remap_index()
+        return _ENTRY.unpack_from(self._index_map, slot * _ENTRY.size)
+
+    def _map(self, segment, end):
+        m = self._maps.get(segment)
+        if m is None or len(m) < end:
+            if m is not None:
+                m.close()
+            with open(self._segment_path(segment), mode="rb") as f:
+                m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[segment] = m
+        return m
+
+    def _record(self, entry):
+        _, segment, offset, size, status = entry
+        m = self._map(segment, offset + _RECORD.size)
+        key_len, body_len = _RECORD.unpack_from(m, offset)
+        start = offset + _RECORD.size + key_len
+        m = self._map(segment, start + body_len)
+        return m, offset + _RECORD.size, key_len, start, body_len
+
+    @staticmethod
+    def digest(url, params=None):
+        return hashlib.blake2b(request_key(url, params).encode("utf-8"), digest_size=16).digest()
+
+    def put(self, url, params, raw, status=200):
+        """
+        Appends the raw response body of a request.
+        """
+        key = request_key(url, params).encode("utf-8")
+        digest = hashlib.blake2b(key, digest_size=16).digest()
+        body = zlib.compress(raw, self.level)
+        with self._lock:
+            # Also rolls past a segment an earlier run left full.
+            while self._writer is None or self._writer.tell() >= self.segment_bytes:
+                if self._writer is not None:
+                    self._writer.close()
+                    self._segment += 1
+                self._writer = open(self._segment_path(self._segment), mode="ab")
+            offset = self._writer.tell()
+            self._writer.write(_RECORD.pack(len(key), len(body)))
+            self._writer.write(key)
+            self._writer.write(body)
+            # The record must be on disk before an index entry points at it.
+            self._writer.flush()
+            self._index.seek(0, os.SEEK_END)
+            slot = self._index.tell() // _ENTRY.size
+            self._index.write(_ENTRY.pack(digest, self._segment, offset, len(raw), status))
+            self._index.flush()
+            self._slots[digest] = slot
+
+    def get(self, url, params=None):
+        """
+        Returns (status, raw body) of the latest response stored for a
+        request, or None.
+        """
+        with self._lock:
+            entry = self._entry(Archive.digest(url, params))
+            if entry is None:
+                return None
+            m, _, _, start, body_len = self._record(entry)
+            with memoryview(m) as view:
+                raw = zlib.decompress(view[start:start + body_len], bufsize=max(entry[3], 1))
+            return entry[4], raw
+
+    def get_raw(self, url, params=None):
+        found = self.get(url, params)
+        return None if found is None else found[1]
+
+    def requests(self):
+        """
+        Yields the canonical key (url?params) of every archived request.
+        """
+        with self._lock:
+            entries = [self._entry(d) for d in self._slots]
+        for entry in entries:
+            with self._lock:
+                m, key_start, key_len, _, _ = self._record(entry)
+                key = bytes(m[key_start:key_start + key_len])
+            yield key.decode("utf-8")
+
+    def __contains__(self, request):
+        """
+        request is a url or a (url, params) pair.
+        """
+        url, params = (request, None) if isinstance(request, str) else request
+        return Archive.digest(url, params) in self._slots
+
+    def __len__(self):
+        return len(self._slots)
+
+    def close(self):
+        with self._lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+            for m in self._maps.values():
+                m.close()
+            self._maps.clear()
+            if self._index_map is not None:
+                self._index_map.close()
+                self._index_map = None
+            self._index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class RecordingTransport(Transport):
+    """
+    Transport that archives every response it receives.
+
+    Successful responses and client errors (e.g. a 404 for a game that
+    doesn't exist) are stored; 304s, 429s and server errors are not, so
+    retried requests are archived once, with their final body.
+    """
+
+    def __init__(self, archive, **kwargs):
+        super().__init__(**kwargs)
+        self.archive = archive
+
+    def _send(self, url, params=None, headers=None):
+        req = super()._send(url, params=params, headers=headers)
+        if req.status_code < 500 and req.status_code not in (304, 429):
+            self.archive.put(url, params, req.content, status=req.status_code)
+        return req
+
+
+class ReplayTransport(Transport):
+    """
+    Transport that answers requests from an Archive without touching the
+    network, so endpoints re-run against recorded data deterministically.
+
+    Requests missing from the archive get a 404. Responses carry an ETag
+    derived from the body and honour If-None-Match, so conditional requests
+    behave as they would against the API. Requests are not rate limited
+    unless a scheduler is given.
+    """
+
+    def __init__(self, archive, scheduler=False, **kwargs):
+        super().__init__(scheduler=scheduler, **kwargs)
+        self.archive = archive
+
+    def _send(self, url, params=None, headers=None):
+        start = perf_counter()
+        found = self.archive.get(url, params)
+        req = requests.Response()
+        req.url = requests.Request("GET", url, params=params).prepare().url
+        req.encoding = "utf-8"
+        req.headers = CaseInsensitiveDict({"Content-Type": "application/json;charset=UTF-8"})
+        if found is None:
+            req.status_code, req.reason, req._content = 404, "Not Archived", b""
+        else:
+            status, raw = found
+            etag = '"%s"' % hashlib.sha1(raw).hexdigest()
+            req.headers["ETag"] = etag
+            if (headers or {}).get("If-None-Match") == etag:
+                req.status_code, req.reason, req._content = 304, "Not Modified", b""
+            else:
+                req.status_code, req._content = status, raw
+                req.reason = HTTPStatus(status).phrase
+        req.elapsed = timedelta(seconds=perf_counter() - start)
+        return req
@@ -1,14 +1,31 @@
+import logging
 from nhlapi import config
+from nhlapi.cache import reference_cache as _reference_cache
+from nhlapi.decoder import freeze
+from nhlapi.metrics import RequestEvent
+from nhlapi.transport import default_transport
 from abc import abstractmethod
+from time import perf_counter
+
+
+logger = logging.getLogger("nhlapi.store")
 
 
 class BaseEndpoint(object):
 
-    def __init__(self):
-        self.url_template = "/".join([config.BASE_URL,
+    def __init__(self, transport=None, base_url=None, reference_cache=None, store=None):
+        self.transport = default_transport() if transport is None else transport
+        self.reference_cache = _reference_cache if reference_cache is None else reference_cache
+        # GameStore that ingests every response fetched through this endpoint
+        self.store = store
+        self.api_url = config.BASE_URL if base_url is None else base_url
+        self.url_template = "/".join([self.api_url,
                                       "v" + str(config.VERSION)])
         self.request_headers = {}
         self.request_params = {}
+        # Whether the last request returned new data (False when served
+        # from a 304 or an unchanged body).
+        self.changed = None
         self.data = {"copyright": "NHL and the NHL Shield are "
                                   "registered trademarks of "
                                   "the National Hockey League. "
@@ -16,6 +33,48 @@ class BaseEndpoint(object):
                                   "the property of the NHL and its teams. "
                                   "© NHL 2019. All Rights Reserved."}
 
+    def _reference(self, resource, url, params=None, prepare=None):
+        """
+        GET a slow-changing reference resource through the shared memory
+        cache. prepare, if given, is applied to the decoded response once
+        before it is cached. The response is shared between callers and
+        read-only (see decoder.freeze).
+        """
+        key = (url, tuple(sorted((params or {}).items())))
+        self.changed = None
+        start = perf_counter()
+
+        def load():
+            js, self.changed = self.transport.get_conditional(url, params=params,
+                                                              headers=self.request_headers,
+                                                              prepare=prepare)
+            return freeze(js)
+
+        js = self.reference_cache.get(resource, key, load)
+        if self.changed is None:
+            self.changed = False
+            self._cache_hit(url, start)
+        return js
+
+    def _ingest(self, kind, js, game_pk=None):
+        # The response was fetched fine; failing to store it shouldn't fail
+        # the request.
+        if self.store is not None:
+            try:
+                self.store.ingest(kind, js, game_pk=game_pk)
+            except Exception:
+                logger.warning("failed to store %s %s", kind, game_pk or "", exc_info=True)
+
+    def _cache_hit(self, url, start, size=0):
+        """
+        Reports a response served from a local cache to the transport's
+        instrumentation, if it has any sinks.
+        """
+        instrumentation = getattr(self.transport, "instrumentation", None)
+        if instrumentation:
+            instrumentation.emit(RequestEvent(url, outcome="cache_hit",
+                                              transfer=perf_counter() - start, bytes=size))
+
     @abstractmethod
     def get(self, *args, **kwargs):
         raise NotImplementedError()
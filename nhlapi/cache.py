@@ -0,0 +1,200 @@
+import gzip
+import os
+from collections import OrderedDict
+from concurrent.futures import Future
+from threading import Lock
+from time import monotonic, time
+from nhlapi import config
+from nhlapi.decoder import dumps, loads
+
+
+class DiskCache(object):
+    """
+    On-disk cache of game responses keyed by game ID and detail.
+
+    Entries are stored gzip compressed, one file per (game, detail). Entries
+    for final games never expire; entries for live games are considered
+    fresh for live_ttl seconds. When the total size exceeds max_bytes the
+    least recently read entries are evicted.
+    """
+
+    _suffixes = {True: ".final.json.gz", False: ".live.json.gz"}
+
+    def __init__(self, path=config.CACHE_DIR, max_bytes=config.CACHE_MAX_BYTES,
+                 live_ttl=config.CACHE_LIVE_TTL, final_ttl=None):
+        self.path = os.path.abspath(path)
+        self.max_bytes = max_bytes
+        self.live_ttl = live_ttl
+        self.final_ttl = final_ttl
+        self._lock = Lock()
+        os.makedirs(self.path, exist_ok=True)
+        # Entry sizes in least-recently-read-first order; seeded from atime
+        # so the LRU order survives across processes.
+        found = []
+        for name in os.listdir(self.path):
+            if name.endswith(".json.gz"):
+                st = os.stat(os.path.join(self.path, name))
+                found.append((st.st_atime, name, st.st_size))
+        found.sort()
+        self._sizes = OrderedDict((name, size) for _, name, size in found)
+        self.size = sum(self._sizes.values())
+        self._final = set(n.split("_", 1)[0] for n in self._sizes
+                          if n.endswith(DiskCache._suffixes[True]))
+
+    @staticmethod
+    def _key(gid, detail):
+        return "_".join([str(gid), detail.replace("/", "-")])
+
+    def _file(self, gid, detail, final):
+        return self._key(gid, detail) + DiskCache._suffixes[final]
+
+    def _fresh(self, fpath, final):
+        ttl = self.final_ttl if final else self.live_ttl
+        if ttl is None:
+            return True
+        return time() - os.path.getmtime(fpath) <= ttl
+
+    def is_final(self, gid):
+        return str(gid) in self._final
+
+    def get_raw(self, gid, detail):
+        """
+        Returns the cached response bytes for (gid, detail), or None.
+        """
+        for final in (True, False):
+            name = self._file(gid, detail, final)
+            if name not in self._sizes:
+                continue
+            fpath = os.path.join(self.path, name)
+            try:
+                if not self._fresh(fpath, final):
+                    continue
+                with gzip.open(fpath, mode="rb") as f:
+                    raw = f.read()
+                # atime records the last read for LRU eviction; mtime keeps
+                # the write time used for freshness.
+                os.utime(fpath, (time(), os.path.getmtime(fpath)))
+                with self._lock:
+                    self._sizes.move_to_end(name)
+            except (OSError, KeyError):
+                self._discard(name)
+                continue
+            return raw
+        return None
+
+    def get(self, gid, detail):
+        raw = self.get_raw(gid, detail)
+        if raw is None:
+            return None
+        try:
+            return loads(raw)
+        except ValueError:
+            return None
+
+    def set_raw(self, gid, detail, raw, final=False):
+        name = self._file(gid, detail, final)
+        fpath = os.path.join(self.path, name)
+        raw = gzip.compress(raw)
+        tmp = "%s.%d.tmp" % (fpath, id(raw))
+        with open(tmp, mode="wb") as f:
+            f.write(raw)
+        os.replace(tmp, fpath)
+        os.utime(fpath)
+        with self._lock:
+            self.size += len(raw) - self._sizes.pop(name, 0)
+            self._sizes[name] = len(raw)
+            if final:
+                self._final.add(str(gid))
+                self._discard(self._file(gid, detail, False), locked=True)
+            self._evict()
+
+    def set(self, gid, detail, data, final=False):
+        self.set_raw(gid, detail, dumps(data), final=final)
+
+    def _discard(self, name, locked=False):
+        if not locked:
+            with self._lock:
+                return self._discard(name, locked=True)
+        if name in self._sizes:
+            self.size -= self._sizes.pop(name)
+            try:
+                os.remove(os.path.join(self.path, name))
+            except OSError:
+                pass
+
+    def _evict(self):
+        if self.max_bytes is None:
+            return
+        while self.size > self.max_bytes and len(self._sizes) > 1:
+            self._discard(next(iter(self._sizes)), locked=True)
+
+    def clear(self):
+        with self._lock:
+            for name in list(self._sizes):
+                self._discard(name, locked=True)
+            self._final.clear()
+
+
+class MemoryCache(object):
+    """
+    Process-wide memoization for slow-changing reference data.
+
+    Values are cached per (resource, key) for the resource's TTL in seconds.
+    Concurrent requests for the same missing key are collapsed into a single
+    load; the other callers wait for its result. Cached values are shared
+    between callers; the endpoints cache responses frozen (see
+    decoder.freeze), so modifying one in place raises TypeError.
+    """
+
+    def __init__(self, ttls=None, default_ttl=config.REFERENCE_DEFAULT_TTL):
+        self.ttls = dict(config.REFERENCE_TTLS if ttls is None else ttls)
+        self.default_ttl = default_ttl
+        self._entries = {}
+        self._inflight = {}
+        self._generation = 0
+        self._lock = Lock()
+
+    def get(self, resource, key, loader):
+        k = (resource, key)
+        with self._lock:
+            entry = self._entries.get(k)
+            if entry is not None and entry[0] > monotonic():
+                return entry[1]
+            fut = self._inflight.get(k)
+            owner = fut is None
+            if owner:
+                fut = Future()
+                self._inflight[k] = fut
+            generation = self._generation
+        if not owner:
+            return fut.result()
+
+        try:
+            value = loader()
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(k, None)
+            fut.set_exception(e)
+            raise
+        with self._lock:
+            self._inflight.pop(k, None)
+            # Don't store a value whose load raced with an invalidation.
+            if generation == self._generation:
+                ttl = self.ttls.get(resource, self.default_ttl)
+                self._entries[k] = (monotonic() + ttl, value)
+        fut.set_result(value)
+        return value
+
+    def invalidate(self, resource=None, key=None):
+        with self._lock:
+            self._generation += 1
+            if resource is None:
+                self._entries.clear()
+            elif key is None:
+                for k in [k for k in self._entries if k[0] == resource]:
+                    del self._entries[k]
+            else:
+                self._entries.pop((resource, key), None)
+
+
+reference_cache = MemoryCache()
@@ -3,4 +3,33 @@ import os
 
 BASE_URL = "https://statsapi.web.nhl.com/api"
 VERSION = 1
-SEASONS_INFO = os.path.abspath(os.path.join(os.getcwd(), 'seasons_info.csv'))
+MAX_WORKERS = 5
+POOL_SIZE = 10
+TIMEOUT = (3.05, 30)
+RATE_LIMIT = 20
+RATE_BURST = 20
+RATE_MIN = 1
+MAX_RETRIES = 5
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 60
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN = 30
+CONDITIONAL_MAX_ENTRIES = 256
+CONDITIONAL_MAX_BYTES = 32 * 1024 ** 2
+JSON_BACKEND = "auto"
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "nhlapi")
+CACHE_MAX_BYTES = 2 * 1024 ** 3
+CACHE_LIVE_TTL = 60
+STORE_PATH = os.path.join(CACHE_DIR, "games.sqlite3")
+ARCHIVE_DIR = os.path.join(CACHE_DIR, "archive")
+ARCHIVE_SEGMENT_BYTES = 256 * 1024 ** 2
+ARCHIVE_LEVEL = 6
+LIVE_POLL_INTERVAL = 30
+REFERENCE_DEFAULT_TTL = 3600
+REFERENCE_TTLS = {"conferences": 24 * 3600,
+                  "divisions": 24 * 3600,
+                  "teams": 3600,
+                  "league": 3600}
+SEASONS_INFO = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'seasons_info.csv')
+PRESEASON_MAX_GAMES = 150
+ALLSTAR_MAX_GAMES = 10
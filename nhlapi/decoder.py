@@ -0,0 +1,141 @@
+"""
+Pluggable JSON decoding.
+
+The fastest installed backend is used: orjson, then msgspec, then the
+standard library. decode() can also build msgspec Structs directly from the
+raw bytes, which skips every field the struct doesn't declare.
+"""
+import json
+from nhlapi import config
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+
+def _stdlib_dumps(obj):
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+
+def _backends():
+    found = {"json": (json.loads, _stdlib_dumps)}
+    if msgspec is not None:
+        found["msgspec"] = (msgspec.json.decode, msgspec.json.encode)
+    if orjson is not None:
+        found["orjson"] = (orjson.loads, orjson.dumps)
+    return found
+
+
+BACKENDS = _backends()
+
+
+class Decoder(object):
+
+    def __init__(self, backend=config.JSON_BACKEND):
+        if backend == "auto":
+            backend = next(b for b in ("orjson", "msgspec", "json") if b in BACKENDS)
+        if backend not in BACKENDS:
+            raise ImportError("JSON backend %s is not installed. available: %s"
+                              % (backend, list(BACKENDS)))
+        self.backend = backend
+        self.loads, self.dumps = BACKENDS[backend]
+
+    def decode(self, raw, type_=None):
+        """
+        Decodes raw bytes. When type_ is given (a msgspec Struct or other
+        msgspec-supported type) the payload is decoded straight into it.
+        """
+        if type_ is None:
+            return self.loads(raw)
+        if msgspec is None:
+            raise ImportError("typed decoding requires msgspec. "
+                              "install it with 'pip install msgspec'")
+        return msgspec.json.decode(raw, type=type_)
+
+
+default_decoder = Decoder()
+
+
+def loads(raw):
+    return default_decoder.loads(raw)
+
+
+def dumps(obj):
+    return default_decoder.dumps(obj)
+
+
+def _read_only(self, *args, **kwargs):
+    raise TypeError("shared response data is read-only. "
+                    "copy it (e.g. with thaw()) before modifying it")
+
+
+class FrozenDict(dict):
+    """
+    dict that refuses modification, for decoded responses shared between
+    callers. Reads, iteration and JSON encoding work as for a dict; dict(d)
+    gives a shallow mutable copy and thaw(d) a deep one.
+    """
+
+    __slots__ = ()
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+
+class FrozenList(list):
+    """
+    list counterpart of FrozenDict.
+    """
+
+    __slots__ = ()
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = extend = insert = remove = pop = clear = sort = reverse = _read_only
+
+    def __reduce__(self):
+        return (FrozenList, (list(self),))
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+
+def freeze(obj):
+    """
+    Read-only version of a decoded JSON document: every dict and list is
+    replaced by a FrozenDict / FrozenList. Documents that are already
+    frozen are returned as they are.
+    """
+    t = type(obj)
+    if t is FrozenDict or t is FrozenList:
+        return obj
+    if t is dict:
+        return FrozenDict({k: freeze(v) if type(v) in _CONTAINERS else v for k, v in obj.items()})
+    if t is list:
+        return FrozenList([freeze(v) if type(v) in _CONTAINERS else v for v in obj])
+    return obj
+
+
+_CONTAINERS = frozenset((dict, list, FrozenDict, FrozenList))
+
+
+def thaw(obj):
+    """
+    Mutable deep copy of a (frozen) decoded JSON document.
+    """
+    if isinstance(obj, dict):
+        return dict((k, thaw(v)) for k, v in obj.items())
+    if isinstance(obj, list):
+        return [thaw(v) for v in obj]
+    return obj
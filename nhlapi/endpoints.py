@@ -1,25 +1,80 @@
 from datetime import datetime as dt
-from datetime import timedelta as td
-from time import sleep
-import requests
-from nhlapi.utils import get_num_games
+from nhlapi import config
+from nhlapi.utils import season_index
 from nhlapi.base import BaseEndpoint
-from concurrent.futures import ThreadPoolExecutor
-from urllib.parse import urljoin
+from nhlapi.feed import LazyFeed
+from nhlapi.league import LeagueIndex
+from nhlapi.live import LiveTracker
+from nhlapi.models import Boxscore, Player
+from nhlapi.players import PlayerIndex
+from nhlapi.standings import StandingsEngine, iso_date
+from nhlapi.registry import historical_registry
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from itertools import islice
+from threading import Lock
+from time import perf_counter
+
+
+def _bounded(fn, keys, max_workers):
+    """
+    Generator of (key, fn(key), error) tuples in completion order, keeping
+    at most max_workers calls in flight. The next call is submitted only
+    when a result is consumed.
+    """
+    exc = ThreadPoolExecutor(max_workers=max_workers)
+    keys = iter(keys)
+    pending = {}
+    try:
+        for key in islice(keys, max_workers):
+            pending[exc.submit(fn, key)] = key
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                key = pending.pop(fut)
+                for nxt in islice(keys, 1):
+                    pending[exc.submit(fn, nxt)] = nxt
+                try:
+                    result = fut.result()
+                except Exception as e:
+                    yield key, None, e
+                else:
+                    yield key, result, None
+    finally:
+        exc.shutdown(wait=True, cancel_futures=True)
+
+
+def _strip_copyright(js):
+    if isinstance(js, dict):
+        js.pop("copyright", None)
+    return js
+
+
+def _league(endpoint, season=None):
+    """
+    Cached LeagueIndex for a season, fetched with an endpoint's transport
+    and caches.
+    """
+    return League(transport=endpoint.transport, base_url=endpoint.api_url,
+                  reference_cache=endpoint.reference_cache, store=endpoint.store).index(season)
 
 
 class Game(BaseEndpoint):
 
-    def __init__(self):
-        super().__init__()
+    def __init__(self, max_workers=config.MAX_WORKERS, cache=None, use_schedule=True, **kwargs):
+        super().__init__(**kwargs)
+        self.base_url = "/".join([self.url_template, "game"])
+        self.max_workers = max_workers
+        self.cache = cache
+        self.use_schedule = use_schedule
         self.season_string = None
-
+        # Games known to be final, and seasons whose schedule was checked for them
+        self._final = set()
+        self._checked = set()
+        self._final_lock = Lock()
 
     @staticmethod
     def _format_game_number(x):
-        sn = str(x)
-        z = 4 - len(sn)
-        return sn.zfill(z)
+        return str(x).zfill(4)
 
     @staticmethod
     def _check_date_format(s, type_):
@@ -110,41 +165,193 @@ class Game(BaseEndpoint):
             raise TypeError("Invalid game_type must be int or str")
 
     @staticmethod
-    def _check_game_number(n, season_str):
-        nx = get_num_games(season=season_str)
-        ns = Game._format_game_number(n)
-        if ns in nx:
-            return ns
+    def _check_game_number(n, season_str, game_type="02"):
+        if season_index().is_valid(season_str, game_type, n):
+            return Game._format_game_number(n)
         else:
             raise IndexError("game_number exceeds number of games in selected season")
 
-    def _process(self, detail, season, game_type, game_number):
+    def mark_final(self, game_ids):
+        """
+        Marks games as final, so their cached responses never expire.
+        Games listed as final by a schedule this endpoint fetched are
+        marked automatically.
+        """
+        self._final.update(str(g) for g in game_ids)
+
+    def _is_final(self, gid, detail, js):
+        # Seasons wrap up by the end of September at the latest, after which
+        # none of their games can change.
+        if dt.today() >= dt(int(gid[:4]) + 1, 10, 1):
+            return True
+        if gid in self._final or self.cache.is_final(gid):
+            return True
+        if detail == "feed/live":
+            if isinstance(js, LazyFeed):
+                return js.status == "Final"
+            status = js.get("gameData", {}).get("status", {})
+            return status.get("abstractGameState") == "Final"
+        # Boxscores and content don't carry the game status; one schedule
+        # request per season tells which of its games are over.
+        season = gid[:4]
+        if self.use_schedule and season not in self._checked:
+            with self._final_lock:
+                if season not in self._checked:
+                    try:
+                        self._schedule_ids(season=season)
+                    except Exception:
+                        pass
+                    self._checked.add(season)
+        return gid in self._final
+
+    def _fetch_lazy(self, gid, detail, params):
+        use_cache = self.cache is not None and not params
+        url = "/".join([self.base_url, gid, detail])
+        if use_cache:
+            start = perf_counter()
+            raw = self.cache.get_raw(gid, detail)
+            if raw is not None:
+                self.changed = False
+                self._cache_hit(url, start, len(raw))
+                feed = LazyFeed(raw)
+                self._ingest(detail, feed, gid)
+                return feed
+        feed = LazyFeed(self.transport.get_raw(url, params=params, headers=self.request_headers))
+        self._ingest(detail, feed, gid)
+        if use_cache:
+            self.cache.set_raw(gid, detail, feed.raw, final=self._is_final(gid, detail, feed))
+            feed.release()
+        return feed
+
+    def _fetch(self, gid, detail, params=None, conditional=False, lazy=False):
+        params = self.request_params if params is None else params
+        if lazy:
+            return self._fetch_lazy(gid, detail, params)
+        use_cache = self.cache is not None and not params
+        url = "/".join([self.base_url, gid, detail])
+        if use_cache:
+            start = perf_counter()
+            js = self.cache.get(gid, detail)
+            if js is not None:
+                self.changed = False
+                self._cache_hit(url, start)
+                self._ingest(detail, js, gid)
+                return js
+        if conditional:
+            js, self.changed = self.transport.get_conditional(url, params=params,
+                                                              headers=self.request_headers,
+                                                              prepare=_strip_copyright)
+        else:
+            js = _strip_copyright(self.transport.get_json(url, params=params,
+                                                          headers=self.request_headers))
+        self._ingest(detail, js, gid)
+        if use_cache:
+            self.cache.set(gid, detail, js, final=self._is_final(gid, detail, js))
+        return js
+
+    def _bulk(self, gids, detail, params=None, lazy=False):
+        """
+        Yields (game_pk, data, error) tuples as each request completes.
+        At most max_workers requests are in flight at once and new ones are
+        only submitted as results are consumed, so a slow consumer holds
+        back the downloads instead of buffering the season. A failed game
+        is reported through the error slot instead of stopping the season.
+        """
+        return _bounded(lambda gid: self._fetch(gid, detail, params, False, lazy),
+                        gids, self.max_workers)
+
+    def _schedule(self):
+        return Schedule(transport=self.transport, base_url=self.api_url,
+                        reference_cache=self.reference_cache, store=self.store)
+
+    def _schedule_ids(self, **kwargs):
+        """
+        Schedule.game_ids that also marks the scheduled games that are final.
+        """
+        games = self._schedule().games(**kwargs)
+        self.mark_final(g['gamePk'] for g in games
+                        if g.get('status', {}).get('abstractGameState') == "Final")
+        return sorted(set(str(g['gamePk']) for g in games))
+
+    def season_game_ids(self, season, game_type):
+        """
+        Game IDs for a season and game type. Uses the schedule when
+        use_schedule is set, and falls back to enumerating every possible
+        game number from the season index if the schedule is unavailable.
+        """
+        yr0 = Game._check_date_format(season, type_="season")
+        gt = Game._check_game_type(game_type)
+        season_string = "".join([yr0, str(int(yr0) + 1)])
+        if self.use_schedule:
+            try:
+                gids = self._schedule_ids(season=yr0, game_type=gt)
+            except Exception:
+                gids = []
+            gids = [g for g in gids if g[4:6] == gt]
+            if gids:
+                return gids
+        return ["".join([yr0, gt, i]) for i in season_index().game_numbers(season_string, gt)]
+
+    def on_dates(self, detail, start_date, end_date=None, game_type=None, stream=False):
+        """
+        ######
+
+        Fetches detail ("feed/live", "boxscore", "content") for every game
+        scheduled between start_date and end_date (inclusive, defaults to
+        start_date), looked up with a single schedule request.
+
+        ######
+        """
+        gids = self._schedule_ids(start_date=start_date, end_date=end_date or start_date,
+                                  game_type=game_type)
+        if stream:
+            return self._bulk(gids, detail)
+        return self._collect(gids, detail)
+
+    def _collect(self, gids, detail, lazy=False):
+        self.data.update({"games": [], "errors": []})
+        found = {}
+        for gid, js, err in self._bulk(gids, detail, lazy=lazy):
+            if err is None:
+                found[gid] = js
+            else:
+                self.data['errors'].append({"gamePk": gid, "error": repr(err)})
+        self.data['games'].extend(found[gid] for gid in sorted(found))
+        self.data['errors'].sort(key=lambda e: e['gamePk'])
+        return self.data
+
+    def fetch_many(self, game_ids, detail, raw=False):
+        """
+        Generator of (game_pk, data, error) tuples for arbitrary game IDs,
+        yielded in completion order. With raw=True data is a LazyFeed
+        wrapping the undecoded response bytes.
+        """
+        return self._bulk([str(g) for g in game_ids], detail, lazy=raw)
+
+    def _process(self, detail, season, game_type, game_number, stream=False, lazy=False):
         yr0 = Game._check_date_format(season, type_="season")
         gt = Game._check_game_type(game_type)
         yr1 = str(int(yr0) + 1)
         self.season_string = "".join([str(yr0), yr1])
-        self.data.update({"games": []})
+        self.data.update({"games": [], "errors": []})
 
         if game_number == 0:
-            with ThreadPoolExecutor(max_workers=5) as exc:
-                for i in get_num_games(season=self.season_string):
-                    gid = "".join([str(yr0), gt, i])
-                    url = "/".join([self.url_template, gid, detail])
-                    fut = exc.submit(requests.get, url, self.request_params, self.request_headers)
-                    js = fut.result().json()
-                    js.pop('copyright')
-                    self.data['games'].append(js)
+            gids = self.season_game_ids(yr0, gt)
+            if stream:
+                return self._bulk(gids, detail, lazy=lazy)
+            self._collect(gids, detail, lazy=lazy)
         else:
-            gnum = Game._check_game_number(game_number, self.season_string)
+            gnum = Game._check_game_number(game_number, self.season_string, gt)
             gid = "".join([str(yr0), gt, gnum])
-            url = urljoin(self.url_template, gid, detail)
-            req = requests.get(url, params=self.request_params, headers=self.request_headers)
-            js = req.json()
-            js.pop("copyright")
-            self.data['games'].append(js)
+            # Single-game calls are the ones polled repeatedly, so they send
+            # conditional requests and report whether the game changed.
+            if lazy:
+                self.data['games'].append(self._fetch(gid, detail, lazy=True))
+            else:
+                self.data['games'].append(self._fetch(gid, detail, conditional=True))
         return self.data
 
-    def feed(self, season, game_type, game_number=0):
+    def feed(self, season, game_type, game_number=0, stream=False, lazy=False):
         """
         ######
 
@@ -164,12 +371,19 @@ class Game(BaseEndpoint):
         :param game_type:
             2 digits give the type of game, where 01 = preseason,
             02 = regular season, 03 = playoffs, 04 = all-star
+        :param stream:
+            When game_number is 0, return a generator of (game_pk, data, error)
+            tuples yielded as each game completes instead of collecting the season
+        :param lazy:
+            Return nhlapi.feed.LazyFeed objects holding the raw response and
+            decoding gameData, linescore, boxscore or plays only when read
         :return:
         """
         detail = "feed/live"
-        return self._process(detail=detail, season=season, game_type=game_type, game_number=game_number)
+        return self._process(detail=detail, season=season, game_type=game_type,
+                             game_number=game_number, stream=stream, lazy=lazy)
 
-    def boxscore(self, season, game_type, game_number=0):
+    def boxscore(self, season, game_type, game_number=0, stream=False):
         """
         ######
 
@@ -186,13 +400,17 @@ class Game(BaseEndpoint):
         :param game_type:
             2 digits give the type of game, where 01 = preseason,
             02 = regular season, 03 = playoffs, 04 = all-star
+        :param stream:
+            When game_number is 0, return a generator of (game_pk, data, error)
+            tuples yielded as each game completes instead of collecting the season
         :return:
         """
         detail = "boxscore"
-        return self._process(detail=detail, season=season, game_type=game_type, game_number=game_number)
+        return self._process(detail=detail, season=season, game_type=game_type,
+                             game_number=game_number, stream=stream)
 
 
-    def content(self, season, game_type, game_number=0):
+    def content(self, season, game_type, game_number=0, stream=False):
         """
         ######
 
@@ -208,11 +426,15 @@ class Game(BaseEndpoint):
         :param game_type:
             2 digits give the type of game, where 01 = preseason,
             02 = regular season, 03 = playoffs, 04 = all-star
+        :param stream:
+            When game_number is 0, return a generator of (game_pk, data, error)
+            tuples yielded as each game completes instead of collecting the season
         :return:
         """
 
         detail = "content"
-        return self._process(detail=detail, season=season, game_type=game_type, game_number=game_number)
+        return self._process(detail=detail, season=season, game_type=game_type,
+                             game_number=game_number, stream=stream)
 
     def updates(self, season, game_type,
                 game_date, game_number=0,
@@ -240,9 +462,9 @@ class Game(BaseEndpoint):
         :param from_time:
             the starting timestamp from which to gather all subsequent game updates
         :param n_minutes:
-            can be used in lieu of the from_time parameter to establish a timestamp,
-            new data will be collected continuously until the game is terminated
-            every n_minutes
+            can be used in lieu of the from_time parameter; the game state is
+            followed with a LiveTracker, applying new patches every n_minutes
+            until the game is final
         :return:
         """
 
@@ -250,95 +472,96 @@ class Game(BaseEndpoint):
         yr0 = Game._check_date_format(season, type_="season")
         dat = Game._check_date_format(game_date, type_="date")
         gt = Game._check_game_type(game_type)
-        yr1 = int(yr0) + 1
-        self.season_string = "-".join([yr0, yr1])
-
-        if from_time is None and n_minutes is not None:
-            vals = None
-            while vals != "stop":
-                ts = dt.now() - td(minutes=n_minutes)
-                tt = ts.strftime("%H%M%S")
-                self.request_params.update({"startTimecode": "_".join([dat, tt])})
-                if game_number == 0:
-                    with ThreadPoolExecutor(max_workers=5) as exc:
-                        for i in get_num_games(season=self.season_string):
-                            gid = "".join([str(yr0), gt, i])
-                            url = urljoin(self.url_template, gid, detail)
-                            fut = exc.submit(requests.get, url, self.request_params, self.request_headers)
-                            self.data.append(fut.result().json())
-                else:
-                    gnum = Game._check_game_number(game_number, self.season_string)
-                    gid = "".join([str(yr0), gt, gnum])
-                    url = urljoin(self.url_template, gid, detail)
-                    req = requests.get(url, params=self.request_params, headers=self.request_headers)
-                    self.data.append(req.json())
-                sleep((n_minutes//2) * 60)
-
-        elif from_time is not None and n_minutes is None:
-            tt = Game._check_time_format(from_time)
-            self.request_params.update({"startTimecode": "_".join([dat, tt])})
-            if game_number == 0:
-                with ThreadPoolExecutor(max_workers=5) as exc:
-                    for i in get_num_games(season=self.season_string):
-                        gid = "".join([str(yr0), gt, i])
-                        url = "/".join([self.url_template, gid, detail])
-                        fut = exc.submit(requests.get, url, self.request_params, self.request_headers)
-                        self.data.append(fut.result().json())
-            else:
-                gnum = Game._check_game_number(game_number, self.season_string)
-                gid = "".join([str(yr0), gt, gnum])
-                url = "/".join([self.url_template, gid, detail])
-                req = requests.get(url, params=self.request_params, headers=self.request_headers)
-                self.data.append(req.json())
-        elif from_time is None and n_minutes is None:
+        yr1 = str(int(yr0) + 1)
+        self.season_string = "".join([yr0, yr1])
+
+        if from_time is None and n_minutes is None:
             raise ValueError("either from_time OR n_minutes must be specified")
         elif from_time is not None and n_minutes is not None:
             raise ValueError("either from_time OR n_minutes must be specified")
 
+        if game_number == 0:
+            # All games of the given type scheduled on game_date.
+            sched_date = "-".join([dat[:4], dat[4:6], dat[6:]])
+            gids = self._schedule_ids(date=sched_date, game_type=gt)
+        else:
+            gnum = Game._check_game_number(game_number, self.season_string, gt)
+            gids = ["".join([yr0, gt, gnum])]
+
+        if n_minutes is not None:
+            tracker = LiveTracker(gids, transport=self.transport, base_url=self.api_url,
+                                  interval=n_minutes * 60, max_workers=self.max_workers)
+            tracker.run()
+            self.data.update({"games": [tracker.games[g] for g in gids if g in tracker.games]})
+            return self.data
+
+        tt = Game._check_time_format(from_time)
+        params = dict(self.request_params, startTimecode="_".join([dat, tt]))
+        self.data.update({"updates": [], "errors": []})
+        found = {}
+        for gid, js, err in self._bulk(gids, detail, params=params):
+            if err is None:
+                found[gid] = js
+            elif game_number != 0:
+                raise err
+            else:
+                self.data['errors'].append({"gamePk": gid, "error": repr(err)})
+        self.data['updates'].extend({"gamePk": gid, "updates": found[gid]} for gid in sorted(found))
+        return self.data
+
     def __dict__(self):
         return self.data
 
 
 class Teams(BaseEndpoint):
 
-    def __init__(self):
-        super().__init__()
-        self.base_url = urljoin(self.url_template, "teams")
+    # expand argument -> key the expansion is returned under in each team
+    expansions = {"team.roster": "roster",
+                  "team.stats": "teamStats",
+                  "team.schedule.next": "nextGameSchedule",
+                  "team.schedule.previous": "previousGameSchedule",
+                  "person.names": None}
+
+    def __init__(self, ID=None, expand=None, season=None, **kwargs):
+        super().__init__(**kwargs)
+        self.base_url = "/".join([self.url_template, "teams"])
         self.data.update({"teams": []})
-        self.ID = None
-        self.expand = []
-        self.season = None
+        self.ID = ID
+        self.expand = [] if expand is None else list(expand)
+        self.season = season
+        self.request_params.update(Teams._params(self.ID, self.expand, self.season))
 
-        if self.ID is None:
+    @staticmethod
+    def _params(ID, expand, season):
+        params = {}
+        if ID is None:
             pass
-        elif type(self.ID) is list:
-            team_ext = ",".join([str(i) for i in self.ID])
-            self.request_params.update({"teamId": team_ext})
-        elif type(self.ID) is int:
-            self.request_params.update({"teamId": str(self.ID)})
-
-        if type(self.expand) is list:
-            ext = ",".join([i for i in self.expand if Teams._check_expand_arg(i) is True])
-            self.request_params.update({"expand": ext})
+        elif type(ID) in (list, tuple, set):
+            team_ext = ",".join([str(i) for i in ID])
+            params.update({"teamId": team_ext})
         else:
-            pass
+            params.update({"teamId": str(ID)})
 
-        if self.season is None:
-            pass
-        else:
-            seas = Teams._format_season(season=self.season)
-            self.request_params.update({"season": seas})
+        ext = ",".join([i for i in expand if Teams._check_expand_arg(i) is True])
+        if ext:
+            params.update({"expand": ext})
+
+        if season is not None:
+            params.update({"season": Teams._format_season(season=season)})
+        return params
 
     @staticmethod
     def _check_expand_arg(x):
-        valid = ["team.roster", "person.names", "team.schedule.next", "team.schedule.previous", 'team.stats']
-        if x in valid:
+        if x in Teams.expansions:
             return True
+        else:
+            raise ValueError("Invalid expand value %s. must be one of %s"
+                             % (x, list(Teams.expansions)))
 
     @staticmethod
     def _format_season(season):
         if type(season) is int:
-            if len(season) == 4:
+            if len(str(season)) == 4:
                 return "".join([str(season), str(season + 1)])
 
             else:
@@ -358,70 +581,124 @@ class Teams(BaseEndpoint):
                              "representing the first year of the target season."
                              "(e.g. input 2017 for 2017-2018 season.)")
 
+    def _expanded(self, *extra):
+        expand = self.expand + [e for e in extra if e not in self.expand]
+        params = Teams._params(self.ID, expand, self.season)
+        js, self.changed = self.transport.get_conditional(self.base_url, params=params,
+                                                          headers=self.request_headers)
+        self._ingest("teams", js)
+        return js
+
     def get(self, *args, **kwargs):
-        req = requests.get(self.base_url, params=self.request_params,
-                           headers=self.request_headers)
-        js = req.json()['teams']
-        self.data['teams'].extend(js)
+        if self.expand:
+            js = self._expanded()
+        else:
+            js = self._reference("teams", self.base_url, params=self.request_params)
+            self._ingest("teams", js)
+        self.data['teams'].extend(js['teams'])
         return self.data
 
-
     def roster(self):
-        self.base_url = urljoin(self.base_url, 'roster')
-        req = requests.get(self.base_url, params=self.request_params,
-                           headers=self.request_headers)
-        js = req.json()['teams']
-        self.data['teams'].extend(js)
+        js = self._expanded("team.roster")
+        self.data['teams'].extend(js['teams'])
         return self.data
 
     def stats(self):
-        self.base_url = urljoin(self.base_url, "stats")
-        req = requests.get(self.base_url, params=self.request_params,
-                           headers=self.request_headers)
-        js = req.json()['teams']
-        self.data['teams'].extend(js)
+        js = self._expanded("team.stats")
+        self.data['teams'].extend(js['teams'])
         return self.data
 
+    def batch(self, ID=None, expand=None, season=None):
+        """
+        ######
+
+        Fetches any set of teams with any combination of expansions in a
+        single request and splits the response per team.
+
+        ######
+        :param ID:
+            team id or list of team ids, defaults to the ids given to Teams()
+            (all teams when neither is given)
+        :param expand:
+            list of expansions, any of "team.roster", "team.stats",
+            "team.schedule.next", "team.schedule.previous", "person.names".
+            Defaults to ["team.roster", "team.stats"]
+        :param season:
+            first year of the season, e.g. 2017 for the 2017-2018 season
+        :return:
+            dict of team id -> {"team": ..., "roster": ..., "stats": ...,
+            "schedule.next": ..., "schedule.previous": ...} holding only the
+            requested expansions
+        """
+        ID = self.ID if ID is None else ID
+        expand = ["team.roster", "team.stats"] if expand is None else list(expand)
+        season = self.season if season is None else season
+        params = Teams._params(ID, expand, season)
+        js, self.changed = self.transport.get_conditional(self.base_url, params=params,
+                                                          headers=self.request_headers)
+        self._ingest("teams", js)
+        out = {}
+        for team in js['teams']:
+            team = dict(team)
+            entry = {}
+            for e in expand:
+                key = Teams.expansions[e]
+                if key is None:
+                    continue
+                value = team.pop(key, None)
+                if e == "team.roster":
+                    value = [] if value is None else value.get("roster", [])
+                elif e == "team.stats":
+                    value = [] if value is None else value
+                entry[e.replace("team.", "", 1)] = value
+            entry["team"] = team
+            out[team['id']] = entry
+        return out
+
 
 class Conferences(BaseEndpoint):
 
-    def __init__(self):
-        super().__init__()
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
         self.min_curr_id = 0
-        self.baseurl = "https://statsapi.web.nhl.com/api/v1/conferences"
+        self.baseurl = "/".join([self.url_template, "conferences"])
 
     def get(self, name, is_current=True):
         found = []
         if is_current:
-            found = [c for c in self.current if c['name'].lower().find(name.lower()) > -1]
+            found = [c for c in self.current['conferences'] if c['name'].lower().find(name.lower()) > -1]
         return found
 
-    def lookup_by_division(self, division=None):
-        found = None
-        if type(division) is int or division.isdigit() is True:
-            dd = int(division)
-            divs = Divisions().all_
-            found = [d['conference'] for d in divs['divisions'] if d["id"] == dd]
-
-        elif type(division) is str and division.isdigit() is False:
-            dd = division.lower()
-            divs = Divisions().all_
-            found = [d['conference'] for d in divs['divisions'] if d["name"].lower().find(dd) > -1]
-
-        return found
+    def lookup_by_division(self, division=None, season=None):
+        """
+        Conference of a division (id, name or abbreviation), as a list
+        holding the conference entry, or an empty list when no division
+        matches. season selects the league alignment, defaults to current.
+        """
+        league = _league(self, season)
+        conf = league.conference_of_division(division)
+        return [] if conf is None else [league.raw("conference", conf.id)]
 
-    def lookup_by_team(self, team=None):
-        pass
+    def lookup_by_team(self, team=None, season=None):
+        """
+        Conference of a team (id, abbreviation or name), as a list holding
+        the conference entry, or an empty list when no team matches.
+        """
+        league = _league(self, season)
+        conf = league.conference_of_team(team)
+        return [] if conf is None else [league.raw("conference", conf.id)]
 
+    @staticmethod
+    def _mark_active(js):
+        for c in js['conferences']:
+            c.update({"active": True})
+        return js
 
     @property
     def current(self):
-        req = requests.get(self.baseurl)
-        self.min_curr_id += min([i["id"] for i in req.json()["conferences"]])
-
-        js = req.json()
-        for c in js['conferences']:
-            c.update({"active": True})
+        js = self._reference("conferences", self.baseurl, prepare=Conferences._mark_active)
+        self._ingest("conferences", js)
+        self.min_curr_id = min([i["id"] for i in js["conferences"]])
         return js
 
 
@@ -434,20 +711,11 @@ class Conferences(BaseEndpoint):
                     "shortName" : "WCup",
                     "active" : False
                     }
-        if self.min_curr_id == 0:
-            self.min_curr_id += min([i["id"] for i in self.all_current])
-
-        confs = {"copyright": None, "conferences": []}
-        for i in range(1, self.min_curr_id):
-            req = requests.get("/".join([self.baseurl, str(i)]))
-            js = req.json()
-            if confs['copyright'] is not None:
-                confs.update({"copyright": js['copyright']})
-            cnf = js['conferences'][0]
-            cnf.update({"active": False})
-
-            confs['conferences'].append(cnf)
-        confs['conferences'].append(wrld_cup)
+        curr = self.current
+        old = historical_registry(self.api_url).conferences(curr, transport=self.transport)
+        confs = {"copyright": curr.get('copyright'), "conferences": list(old)}
+        if wrld_cup['id'] not in [c['id'] for c in old]:
+            confs['conferences'].append(wrld_cup)
         return confs
 
     @property
@@ -460,23 +728,23 @@ class Conferences(BaseEndpoint):
 
 class Divisions(BaseEndpoint):
 
-    def __init__(self):
-        super().__init__()
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
 
         self.divs_list = []
-        self.base_url = "https://statsapi.web.nhl.com/api/v1/divisions"
+        self.base_url = "/".join([self.url_template, "divisions"])
 
-    def get(self, x, is_current=True):
+    def get(self, x, is_current=True, season=None):
         div = {"msg": "", "division": {}}
-        divs = []
         if is_current:
-            divs.extend(self.current['divisions'])
-        else:
-            divs.extend(self.inactive['divisions'])
-        if type(x) is str and x.isdigit() is False:
+            league = _league(self, season)
+            found = league.raw("division", x)
+            if found is not None:
+                div['division'].update(found)
+        elif type(x) is str and x.isdigit() is False:
             xx = x.lower()
-            for i in divs:
-                if xx == i['nameShort'].lower():
+            for i in self.inactive['divisions']:
+                if xx == (i.get('nameShort') or "").lower():
                     div['division'].update(i)
                 elif xx == i['name'].lower():
                     div['division'].update(i)
@@ -485,33 +753,34 @@ class Divisions(BaseEndpoint):
 
         elif type(x) is int or x.isdigit() is True:
             xx = int(x)
-            for i in divs:
+            for i in self.inactive['divisions']:
                 if xx == i['id']:
                     div['division'].update(i)
-        if len(div) == 0:
+        if len(div['division']) == 0:
             div.update({"msg": "No matching divisions found"})
 
         return div
 
-    def by_conference(self, conference):
-        pass
+    def by_conference(self, conference, season=None):
+        """
+        Divisions of a conference (id, name or abbreviation) in a season's
+        alignment, defaults to current.
+        """
+        league = _league(self, season)
+        return [league.raw("division", d.id) for d in league.divisions_of(conference)]
 
     @property
     def current(self):
-        req = requests.get(self.base_url)
-        return req.json()
+        js = self._reference("divisions", self.base_url)
+        self._ingest("divisions", js)
+        return js
 
     @property
     def inactive(self):
-        curr = self.current['divisions']
-        curr_ids = [c['id'] for c in curr]
-        divs = []
-        for i in range(1, min(curr_ids)):
-            req = requests.get("/".join([self.base_url, str(i)]))
-            js = req.json()
-            divs.extend(js['divisions'])
+        curr = self.current
+        divs = historical_registry(self.api_url).divisions(curr, transport=self.transport)
         kv = {}
-        kv.update({"copyright": curr['copyright'], "divisions": divs})
+        kv.update({"copyright": curr.get('copyright'), "divisions": list(divs)})
         return kv
 
     @property
@@ -524,6 +793,50 @@ class Divisions(BaseEndpoint):
 
 
 
+class League(BaseEndpoint):
+    """
+    Team / division / conference structure of a season, built from the
+    teams, divisions and conferences endpoints and cached per season with
+    the other reference data. See nhlapi.league.LeagueIndex.
+    """
+
+    def __init__(self, season=None, **kwargs):
+        super().__init__(**kwargs)
+        self.season = season
+
+    def index(self, season=None):
+        """
+        LeagueIndex for a season (first year, e.g. 1997), defaults to the
+        season given to League(), then to the current season.
+        """
+        season = self.season if season is None else season
+        key = (self.api_url, None if season is None else Teams._format_season(season))
+        return self.reference_cache.get("league", key, lambda: self._build(season))
+
+    def _build(self, season):
+        kwargs = dict(transport=self.transport, base_url=self.api_url,
+                      reference_cache=self.reference_cache, store=self.store)
+        teams = Teams(season=season, **kwargs).get()['teams']
+        divisions = dict((d['id'], d) for d in Divisions(**kwargs).current['divisions'])
+        conferences = dict((c['id'], c) for c in Conferences(**kwargs).current['conferences'])
+        if season is not None:
+            # Only the divisions and conferences the season's teams played in,
+            # with the conference each division belonged to that season.
+            used_divisions, used_conferences = {}, {}
+            for t in teams:
+                conf = t.get('conference')
+                if conf is not None:
+                    used_conferences[conf['id']] = conferences.get(conf['id'], conf)
+                if t.get('division') is not None:
+                    d = dict(divisions.get(t['division']['id'], t['division']))
+                    if conf is not None:
+                        d['conference'] = conf
+                    used_divisions[d['id']] = d
+            divisions, conferences = used_divisions, used_conferences
+        return LeagueIndex.from_json(teams, divisions.values(), conferences.values(),
+                                     season=season)
+
+
 class Draft(object):
 
     def __init__(self, year=None):
@@ -533,19 +846,175 @@ class Draft(object):
         pass
 
 
-class People(object):
+class People(BaseEndpoint):
 
-    def __init__(self, ID):
-        pass
+    def __init__(self, ID=None, season=None, max_workers=config.MAX_WORKERS, index=None,
+                 **kwargs):
+        super().__init__(**kwargs)
+        self.base_url = "/".join([self.url_template, "people"])
+        self.data.update({"people": [], "stats": [], "errors": []})
+        self.ID = People._ids(ID)
+        self.season = season
+        self.max_workers = max_workers
+        self.index = PlayerIndex() if index is None else index
 
-    def stats(self):
-        pass
+    @staticmethod
+    def _ids(ID):
+        """
+        A player id (int or str) or an iterable of them, as a list of ints.
+        """
+        if ID is None:
+            return []
+        if type(ID) in (int, str):
+            ID = [ID]
+        return [int(i) for i in ID]
+
+    def _person(self, player_id):
+        url = "/".join([self.base_url, str(player_id)])
+        js = self.transport.get_json(url, headers=self.request_headers)
+        return js['people'][0]
+
+    def _season_stats(self, player_id, season):
+        url = "/".join([self.base_url, str(player_id), "stats"])
+        params = {"stats": "statsSingleSeason", "season": season}
+        js = self.transport.get_json(url, params=params, headers=self.request_headers)
+        for group in js.get('stats', []):
+            for split in group.get('splits', []):
+                if split.get('season', season) == season:
+                    return split.get('stat', {})
+        return None
+
+    def fetch_many(self, player_ids, season=None):
+        """
+        Generator of (player_id, data, error) tuples in completion order,
+        with at most max_workers requests in flight. data is the people
+        entry, or with season given the player's stat line for that season
+        (None if the player didn't play).
+        """
+        player_ids = People._ids(player_ids)
+        if season is None:
+            return _bounded(self._person, player_ids, self.max_workers)
+        season = Teams._format_season(season)
+        return _bounded(lambda pid: self._season_stats(pid, season), player_ids, self.max_workers)
+
+    def get(self, ID=None):
+        """
+        Fetches the people entries of the given players (default: the IDs
+        given to People()) and adds them to the index.
+        """
+        for pid, js, err in self.fetch_many(self.ID if ID is None else People._ids(ID)):
+            if err is not None:
+                self.data['errors'].append({"id": pid, "error": repr(err)})
+                continue
+            self.index.add(js)
+            self.data['people'].append(js)
+        return self.data
 
+    def stats(self, ID=None, season=None):
+        """
+        ######
 
-class Schedule(object):
+        Fetches single season stats for many players concurrently and stores
+        them in the index.
 
-    def __init__(self, ID, expand=None, start_date=None, end_date=None):
-        self.ID = ID
+        ######
+        :param ID:
+            player id or list of player ids, defaults to the ids given to
+            People()
+        :param season:
+            first year of the season, e.g. 2017 for the 2017-2018 season.
+            defaults to the season given to People()
+        :return:
+            self.data, with one {"id", "season", "stat"} entry per player in
+            data['stats'] and failed requests in data['errors']
+        """
+        season = self.season if season is None else season
+        if season is None:
+            raise ValueError("a season is required for player stats. "
+                             "(e.g. input 2017 for 2017-2018 season.)")
+        season_str = Teams._format_season(season)
+        ids = self.ID if ID is None else People._ids(ID)
+        for pid, stat, err in self.fetch_many(ids, season):
+            if err is not None:
+                self.data['errors'].append({"id": pid, "error": repr(err)})
+                continue
+            if stat is None:
+                continue
+            self.index.add_stats(int(pid), season_str, stat)
+            self.data['stats'].append({"id": pid, "season": season_str, "stat": stat})
+        return self.data
+
+    def roster_ids(self, teams=None, season=None):
+        """
+        IDs of every rostered player of the given teams (default: all
+        teams), from a single Teams.batch request. Roster entries are added
+        to the index, so names can be looked up before any people request.
+        """
+        t = Teams(transport=self.transport, base_url=self.api_url,
+                  reference_cache=self.reference_cache, store=self.store)
+        batch = t.batch(ID=teams, expand=["team.roster"],
+                        season=self.season if season is None else season)
+        ids = []
+        for team_id, entry in batch.items():
+            for p in entry['roster']:
+                ids.append(self.index.add(p, team_id=team_id).id)
+        return ids
+
+    def boxscore_ids(self, boxscores):
+        """
+        IDs of every player in the given boxscore responses or Boxscore
+        models, added to the index along the way.
+        """
+        ids = []
+        for box in boxscores:
+            if isinstance(box, Boxscore):
+                for side in (box.away, box.home):
+                    for p in side.players:
+                        self.index.add(Player(p.player_id, p.name, team_id=p.team_id,
+                                              position=getattr(p, 'position', 'G')))
+                        ids.append(p.player_id)
+                continue
+            for side in box['teams'].values():
+                team_id = side.get('team', {}).get('id')
+                for p in side.get('players', {}).values():
+                    ids.append(self.index.add(p, team_id=team_id).id)
+        return list(dict.fromkeys(ids))
+
+    def refresh(self, season=None, teams=None):
+        """
+        ######
+
+        Refreshes the season stats of every rostered player in the league
+        (or of the given teams): one roster request, then one stats request
+        per player with max_workers in flight.
+
+        ######
+        :param season:
+            first year of the season, defaults to the season given to
+            People()
+        :param teams:
+            team id or list of team ids, defaults to all teams
+        :return:
+            the PlayerIndex
+        """
+        season = self.season if season is None else season
+        self.stats(ID=self.roster_ids(teams=teams, season=season), season=season)
+        return self.index
+
+
+class Schedule(BaseEndpoint):
+
+    # game type code used in game IDs -> schedule gameType parameter
+    game_types = {"01": "PR", "02": "R", "03": "P", "04": "A"}
+
+    def __init__(self, ID=None, expand=None, start_date=None, end_date=None, **kwargs):
+        super().__init__(**kwargs)
+        self.base_url = "/".join([self.url_template, "schedule"])
+        self.data.update({"dates": []})
+        self.ID = None if ID is None else self._check_id(ID)
+        self.expand = [] if expand is None else [e for e in expand if self._check_expand(e)]
+        self.start_date = None if start_date is None else self._check_date_string(start_date)
+        self.end_date = None if end_date is None else self._check_date_string(end_date)
 
     def _check_id(self, x):
         if type(x) is str and x.isdigit():
@@ -556,13 +1025,19 @@ class Schedule(object):
             raise TypeError("Invalid ID value must be string or int")
 
     def _check_expand(self, x):
-        valid = []
+        valid = ["schedule.linescore", "schedule.broadcasts", "schedule.teams",
+                 "schedule.decisions", "schedule.scoringplays", "schedule.game.seriesSummary"]
         if x in valid:
             return True
         else:
             return False
 
     def _check_date_string(self, x):
+        if hasattr(x, "strftime"):
+            return x.strftime("%Y-%m-%d")
+        if type(x) is int or (len(x) == 8 and x.isdigit()):
+            x = str(x)
+            return "-".join([x[:4], x[4:6], x[6:]])
         if len(x) == 10:
             if x.find("-") > -1:
                 pts = x.split("-")
@@ -575,9 +1050,147 @@ class Schedule(object):
         else:
             raise ValueError("Invalid Date format please use YYYY-MM-DD for all dates")
 
+    def _params(self, date, start_date, end_date, season, game_type):
+        params = dict(self.request_params)
+        start_date = self.start_date if start_date is None else self._check_date_string(start_date)
+        end_date = self.end_date if end_date is None else self._check_date_string(end_date)
+        if date is not None:
+            params.update({"date": self._check_date_string(date)})
+        elif start_date is not None:
+            params.update({"startDate": start_date, "endDate": end_date or start_date})
+        if season is not None:
+            params.update({"season": Teams._format_season(season=season)})
+        if game_type is not None:
+            params.update({"gameType": Schedule.game_types[Game._check_game_type(game_type)]})
+        if self.ID is not None:
+            params.update({"teamId": str(self.ID)})
+        if self.expand:
+            params.update({"expand": ",".join(self.expand)})
+        return params
+
+    def get(self, date=None, start_date=None, end_date=None, season=None, game_type=None):
+        """
+        ######
 
-class Standings(object):
-    pass
+        Returns the schedule for a single date, a date range or a whole
+        season. With no arguments the API returns today's games.
+
+        ######
+        :param date:
+            single date, YYYY-MM-DD string, YYYYMMDD string/int or date object
+        :param start_date:
+            first date of a range (end_date defaults to start_date)
+        :param end_date:
+            last date of a range
+        :param season:
+            first year of the season, e.g. 2017 for the 2017-2018 season
+        :param game_type:
+            same values as Game: 1-4, "01"-"04" or "preseason", "regular",
+            "playoffs", "all-star"
+        :return:
+        """
+        params = self._params(date, start_date, end_date, season, game_type)
+        js, self.changed = self.transport.get_conditional(self.base_url, params=params,
+                                                          headers=self.request_headers)
+        self._ingest("schedule", js)
+        self.data['dates'].extend(js.get('dates', []))
+        return self.data
+
+    def games(self, **kwargs):
+        """
+        Flat list of the scheduled games for the same arguments as get().
+        """
+        self.data['dates'] = []
+        games = []
+        for d in self.get(**kwargs)['dates']:
+            games.extend(d.get('games', []))
+        return games
+
+    def game_ids(self, **kwargs):
+        """
+        Sorted game IDs (as strings) for the same arguments as get().
+        """
+        return sorted(set(str(g['gamePk']) for g in self.games(**kwargs)))
+
+
+class Standings(BaseEndpoint):
+
+    def __init__(self, season=None, engine=None, **kwargs):
+        super().__init__(**kwargs)
+        self.base_url = "/".join([self.url_template, "standings"])
+        self.data.update({"records": []})
+        self.season = season
+        self.engine = StandingsEngine() if engine is None else engine
+
+    def get(self, date=None, season=None):
+        """
+        Official standings from the API for a date or season.
+        """
+        params = dict(self.request_params)
+        if date is not None:
+            params.update({"date": iso_date(date)})
+        season = self.season if season is None else season
+        if season is not None:
+            params.update({"season": Teams._format_season(season)})
+        js, self.changed = self.transport.get_conditional(self.base_url, params=params,
+                                                          headers=self.request_headers)
+        self.data['records'].extend(js.get('records', []))
+        return self.data
+
+    def load(self, season=None, start_date=None, end_date=None):
+        """
+        ######
+
+        Adds every final regular season game of a season (or date range) to
+        the local engine, using a single schedule request, and registers
+        team divisions and conferences for grouped standings.
+
+        ######
+        :param season:
+            first year of the season, defaults to the season given to
+            Standings()
+        :param start_date:
+            first date of a range, instead of a whole season
+        :param end_date:
+            last date of a range
+        :return:
+            number of games added
+        """
+        kwargs = dict(transport=self.transport, base_url=self.api_url,
+                      reference_cache=self.reference_cache, store=self.store)
+        season = self.season if season is None else season
+        sched = Schedule(expand=["schedule.linescore"], **kwargs)
+        if start_date is None:
+            js = sched.get(season=season, game_type="02")
+        else:
+            js = sched.get(start_date=start_date, end_date=end_date, game_type="02")
+        n = 0
+        for d in js['dates']:
+            for g in d.get('games', []):
+                if self.engine.add(g, date=d.get('date')) is not None:
+                    n += 1
+        if season is None and start_date is not None:
+            # Seasons start in the fall.
+            year, month = int(iso_date(start_date)[:4]), int(iso_date(start_date)[5:7])
+            season = year if month >= 8 else year - 1
+        # The season's own alignment, for grouping by division and conference.
+        self.engine.set_teams(Teams(season=season, **kwargs).get()['teams'])
+        return n
+
+    def add(self, js, date=None, game_pk=None):
+        """
+        Adds a feed/live, boxscore or schedule game response already pulled
+        elsewhere (e.g. by Game.feed or Game.boxscore). Boxscores need the
+        game date.
+        """
+        return self.engine.add(js, date=date, game_pk=game_pk)
+
+    def as_of(self, date=None, by=None):
+        """
+        Local standings including every game on or before date. See
+        StandingsEngine.as_of.
+        """
+        return self.engine.as_of(date, by=by)
 
 
 class StatTypes(object):
@@ -0,0 +1,227 @@
+import gzip
+import os
+import zlib
+from nhlapi.decoder import dumps
+from nhlapi.endpoints import Game
+
+try:
+    import pyarrow
+    import pyarrow.parquet as pq
+except ImportError:
+    pyarrow = None
+
+
+def _next_part(path, suffix):
+    n = 0
+    while os.path.exists("%s-%05d%s" % (path, n, suffix)):
+        n += 1
+    return "%s-%05d%s" % (path, n, suffix)
+
+
+class _NDJSONWriter(object):
+
+    # Each line is usable as soon as it is flushed.
+    durable_rows = True
+
+    @staticmethod
+    def suffix(compress):
+        # One part file per run: a gzip stream left open by a killed run can't
+        # be appended to without making the whole file unreadable.
+        return ".ndjson.gz" if compress else ".ndjson"
+
+    def __init__(self, path, compress):
+        self.path = path
+        if compress:
+            self.f = gzip.open(self.path, mode="wb")
+        else:
+            self.f = open(self.path, mode="wb")
+        self.compress = compress
+
+    def write(self, gid, js):
+        self.f.write(dumps(js))
+        self.f.write(b"\n")
+        # A sync flush for gzip, so every recorded line can be recovered.
+        self.f.flush()
+
+    def close(self):
+        self.f.close()
+
+    @staticmethod
+    def recover(path, rows):
+        """
+        Rewrites the part file of a run that didn't finish as a complete
+        file holding its first rows lines.
+        """
+        lines = []
+        if path.endswith(".gz"):
+            d = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            buf = b""
+            with open(path, mode="rb") as f:
+                while len(lines) < rows:
+                    chunk = f.read(1 << 16)
+                    if not chunk:
+                        break
+                    buf += d.decompress(chunk)
+                    *done, buf = buf.split(b"\n")
+                    lines.extend(done)
+        else:
+            with open(path, mode="rb") as f:
+                lines = [line.rstrip(b"\n") for line in f if line.endswith(b"\n")]
+        tmp = path + ".tmp"
+        with (gzip.open(tmp, mode="wb") if path.endswith(".gz") else open(tmp, mode="wb")) as f:
+            for line in lines[:rows]:
+                f.write(line)
+                f.write(b"\n")
+        os.replace(tmp, path)
+
+
+class _ParquetWriter(object):
+
+    # A part file is unreadable until its footer is written on close.
+    durable_rows = False
+
+    @staticmethod
+    def suffix(compress):
+        return ".parquet"
+
+    def __init__(self, path, compress):
+        if pyarrow is None:
+            raise ImportError("parquet export requires pyarrow. "
+                              "install it with 'pip install pyarrow'")
+        self.path = path
+        self.schema = pyarrow.schema([("gamePk", pyarrow.int64()),
+                                      ("payload", pyarrow.string())])
+        self.writer = pq.ParquetWriter(self.path, self.schema,
+                                       compression="zstd" if compress else "none")
+
+    def write(self, gid, js):
+        # One row group per game keeps the writer's buffer to a single game.
+        batch = pyarrow.record_batch(
+            [pyarrow.array([int(gid)], pyarrow.int64()),
+             pyarrow.array([dumps(js).decode("utf-8")], pyarrow.string())],
+            schema=self.schema)
+        self.writer.write_batch(batch)
+
+    def close(self):
+        self.writer.close()
+
+    @staticmethod
+    def recover(path, rows):
+        # Without a footer nothing in the part is readable, and none of its
+        # games were recorded as written.
+        os.remove(path)
+
+
+class SeasonExporter(object):
+    """
+    Streams a season of game responses straight to disk.
+
+    Output is partitioned as <root>/season=<YYYYYYYY>/game_type=<NN>/. Each
+    run that has games to write adds one part file per detail,
+    <detail>-NNNNN.ndjson(.gz) or <detail>-NNNNN.parquet, numbered after the
+    parts already there; readers take the union of the parts. Each game is
+    written as soon as it arrives and then released, so memory stays around
+    one game regardless of season size.
+
+    A sidecar <detail>.ids file records every written game ID between
+    '# part <name>' and '# done <name>' lines. A rerun skips the recorded
+    games and writes the rest to a new part. A part left without its
+    '# done' line by a killed run is first cut back to the games recorded
+    for it (an NDJSON part keeps those lines; a parquet part, unreadable
+    without its footer, is deleted and its games fetched again).
+    """
+
+    writers = {"ndjson": _NDJSONWriter, "parquet": _ParquetWriter}
+
+    def __init__(self, root, fmt="ndjson", compress=True, game=None):
+        if fmt not in SeasonExporter.writers:
+            raise ValueError("fmt must be one of %s" % list(SeasonExporter.writers))
+        self.root = root
+        self.fmt = fmt
+        self.compress = compress
+        self.game = Game() if game is None else game
+
+    def partition(self, season_string, game_type):
+        return os.path.join(self.root, "season=%s" % season_string,
+                            "game_type=%s" % game_type)
+
+    @staticmethod
+    def _written(ids_path):
+        """
+        Returns the set of written game IDs and {part name: games recorded}
+        for the parts of runs that didn't finish.
+        """
+        done, unfinished, current = set(), {}, None
+        if not os.path.exists(ids_path):
+            return done, unfinished
+        with open(ids_path, mode="r") as f:
+            for line in f:
+                line = line.strip()
+                if line.startswith("# part "):
+                    current = line[7:]
+                    unfinished[current] = 0
+                elif line.startswith("# done "):
+                    unfinished.pop(line[7:], None)
+                    current = None
+                elif line:
+                    done.add(line)
+                    if current in unfinished:
+                        unfinished[current] += 1
+        return done, unfinished
+
+    def export(self, detail, season, game_type, game_ids=None):
+        """
+        Writes every game of season/game_type for detail ('feed/live',
+        'boxscore', 'content'). game_ids overrides the enumerated season
+        game IDs. Returns a summary of written, skipped and failed games.
+        """
+        yr0 = Game._check_date_format(season, type_="season")
+        gt = Game._check_game_type(game_type)
+        season_string = "".join([yr0, str(int(yr0) + 1)])
+        if game_ids is None:
+            game_ids = self.game.season_game_ids(yr0, gt)
+
+        part = self.partition(season_string, gt)
+        os.makedirs(part, exist_ok=True)
+        stem = os.path.join(part, detail.replace("/", "-"))
+        ids_path = stem + ".ids"
+        done, unfinished = SeasonExporter._written(ids_path)
+        writer_cls = SeasonExporter.writers[self.fmt]
+        if unfinished:
+            with open(ids_path, mode="a") as ids:
+                for name, rows in unfinished.items():
+                    if os.path.exists(os.path.join(part, name)):
+                        writer_cls.recover(os.path.join(part, name), rows)
+                    ids.write("# done %s\n" % name)
+        todo = [str(g) for g in game_ids if str(g) not in done]
+
+        summary = {"path": part, "written": 0, "skipped": len(game_ids) - len(todo),
+                   "errors": [], "last_written": None}
+        if not todo:
+            return summary
+        path = _next_part(stem, writer_cls.suffix(self.compress))
+        name = os.path.basename(path)
+        unrecorded = []
+        with open(ids_path, mode="a") as ids:
+            ids.write("# part %s\n" % name)
+            ids.flush()
+            writer = writer_cls(path, self.compress)
+            try:
+                for gid, js, err in self.game.fetch_many(todo, detail):
+                    if err is not None:
+                        summary['errors'].append({"gamePk": gid, "error": repr(err)})
+                        continue
+                    writer.write(gid, js)
+                    if writer.durable_rows:
+                        ids.write(gid + "\n")
+                        ids.flush()
+                    else:
+                        unrecorded.append(gid)
+                    summary['written'] += 1
+                    summary['last_written'] = gid
+            finally:
+                writer.close()
+                ids.writelines(gid + "\n" for gid in unrecorded)
+                ids.write("# done %s\n" % name)
+        summary['errors'].sort(key=lambda e: e['gamePk'])
+        return summary
@@ -0,0 +1,113 @@
+from nhlapi.decoder import default_decoder
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+
+if msgspec is not None:
+    _NULL = msgspec.Raw(b"null")
+
+    class _Top(msgspec.Struct):
+        gamePk: int = 0
+        gameData: msgspec.Raw = _NULL
+        liveData: msgspec.Raw = _NULL
+
+    class _Live(msgspec.Struct):
+        linescore: msgspec.Raw = _NULL
+        boxscore: msgspec.Raw = _NULL
+        plays: msgspec.Raw = _NULL
+        decisions: msgspec.Raw = _NULL
+
+
+class LazyFeed(object):
+    """
+    feed/live response that keeps the raw bytes and decodes sections only
+    when they are first read.
+
+    With msgspec installed, locating a section only scans the bytes; just
+    that section is turned into Python objects. Without it the document is
+    decoded once per newly requested section and everything but that
+    section is discarded, so memory stays low but CPU savings are smaller.
+    Decoded sections are cached until release() is called.
+    """
+
+    __slots__ = ("raw", "_sections", "_index", "_decoder")
+
+    # section name -> path in the feed
+    paths = {"gameData": ("gameData",),
+             "linescore": ("liveData", "linescore"),
+             "boxscore": ("liveData", "boxscore"),
+             "plays": ("liveData", "plays"),
+             "decisions": ("liveData", "decisions")}
+
+    def __init__(self, raw, decoder=None):
+        self.raw = raw
+        self._sections = {}
+        self._index = None
+        self._decoder = default_decoder if decoder is None else decoder
+
+    def _locate(self, path):
+        if self._index is None:
+            top = msgspec.json.decode(self.raw, type=_Top)
+            live = msgspec.json.decode(top.liveData, type=_Live) if bytes(top.liveData) != b"null" else _Live()
+            self._index = {"gamePk": top.gamePk, "gameData": top.gameData,
+                           "linescore": live.linescore, "boxscore": live.boxscore,
+                           "plays": live.plays, "decisions": live.decisions}
+        return self._index[path]
+
+    def section(self, name):
+        if name not in LazyFeed.paths:
+            raise KeyError("unknown feed section %s. must be one of %s"
+                           % (name, list(LazyFeed.paths)))
+        if name not in self._sections:
+            if msgspec is not None:
+                value = self._decoder.loads(bytes(self._locate(name)))
+            else:
+                value = self._decoder.loads(self.raw)
+                for key in LazyFeed.paths[name]:
+                    value = value.get(key) if value is not None else None
+            self._sections[name] = value
+        return self._sections[name]
+
+    @property
+    def game_pk(self):
+        if msgspec is not None:
+            return self._locate("gamePk")
+        return self.game_data.get("game", {}).get("pk")
+
+    @property
+    def game_data(self):
+        return self.section("gameData") or {}
+
+    @property
+    def linescore(self):
+        return self.section("linescore")
+
+    @property
+    def boxscore(self):
+        return self.section("boxscore")
+
+    @property
+    def plays(self):
+        return self.section("plays")
+
+    @property
+    def status(self):
+        return self.game_data.get("status", {}).get("abstractGameState")
+
+    def to_dict(self):
+        """
+        Fully decoded feed, equivalent to the regular feed response.
+        """
+        js = self._decoder.loads(self.raw)
+        js.pop("copyright", None)
+        return js
+
+    def release(self):
+        self._sections.clear()
+        self._index = None
+
+    def __len__(self):
+        return len(self.raw)
@@ -0,0 +1,160 @@
+from nhlapi.decoder import freeze
+from nhlapi.models import Conference, Division, Team
+from nhlapi.utils import name_key
+
+
+class LeagueIndex(object):
+    """
+    Team / division / conference structure of one season.
+
+    Everything is resolved when the index is built, so lookups are single
+    dict reads. Teams, divisions and conferences can be looked up by id,
+    abbreviation or name (case and accent insensitive); team_division and
+    team_conference map team ids straight to division and conference ids
+    for hot loops.
+    """
+
+    def __init__(self, season=None):
+        self.season = season
+        self.teams = {}
+        self.divisions = {}
+        self.conferences = {}
+        self.team_division = {}
+        self.team_conference = {}
+        self.division_conference = {}
+        self._raw = {}
+        self._keys = {"team": {}, "division": {}, "conference": {}}
+        self._members = {}
+
+    @classmethod
+    def from_json(cls, teams=(), divisions=(), conferences=(), season=None):
+        """
+        Builds the index from teams, divisions and conferences responses
+        (the lists under their 'teams', 'divisions' and 'conferences'
+        keys). Divisions and conferences only referenced from a team entry
+        are added from that reference.
+        """
+        index = cls(season)
+        for js in conferences:
+            index.add_conference(js)
+        for js in divisions:
+            index.add_division(js)
+        for js in teams:
+            index.add_team(js)
+        return index
+
+    def _register(self, kind, id, names, js):
+        self._raw[(kind, id)] = freeze(js)
+        keys = self._keys[kind]
+        keys[id] = id
+        keys[str(id)] = id
+        for name in names:
+            if name:
+                keys[name] = id
+                keys[name_key(name)] = id
+
+    def add_conference(self, js):
+        c = Conference.from_json(js)
+        self.conferences[c.id] = c
+        self._register("conference", c.id, (c.name, c.abbreviation, c.short_name), js)
+        return c
+
+    def add_division(self, js):
+        d = Division.from_json(js)
+        if d.conference_id is not None and d.conference_id not in self.conferences:
+            self.add_conference(js['conference'])
+        self.divisions[d.id] = d
+        self.division_conference[d.id] = d.conference_id
+        self._register("division", d.id, (d.name, d.name_short, d.abbreviation), js)
+        return d
+
+    def add_team(self, js):
+        t = Team.from_json(js)
+        if t.division_id is not None and t.division_id not in self.divisions:
+            division = dict(js['division'])
+            division.setdefault('conference', js.get('conference'))
+            self.add_division(division)
+        if t.conference_id is not None and t.conference_id not in self.conferences:
+            self.add_conference(js['conference'])
+        if t.division_id is not None and self.division_conference.get(t.division_id) is None:
+            self.divisions[t.division_id].conference_id = t.conference_id
+            self.division_conference[t.division_id] = t.conference_id
+        self.teams[t.id] = t
+        self.team_division[t.id] = t.division_id
+        self.team_conference[t.id] = t.conference_id
+        self._register("team", t.id, (t.name, t.abbreviation, t.team_name), js)
+        self._members.clear()
+        return t
+
+    def _id(self, kind, x):
+        if x is None:
+            return None
+        if not isinstance(x, (int, str)):
+            x = x.id
+        keys = self._keys[kind]
+        found = keys.get(x)
+        if found is None and type(x) is str:
+            found = keys.get(name_key(x))
+        return found
+
+    def team(self, x):
+        """
+        Team by id, abbreviation or name ('TOR', 'Maple Leafs', 'Toronto
+        Maple Leafs'), or None.
+        """
+        return self.teams.get(self._id("team", x))
+
+    def division(self, x):
+        return self.divisions.get(self._id("division", x))
+
+    def conference(self, x):
+        return self.conferences.get(self._id("conference", x))
+
+    def raw(self, kind, x):
+        """
+        The API entry a team, division or conference was built from, as a
+        read-only dict. kind is 'team', 'division' or 'conference'.
+        """
+        return self._raw.get((kind, self._id(kind, x)))
+
+    def division_of(self, team):
+        return self.divisions.get(self.team_division.get(self._id("team", team)))
+
+    def conference_of_team(self, team):
+        return self.conferences.get(self.team_conference.get(self._id("team", team)))
+
+    def conference_of_division(self, division):
+        return self.conferences.get(self.division_conference.get(self._id("division", division)))
+
+    def _group(self, kind, gid):
+        key = (kind, gid)
+        members = self._members.get(key)
+        if members is None:
+            if kind == "division":
+                members = tuple(t for t in self.teams.values() if t.division_id == gid)
+            elif kind == "conference":
+                members = tuple(t for t in self.teams.values() if t.conference_id == gid)
+            else:
+                members = tuple(d for d in self.divisions.values()
+                                if self.division_conference.get(d.id) == gid)
+            self._members[key] = members
+        return members
+
+    def teams_of(self, x):
+        """
+        Teams in a division or conference (division first when an id or
+        name matches both).
+        """
+        did = None if type(x) is Conference else self._id("division", x)
+        if did is not None:
+            return self._group("division", did)
+        return self._group("conference", self._id("conference", x))
+
+    def divisions_of(self, conference):
+        return self._group("divisions", self._id("conference", conference))
+
+    def __contains__(self, team):
+        return self._id("team", team) is not None
+
+    def __len__(self):
+        return len(self.teams)
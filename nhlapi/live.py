@@ -0,0 +1,184 @@
+from concurrent.futures import ThreadPoolExecutor
+from copy import deepcopy
+from time import monotonic, sleep
+from nhlapi import config
+from nhlapi.transport import default_transport
+
+
+def _pointer(path):
+    if path == "":
+        return []
+    return [p.replace("~1", "/").replace("~0", "~") for p in path.lstrip("/").split("/")]
+
+
+def _index(key, size):
+    # Array indices are unsigned decimals below size (RFC 6901).
+    if not key.isdigit() or (key != "0" and key.startswith("0")) or int(key) >= size:
+        raise IndexError("bad array index %s" % key)
+    return int(key)
+
+
+def _resolve(doc, parts):
+    for p in parts:
+        doc = doc[_index(p, len(doc))] if isinstance(doc, list) else doc[p]
+    return doc
+
+
+def _add(doc, parts, value):
+    parent = _resolve(doc, parts[:-1])
+    key = parts[-1]
+    if isinstance(parent, list):
+        if key == "-":
+            parent.append(value)
+        else:
+            parent.insert(_index(key, len(parent) + 1), value)
+    else:
+        parent[key] = value
+
+
+def _remove(doc, parts):
+    parent = _resolve(doc, parts[:-1])
+    key = parts[-1]
+    if isinstance(parent, list):
+        return parent.pop(_index(key, len(parent)))
+    return parent.pop(key)
+
+
+def apply_patch(doc, ops):
+    """
+    Applies a list of JSON Patch (RFC 6902) operations to doc in place, as
+    returned in the 'diff' entries of feed/live/diffPatch. Returns doc.
+    """
+    for op in ops:
+        kind = op['op']
+        parts = _pointer(op['path'])
+        if kind == "test":
+            if _resolve(doc, parts) != op['value']:
+                raise ValueError("test failed at %s" % op['path'])
+            continue
+        if not parts:
+            if kind in ("add", "replace"):
+                doc.clear()
+                doc.update(op['value'])
+                continue
+            raise ValueError("cannot %s the document root" % kind)
+        if kind == "add":
+            _add(doc, parts, op['value'])
+        elif kind == "remove":
+            _remove(doc, parts)
+        elif kind == "replace":
+            parent = _resolve(doc, parts[:-1])
+            key = parts[-1]
+            if isinstance(parent, list):
+                key = _index(key, len(parent))
+            elif key not in parent:
+                raise KeyError(op['path'])
+            parent[key] = op['value']
+        elif kind == "move":
+            _add(doc, parts, _remove(doc, _pointer(op['from'])))
+        elif kind == "copy":
+            _add(doc, parts, deepcopy(_resolve(doc, _pointer(op['from']))))
+        else:
+            raise ValueError("unknown patch op %s" % kind)
+    return doc
+
+
+class LiveTracker(object):
+    """
+    Follows one or more games through feed/live/diffPatch.
+
+    Each game's full feed is fetched once, then every poll requests only the
+    patches since the timestamp of the last applied state and applies them
+    in place. Games that reach a final state are no longer polled. If a
+    patch can't be applied the game is resynchronised from the full feed.
+    """
+
+    def __init__(self, game_ids, transport=None, base_url=None,
+                 interval=config.LIVE_POLL_INTERVAL, max_workers=config.MAX_WORKERS):
+        self.transport = default_transport() if transport is None else transport
+        api_url = config.BASE_URL if base_url is None else base_url
+        self.base_url = "/".join([api_url, "v" + str(config.VERSION), "game"])
+        self.interval = interval
+        self.max_workers = max_workers
+        self.game_ids = [str(g) for g in game_ids]
+        self.games = {}
+        self.timecodes = {}
+
+    @staticmethod
+    def _timecode(state):
+        return state.get("metaData", {}).get("timeStamp")
+
+    def is_final(self, gid):
+        state = self.games.get(str(gid))
+        if state is None:
+            return False
+        status = state.get("gameData", {}).get("status", {})
+        return status.get("abstractGameState") == "Final"
+
+    @property
+    def active(self):
+        return [g for g in self.game_ids if not self.is_final(g)]
+
+    def _sync(self, gid):
+        js = self.transport.get_json("/".join([self.base_url, gid, "feed/live"]))
+        js.pop("copyright", None)
+        self.games[gid] = js
+        self.timecodes[gid] = LiveTracker._timecode(js)
+        return True
+
+    def _update(self, gid):
+        if gid not in self.games or self.timecodes.get(gid) is None:
+            return self._sync(gid)
+        url = "/".join([self.base_url, gid, "feed/live/diffPatch"])
+        js = self.transport.get_json(url, params={"startTimecode": self.timecodes[gid]})
+        if isinstance(js, dict):
+            # A full document comes back when the server can't produce a diff.
+            js.pop("copyright", None)
+            self.games[gid] = js
+            self.timecodes[gid] = LiveTracker._timecode(js)
+            return True
+        if not js:
+            return False
+        state = self.games[gid]
+        try:
+            for patch in js:
+                apply_patch(state, patch.get("diff", []))
+        except (KeyError, IndexError, TypeError, ValueError):
+            return self._sync(gid)
+        self.timecodes[gid] = LiveTracker._timecode(state) or self.timecodes[gid]
+        return True
+
+    def poll(self):
+        """
+        Updates every game that isn't final. Returns a dict of
+        game_id -> True/False (changed or not) or the raised exception.
+        """
+        results = {}
+        active = self.active
+        if not active:
+            return results
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(active))) as exc:
+            futs = {g: exc.submit(self._update, g) for g in active}
+            for g, fut in futs.items():
+                try:
+                    results[g] = fut.result()
+                except Exception as e:
+                    results[g] = e
+        return results
+
+    def run(self, callback=None, max_polls=None):
+        """
+        Polls every interval seconds until all games are final (or
+        max_polls polls have run), calling callback(tracker, results) after
+        each poll. Returns the final game states.
+        """
+        n = 0
+        while self.active and (max_polls is None or n < max_polls):
+            started = monotonic()
+            results = self.poll()
+            n += 1
+            if callback is not None:
+                callback(self, results)
+            if self.active and (max_polls is None or n < max_polls):
+                sleep(max(0.0, self.interval - (monotonic() - started)))
+        return self.games
@@ -0,0 +1,217 @@
+import bisect
+import json
+import logging
+import re
+from threading import Lock
+
+
+_ID_SEGMENT = re.compile(r"/\d+(?=/|$|\?)")
+_GAME_ID = re.compile(r"/game/(\d{10})(?:/|$)")
+
+
+def url_template(url):
+    """
+    URL with numeric path segments replaced by {id}, e.g.
+    .../game/{id}/feed/live, used to group requests per endpoint.
+    """
+    path = url.split("?", 1)[0]
+    return _ID_SEGMENT.sub("/{id}", path)
+
+
+def game_id(url):
+    m = _GAME_ID.search(url)
+    return None if m is None else m.group(1)
+
+
+class RequestEvent(object):
+    """
+    One request as seen by the transport or endpoint layer. Times are in
+    seconds and cover the final attempt: connect is connection setup
+    through response headers, transfer the body download and decode the
+    JSON decoding. wait is the time spent before that attempt was sent
+    (rate limiting, circuit breaker holds, retry backoff and failed
+    attempts) and is not part of latency. outcome is one of 'ok',
+    'not_modified', 'unchanged', 'cache_hit', 'http_error' or 'error'.
+    """
+
+    __slots__ = ("url", "template", "game_id", "status", "outcome", "wait", "connect",
+                 "transfer", "decode", "bytes", "retries")
+
+    def __init__(self, url, status=None, outcome="ok", connect=0.0, transfer=0.0,
+                 decode=0.0, bytes=0, retries=0, wait=0.0):
+        self.url = url
+        self.template = url_template(url)
+        self.game_id = game_id(url)
+        self.status = status
+        self.outcome = outcome
+        self.wait = wait
+        self.connect = connect
+        self.transfer = transfer
+        self.decode = decode
+        self.bytes = bytes
+        self.retries = retries
+
+    @property
+    def latency(self):
+        return self.connect + self.transfer + self.decode
+
+    def to_dict(self):
+        return dict((k, getattr(self, k)) for k in self.__slots__)
+
+
+class Instrumentation(object):
+    """
+    Dispatches RequestEvents to sinks. Transports and endpoints only build
+    events when at least one sink is attached, so an idle instance costs a
+    single truthiness check per request.
+    """
+
+    def __init__(self, sinks=None):
+        self.sinks = [] if sinks is None else list(sinks)
+
+    def __bool__(self):
+        return len(self.sinks) > 0
+
+    def add(self, sink):
+        self.sinks.append(sink)
+        return sink
+
+    def emit(self, event):
+        for sink in self.sinks:
+            sink(event)
+
+
+class _Histogram(object):
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.n = 0
+
+    def add(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.n += 1
+
+    def quantile(self, q):
+        if self.n == 0:
+            return None
+        target = q * self.n
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= target:
+                return self.buckets[i] if i < len(self.buckets) else float("inf")
+        return float("inf")
+
+
+class HistogramSink(object):
+    """
+    In-memory aggregate per URL template: request count, outcomes, bytes,
+    retries and latency histograms for each phase.
+    """
+
+    buckets = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+               1.0, 2.5, 5.0, 10.0, 30.0)
+    phases = ("latency", "wait", "connect", "transfer", "decode")
+
+    def __init__(self, buckets=None):
+        self.buckets = tuple(HistogramSink.buckets if buckets is None else buckets)
+        self.stats = {}
+        self._lock = Lock()
+
+    def _entry(self, template):
+        entry = self.stats.get(template)
+        if entry is None:
+            entry = {"count": 0, "bytes": 0, "retries": 0, "outcomes": {},
+                     "histograms": dict((p, _Histogram(self.buckets)) for p in HistogramSink.phases)}
+            self.stats[template] = entry
+        return entry
+
+    def __call__(self, event):
+        with self._lock:
+            entry = self._entry(event.template)
+            entry["count"] += 1
+            entry["bytes"] += event.bytes
+            entry["retries"] += event.retries
+            entry["outcomes"][event.outcome] = entry["outcomes"].get(event.outcome, 0) + 1
+            h = entry["histograms"]
+            h["latency"].add(event.latency)
+            h["wait"].add(event.wait)
+            h["connect"].add(event.connect)
+            h["transfer"].add(event.transfer)
+            h["decode"].add(event.decode)
+
+    def summary(self):
+        out = {}
+        with self._lock:
+            for template, entry in self.stats.items():
+                lat = entry["histograms"]["latency"]
+                hits = entry["outcomes"].get("cache_hit", 0) + entry["outcomes"].get("not_modified", 0) \
+                    + entry["outcomes"].get("unchanged", 0)
+                out[template] = {"count": entry["count"], "bytes": entry["bytes"],
+                                 "retries": entry["retries"], "outcomes": dict(entry["outcomes"]),
+                                 "cache_hit_rate": hits / entry["count"] if entry["count"] else 0.0,
+                                 "mean": lat.total / lat.n if lat.n else None,
+                                 "p50": lat.quantile(0.5), "p99": lat.quantile(0.99)}
+        return out
+
+    def reset(self):
+        with self._lock:
+            self.stats.clear()
+
+
+class LogSink(object):
+    """
+    Writes each event as one JSON line to the 'nhlapi.metrics' logger.
+    """
+
+    def __init__(self, logger=None, level=logging.INFO):
+        self.logger = logging.getLogger("nhlapi.metrics") if logger is None else logger
+        self.level = level
+
+    def __call__(self, event):
+        if self.logger.isEnabledFor(self.level):
+            self.logger.log(self.level, json.dumps(event.to_dict()))
+
+
+class PrometheusExporter(HistogramSink):
+    """
+    HistogramSink that renders its aggregates in the Prometheus text
+    exposition format via render().
+    """
+
+    def __init__(self, prefix="nhlapi", buckets=None):
+        super().__init__(buckets=buckets)
+        self.prefix = prefix
+
+    @staticmethod
+    def _label(value):
+        return str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+    def render(self):
+        p = self.prefix
+        lines = ["# TYPE %s_requests_total counter" % p,
+                 "# TYPE %s_response_bytes_total counter" % p,
+                 "# TYPE %s_retries_total counter" % p]
+        for phase in HistogramSink.phases:
+            lines.append("# TYPE %s_request_%s_seconds histogram" % (p, phase))
+        with self._lock:
+            for template, entry in sorted(self.stats.items()):
+                ep = 'endpoint="%s"' % PrometheusExporter._label(template)
+                for outcome, n in sorted(entry["outcomes"].items()):
+                    lines.append('%s_requests_total{%s,outcome="%s"} %d' % (p, ep, outcome, n))
+                lines.append("%s_response_bytes_total{%s} %d" % (p, ep, entry["bytes"]))
+                lines.append("%s_retries_total{%s} %d" % (p, ep, entry["retries"]))
+                for phase in HistogramSink.phases:
+                    h = entry["histograms"][phase]
+                    name = "%s_request_%s_seconds" % (p, phase)
+                    cumulative = 0
+                    for bound, c in zip(self.buckets, h.counts):
+                        cumulative += c
+                        lines.append('%s_bucket{%s,le="%g"} %d' % (name, ep, bound, cumulative))
+                    lines.append('%s_bucket{%s,le="+Inf"} %d' % (name, ep, h.n))
+                    lines.append("%s_sum{%s} %f" % (name, ep, h.total))
+                    lines.append("%s_count{%s} %d" % (name, ep, h.n))
+        return "\n".join(lines) + "\n"
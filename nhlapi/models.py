@@ -0,0 +1,324 @@
+"""
+Compact typed models for the main API payloads.
+
+Every model uses __slots__ and keeps only the fields it declares, and
+repeated strings (names, abbreviations, positions, event types) are
+interned so a season's worth of objects shares one copy of each. Player
+lists in a boxscore are built up front by default. With lazy=True the raw
+player section is kept until first access instead; it is several times
+larger than the models built from it, so only use that for boxscores whose
+players are rarely read.
+"""
+from sys import intern
+from nhlapi.utils import clock_seconds
+
+
+def _str(value):
+    return None if value is None else intern(value)
+
+
+def _float(value):
+    if value in (None, ""):
+        return None
+    return float(value)
+
+
+class _Model(object):
+
+    __slots__ = ()
+
+    def __repr__(self):
+        fields = ", ".join("%s=%r" % (k, getattr(self, k)) for k in self.__slots__
+                           if not k.startswith("_"))
+        return "%s(%s)" % (type(self).__name__, fields)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and all(
+            getattr(self, k) == getattr(other, k) for k in self.__slots__ if not k.startswith("_"))
+
+    def to_dict(self):
+        return dict((k, getattr(self, k)) for k in self.__slots__ if not k.startswith("_"))
+
+
+class Conference(_Model):
+
+    __slots__ = ("id", "name", "abbreviation", "short_name", "active")
+
+    def __init__(self, id, name, abbreviation=None, short_name=None, active=True):
+        self.id = id
+        self.name = _str(name)
+        self.abbreviation = _str(abbreviation)
+        self.short_name = _str(short_name)
+        self.active = active
+
+    @classmethod
+    def from_json(cls, js):
+        return cls(js['id'], js.get('name'), js.get('abbreviation'),
+                   js.get('shortName'), js.get('active', True))
+
+
+class Division(_Model):
+
+    __slots__ = ("id", "name", "name_short", "abbreviation", "conference_id", "active")
+
+    def __init__(self, id, name, name_short=None, abbreviation=None,
+                 conference_id=None, active=True):
+        self.id = id
+        self.name = _str(name)
+        self.name_short = _str(name_short)
+        self.abbreviation = _str(abbreviation)
+        self.conference_id = conference_id
+        self.active = active
+
+    @classmethod
+    def from_json(cls, js):
+        return cls(js['id'], js.get('name'), js.get('nameShort'), js.get('abbreviation'),
+                   js.get('conference', {}).get('id'), js.get('active', True))
+
+
+class Team(_Model):
+
+    __slots__ = ("id", "name", "abbreviation", "team_name", "location_name",
+                 "division_id", "conference_id", "venue", "active")
+
+    def __init__(self, id, name, abbreviation=None, team_name=None, location_name=None,
+                 division_id=None, conference_id=None, venue=None, active=True):
+        self.id = id
+        self.name = _str(name)
+        self.abbreviation = _str(abbreviation)
+        self.team_name = _str(team_name)
+        self.location_name = _str(location_name)
+        self.division_id = division_id
+        self.conference_id = conference_id
+        self.venue = _str(venue)
+        self.active = active
+
+    @classmethod
+    def from_json(cls, js):
+        return cls(js['id'], js.get('name'), js.get('abbreviation'), js.get('teamName'),
+                   js.get('locationName'), js.get('division', {}).get('id'),
+                   js.get('conference', {}).get('id'), js.get('venue', {}).get('name'),
+                   js.get('active', True))
+
+
+class Player(_Model):
+
+    __slots__ = ("id", "name", "first_name", "last_name", "number", "position",
+                 "team_id", "shoots", "birth_date", "nationality", "active")
+
+    def __init__(self, id, name, first_name=None, last_name=None, number=None,
+                 position=None, team_id=None, shoots=None, birth_date=None,
+                 nationality=None, active=True):
+        self.id = id
+        self.name = _str(name)
+        self.first_name = _str(first_name)
+        self.last_name = _str(last_name)
+        self.number = _str(number)
+        self.position = _str(position)
+        self.team_id = team_id
+        self.shoots = _str(shoots)
+        self.birth_date = birth_date
+        self.nationality = _str(nationality)
+        self.active = active
+
+    @classmethod
+    def from_json(cls, js, team_id=None):
+        """
+        Builds a Player from a people response entry or a roster entry
+        (which nests the person and carries the jersey number and position).
+        """
+        p = js.get('person', js)
+        position = js.get('position') or p.get('primaryPosition') or {}
+        team = p.get('currentTeam', {}).get('id', team_id)
+        return cls(p['id'], p.get('fullName'), p.get('firstName'), p.get('lastName'),
+                   js.get('jerseyNumber', p.get('primaryNumber')), position.get('abbreviation'),
+                   team, p.get('shootsCatches'), p.get('birthDate'), p.get('nationality'),
+                   p.get('active', True))
+
+
+class SkaterStats(_Model):
+
+    __slots__ = ("player_id", "name", "position", "team_id", "toi", "goals", "assists",
+                 "shots", "hits", "pp_goals", "pp_assists", "pim", "blocked",
+                 "plus_minus", "takeaways", "giveaways", "faceoff_wins", "faceoffs")
+
+    def __init__(self, player_id, name, position, team_id, toi=0, goals=0, assists=0,
+                 shots=0, hits=0, pp_goals=0, pp_assists=0, pim=0, blocked=0,
+                 plus_minus=0, takeaways=0, giveaways=0, faceoff_wins=0, faceoffs=0):
+        self.player_id = player_id
+        self.name = _str(name)
+        self.position = _str(position)
+        self.team_id = team_id
+        self.toi = toi
+        self.goals = goals
+        self.assists = assists
+        self.shots = shots
+        self.hits = hits
+        self.pp_goals = pp_goals
+        self.pp_assists = pp_assists
+        self.pim = pim
+        self.blocked = blocked
+        self.plus_minus = plus_minus
+        self.takeaways = takeaways
+        self.giveaways = giveaways
+        self.faceoff_wins = faceoff_wins
+        self.faceoffs = faceoffs
+
+    @classmethod
+    def from_json(cls, js, team_id=None):
+        p = js.get('person', {})
+        s = js['stats']['skaterStats']
+        return cls(p.get('id'), p.get('fullName'), js.get('position', {}).get('abbreviation'),
+                   team_id, clock_seconds(s.get('timeOnIce')), s.get('goals', 0), s.get('assists', 0),
+                   s.get('shots', 0), s.get('hits', 0), s.get('powerPlayGoals', 0),
+                   s.get('powerPlayAssists', 0), s.get('penaltyMinutes', 0), s.get('blocked', 0),
+                   s.get('plusMinus', 0), s.get('takeaways', 0), s.get('giveaways', 0),
+                   s.get('faceOffWins', 0), s.get('faceoffTaken', 0))
+
+
+class GoalieStats(_Model):
+
+    __slots__ = ("player_id", "name", "team_id", "toi", "shots", "saves",
+                 "pp_shots", "pp_saves", "sh_shots", "sh_saves", "decision")
+
+    def __init__(self, player_id, name, team_id, toi=0, shots=0, saves=0, pp_shots=0,
+                 pp_saves=0, sh_shots=0, sh_saves=0, decision=None):
+        self.player_id = player_id
+        self.name = _str(name)
+        self.team_id = team_id
+        self.toi = toi
+        self.shots = shots
+        self.saves = saves
+        self.pp_shots = pp_shots
+        self.pp_saves = pp_saves
+        self.sh_shots = sh_shots
+        self.sh_saves = sh_saves
+        self.decision = _str(decision)
+
+    @classmethod
+    def from_json(cls, js, team_id=None):
+        p = js.get('person', {})
+        s = js['stats']['goalieStats']
+        return cls(p.get('id'), p.get('fullName'), team_id, clock_seconds(s.get('timeOnIce')),
+                   s.get('shots', 0), s.get('saves', 0), s.get('powerPlayShotsAgainst', 0),
+                   s.get('powerPlaySaves', 0), s.get('shortHandedShotsAgainst', 0),
+                   s.get('shortHandedSaves', 0), s.get('decision') or None)
+
+
+class TeamBoxscore(_Model):
+
+    __slots__ = ("team_id", "abbreviation", "goals", "pim", "shots", "pp_goals",
+                 "pp_opportunities", "faceoff_pct", "blocked", "takeaways",
+                 "giveaways", "hits", "_players", "_raw_players")
+
+    def __init__(self, team_id, abbreviation, goals=0, pim=0, shots=0, pp_goals=0,
+                 pp_opportunities=0, faceoff_pct=None, blocked=0, takeaways=0,
+                 giveaways=0, hits=0, players=None, raw_players=None):
+        self.team_id = team_id
+        self.abbreviation = _str(abbreviation)
+        self.goals = goals
+        self.pim = pim
+        self.shots = shots
+        self.pp_goals = pp_goals
+        self.pp_opportunities = pp_opportunities
+        self.faceoff_pct = faceoff_pct
+        self.blocked = blocked
+        self.takeaways = takeaways
+        self.giveaways = giveaways
+        self.hits = hits
+        self._players = players
+        self._raw_players = raw_players
+
+    @classmethod
+    def from_json(cls, js, lazy=False):
+        team = js.get('team', {})
+        s = js.get('teamStats', {}).get('teamSkaterStats', {})
+        obj = cls(team.get('id'), team.get('abbreviation'), s.get('goals', 0), s.get('pim', 0),
+                  s.get('shots', 0), int(s.get('powerPlayGoals', 0) or 0),
+                  int(s.get('powerPlayOpportunities', 0) or 0), _float(s.get('faceOffWinPercentage')),
+                  s.get('blocked', 0), s.get('takeaways', 0), s.get('giveaways', 0),
+                  s.get('hits', 0), raw_players=js.get('players', {}))
+        if not lazy:
+            obj.players
+        return obj
+
+    @property
+    def players(self):
+        """
+        Skater and goalie stat lines (built on first access when the
+        boxscore was built lazily). Players who didn't play (no stats) are
+        skipped.
+        """
+        if self._players is None:
+            players = []
+            for p in (self._raw_players or {}).values():
+                stats = p.get('stats', {})
+                if 'skaterStats' in stats:
+                    players.append(SkaterStats.from_json(p, self.team_id))
+                elif 'goalieStats' in stats:
+                    players.append(GoalieStats.from_json(p, self.team_id))
+            self._players = tuple(players)
+            self._raw_players = None
+        return self._players
+
+    @property
+    def skaters(self):
+        return [p for p in self.players if type(p) is SkaterStats]
+
+    @property
+    def goalies(self):
+        return [p for p in self.players if type(p) is GoalieStats]
+
+
+class Boxscore(_Model):
+
+    __slots__ = ("game_pk", "away", "home")
+
+    def __init__(self, game_pk, away, home):
+        self.game_pk = game_pk
+        self.away = away
+        self.home = home
+
+    @classmethod
+    def from_json(cls, js, game_pk=None, lazy=False):
+        teams = js['teams']
+        return cls(game_pk if game_pk is not None else js.get('gamePk'),
+                   TeamBoxscore.from_json(teams['away'], lazy=lazy),
+                   TeamBoxscore.from_json(teams['home'], lazy=lazy))
+
+
+class PlayEvent(_Model):
+
+    __slots__ = ("event_idx", "event_type", "secondary_type", "period", "period_seconds",
+                 "x", "y", "team_id", "player_ids", "player_roles")
+
+    def __init__(self, event_idx, event_type, secondary_type=None, period=0,
+                 period_seconds=0, x=None, y=None, team_id=None, player_ids=(),
+                 player_roles=()):
+        self.event_idx = event_idx
+        self.event_type = _str(event_type)
+        self.secondary_type = _str(secondary_type)
+        self.period = period
+        self.period_seconds = period_seconds
+        self.x = x
+        self.y = y
+        self.team_id = team_id
+        self.player_ids = player_ids
+        self.player_roles = player_roles
+
+    @classmethod
+    def from_json(cls, js):
+        result = js.get('result', {})
+        about = js.get('about', {})
+        coords = js.get('coordinates', {})
+        players = js.get('players', [])
+        return cls(about.get('eventIdx'), result.get('eventTypeId'), result.get('secondaryType'),
+                   about.get('period', 0), clock_seconds(about.get('periodTime')),
+                   coords.get('x'), coords.get('y'), js.get('team', {}).get('id'),
+                   tuple(p.get('player', {}).get('id') for p in players),
+                   tuple(_str(p.get('playerType')) for p in players))
+
+    @classmethod
+    def from_feed(cls, feed):
+        plays = feed.get('liveData', {}).get('plays', {}).get('allPlays', [])
+        return [cls.from_json(p) for p in plays]
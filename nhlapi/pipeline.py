@@ -0,0 +1,71 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from nhlapi.decoder import loads
+from nhlapi.endpoints import Game
+from nhlapi.plays import EventTable
+
+
+def _parse(transform, decode, gid, raw):
+    return transform(gid, loads(raw) if decode else raw)
+
+
+def event_table(gid, feed):
+    """
+    Transform building a play-by-play EventTable from one feed/live game.
+    """
+    return EventTable.from_feeds([feed])
+
+
+class BulkIngest(object):
+    """
+    Bulk download + parse pipeline for large backfills.
+
+    Responses are downloaded by the Game's thread pool as raw bytes and
+    handed to a process pool that decodes them and runs transform(game_pk,
+    data) on every core. transform must be a picklable module-level
+    function; with decode=False it receives the raw bytes instead. At most
+    max_pending games are waiting in the process pool: when parsing falls
+    behind, downloads stop being consumed and the Game's bounded fetch queue
+    stalls, so downloads can't outrun the parsers.
+    """
+
+    def __init__(self, transform=event_table, game=None, processes=None,
+                 max_pending=None, decode=True):
+        self.transform = transform
+        self.game = Game() if game is None else game
+        self.processes = (os.cpu_count() or 1) if processes is None else processes
+        self.max_pending = self.processes * 2 if max_pending is None else max_pending
+        self.decode = decode
+
+    def run(self, game_ids, detail="feed/live"):
+        """
+        Generator of (game_pk, result, error) tuples in completion order.
+        error holds the download or transform exception for failed games.
+        """
+        with ProcessPoolExecutor(max_workers=self.processes) as pool:
+            pending = {}
+            for gid, feed, err in self.game.fetch_many(game_ids, detail, raw=True):
+                if err is not None:
+                    yield gid, None, err
+                    continue
+                pending[pool.submit(_parse, self.transform, self.decode, gid, feed.raw)] = gid
+                del feed
+                while len(pending) >= self.max_pending:
+                    for item in self._drain(pending):
+                        yield item
+            while pending:
+                for item in self._drain(pending):
+                    yield item
+
+    @staticmethod
+    def _drain(pending):
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for fut in done:
+            gid = pending.pop(fut)
+            try:
+                yield gid, fut.result(), None
+            except Exception as e:
+                yield gid, None, e
+
+    def season(self, season, game_type, detail="feed/live"):
+        return self.run(self.game.season_game_ids(season, game_type), detail)
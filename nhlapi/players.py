@@ -0,0 +1,190 @@
+from array import array
+from nhlapi.models import Player
+from nhlapi.utils import clock_seconds, name_key
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class _StatTable(object):
+    """
+    Season stat rows in typed array columns, one row per (player, season).
+    Adding a row for a pair that already has one overwrites it in place.
+    """
+
+    def __init__(self, columns, fields):
+        self.columns = columns
+        # column name -> (response stat key, converter)
+        self.fields = fields
+        self.data = dict((name, array(code)) for name, code in columns)
+        self._rows = {}
+
+    def put(self, player_id, season, team_id, stat):
+        values = [player_id, season, team_id or 0]
+        for name, _ in self.columns[3:]:
+            key, convert = self.fields[name]
+            values.append(convert(stat.get(key)))
+        row = self._rows.get((player_id, season))
+        if row is None:
+            row = len(self)
+            self._rows[(player_id, season)] = row
+            for (name, _), value in zip(self.columns, values):
+                self.data[name].append(value)
+        else:
+            for (name, _), value in zip(self.columns, values):
+                self.data[name][row] = value
+        return row
+
+    def row(self, i):
+        return dict((name, self.data[name][i]) for name, _ in self.columns)
+
+    def find(self, player_id, season=None):
+        if season is not None:
+            i = self._rows.get((player_id, season))
+            return [] if i is None else [self.row(i)]
+        return [self.row(i) for (pid, _), i in sorted(self._rows.items()) if pid == player_id]
+
+    def __len__(self):
+        return len(self.data["player_id"])
+
+
+def _int(value):
+    return int(value or 0)
+
+
+class PlayerIndex(object):
+    """
+    Local index of players and their season stats.
+
+    Players are kept as Player models with a case and accent insensitive
+    name lookup (full name or last name). Season stat lines are stored in
+    two columnar tables, skaters and goalies, with times on ice in seconds
+    and seasons as ints (20172018). Refreshing a season's stats replaces
+    the existing rows rather than adding new ones.
+    """
+
+    skater_columns = (("player_id", "i"),
+                      ("season", "i"),
+                      ("team_id", "i"),
+                      ("games", "h"),
+                      ("goals", "h"),
+                      ("assists", "h"),
+                      ("points", "h"),
+                      ("shots", "h"),
+                      ("hits", "h"),
+                      ("blocked", "h"),
+                      ("pim", "h"),
+                      ("plus_minus", "h"),
+                      ("pp_goals", "h"),
+                      ("pp_points", "h"),
+                      ("sh_goals", "h"),
+                      ("gw_goals", "h"),
+                      ("shifts", "i"),
+                      ("toi", "i"))
+    skater_fields = {"games": ("games", _int), "goals": ("goals", _int),
+                     "assists": ("assists", _int), "points": ("points", _int),
+                     "shots": ("shots", _int), "hits": ("hits", _int),
+                     "blocked": ("blocked", _int), "pim": ("pim", _int),
+                     "plus_minus": ("plusMinus", _int), "pp_goals": ("powerPlayGoals", _int),
+                     "pp_points": ("powerPlayPoints", _int),
+                     "sh_goals": ("shortHandedGoals", _int),
+                     "gw_goals": ("gameWinningGoals", _int), "shifts": ("shifts", _int),
+                     "toi": ("timeOnIce", clock_seconds)}
+
+    goalie_columns = (("player_id", "i"),
+                      ("season", "i"),
+                      ("team_id", "i"),
+                      ("games", "h"),
+                      ("starts", "h"),
+                      ("wins", "h"),
+                      ("losses", "h"),
+                      ("ot", "h"),
+                      ("shutouts", "h"),
+                      ("shots_against", "i"),
+                      ("saves", "i"),
+                      ("goals_against", "h"),
+                      ("toi", "i"))
+    goalie_fields = {"games": ("games", _int), "starts": ("gamesStarted", _int),
+                     "wins": ("wins", _int), "losses": ("losses", _int), "ot": ("ot", _int),
+                     "shutouts": ("shutouts", _int), "shots_against": ("shotsAgainst", _int),
+                     "saves": ("saves", _int), "goals_against": ("goalsAgainst", _int),
+                     "toi": ("timeOnIce", clock_seconds)}
+
+    def __init__(self):
+        self.players = {}
+        self.skaters = _StatTable(PlayerIndex.skater_columns, PlayerIndex.skater_fields)
+        self.goalies = _StatTable(PlayerIndex.goalie_columns, PlayerIndex.goalie_fields)
+        self._names = {}
+
+    def add(self, js, team_id=None):
+        """
+        Adds or updates a player from a people response entry, a roster
+        entry or a Player. Returns the Player.
+        """
+        player = js if isinstance(js, Player) else Player.from_json(js, team_id=team_id)
+        old = self.players.get(player.id)
+        if old is not None:
+            for key in PlayerIndex._keys(old):
+                self._names.get(key, set()).discard(old.id)
+            for k in Player.__slots__:
+                if getattr(player, k) is None:
+                    setattr(player, k, getattr(old, k))
+        self.players[player.id] = player
+        for key in PlayerIndex._keys(player):
+            self._names.setdefault(key, set()).add(player.id)
+        return player
+
+    @staticmethod
+    def _keys(player):
+        last = player.last_name or (player.name or "").rpartition(" ")[2]
+        return set(name_key(n) for n in (player.name, last) if n)
+
+    def get(self, player_id):
+        return self.players.get(player_id)
+
+    def lookup(self, name):
+        """
+        IDs of the players whose full name or last name matches name.
+        """
+        return sorted(self._names.get(name_key(name), ()))
+
+    def is_goalie(self, player_id, stat=None):
+        player = self.players.get(player_id)
+        if player is not None and player.position is not None:
+            return player.position == "G"
+        return stat is not None and "saves" in stat
+
+    def add_stats(self, player_id, season, stat, team_id=None):
+        """
+        Stores one season stat line (the 'stat' object of a stats split).
+        season is the 8 digit season, e.g. 20172018.
+        """
+        if team_id is None and player_id in self.players:
+            team_id = self.players[player_id].team_id
+        table = self.goalies if self.is_goalie(player_id, stat) else self.skaters
+        return table.put(player_id, int(season), team_id, stat)
+
+    def stats(self, player_id, season=None):
+        season = None if season is None else int(season)
+        return self.skaters.find(player_id, season) or self.goalies.find(player_id, season)
+
+    def rows(self, kind="skaters", season=None):
+        table = getattr(self, kind)
+        for i in range(len(table)):
+            if season is None or table.data["season"][i] == int(season):
+                yield table.row(i)
+
+    def to_numpy(self, kind="skaters"):
+        if numpy is None:
+            raise ImportError("to_numpy requires numpy. install it with 'pip install numpy'")
+        table = getattr(self, kind)
+        return dict((name, numpy.frombuffer(table.data[name], dtype=table.data[name].typecode))
+                    for name, _ in table.columns)
+
+    def __contains__(self, player_id):
+        return player_id in self.players
+
+    def __len__(self):
+        return len(self.players)
@@ -0,0 +1,147 @@
+from array import array
+from nhlapi.utils import clock_seconds
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+NAN = float("nan")
+
+
+class Categories(object):
+    """
+    Maps repeated strings (event types, roles, ...) to small integer codes.
+    Code 0 is reserved for a missing value.
+    """
+
+    def __init__(self):
+        self.values = [None]
+        self._codes = {None: 0}
+
+    def code(self, value):
+        c = self._codes.get(value)
+        if c is None:
+            c = len(self.values)
+            self._codes[value] = c
+            self.values.append(value)
+        return c
+
+    def lookup(self, value):
+        return self._codes.get(value, -1)
+
+    def __len__(self):
+        return len(self.values)
+
+
+class EventTable(object):
+    """
+    Columnar play-by-play table built from feed/live responses.
+
+    Each column is a typed array (see EventTable.columns); string columns
+    hold codes into EventTable.categories. Missing IDs are stored as 0 and
+    missing coordinates as NaN. to_numpy() exposes the columns as numpy
+    arrays without copying for vectorised queries.
+    """
+
+    # column name -> array typecode
+    columns = (("game_pk", "q"),
+               ("event_idx", "i"),
+               ("period", "b"),
+               ("period_seconds", "h"),
+               ("x", "f"),
+               ("y", "f"),
+               ("event_type", "h"),
+               ("secondary_type", "h"),
+               ("strength", "h"),
+               ("team_id", "i"),
+               ("player1_id", "i"),
+               ("player1_role", "h"),
+               ("player2_id", "i"),
+               ("player2_role", "h"))
+    categorical = ("event_type", "secondary_type", "strength", "player1_role", "player2_role")
+
+    def __init__(self):
+        self.data = dict((name, array(code)) for name, code in EventTable.columns)
+        self.categories = {
+            "event_type": Categories(),
+            "secondary_type": Categories(),
+            "strength": Categories(),
+            "role": Categories(),
+        }
+
+    @classmethod
+    def from_feeds(cls, feeds):
+        table = cls()
+        for feed in feeds:
+            table.add_feed(feed)
+        return table
+
+    def _category(self, column):
+        return self.categories["role" if column.endswith("_role") else column]
+
+    def add_feed(self, feed):
+        """
+        Appends every play in feed['liveData']['plays']['allPlays'].
+        Returns the number of events added.
+        """
+        game_pk = int(feed.get("gamePk", 0))
+        plays = feed.get("liveData", {}).get("plays", {}).get("allPlays", [])
+        d = self.data
+        event_type = self.categories["event_type"]
+        secondary = self.categories["secondary_type"]
+        strength = self.categories["strength"]
+        role = self.categories["role"]
+        for play in plays:
+            result = play.get("result", {})
+            about = play.get("about", {})
+            coords = play.get("coordinates", {})
+            players = play.get("players", [])
+            p1 = players[0] if len(players) > 0 else {}
+            p2 = players[1] if len(players) > 1 else {}
+
+            d["game_pk"].append(game_pk)
+            d["event_idx"].append(about.get("eventIdx", -1))
+            d["period"].append(about.get("period", 0))
+            d["period_seconds"].append(clock_seconds(about.get("periodTime"), -1))
+            d["x"].append(coords.get("x", NAN))
+            d["y"].append(coords.get("y", NAN))
+            d["event_type"].append(event_type.code(result.get("eventTypeId")))
+            d["secondary_type"].append(secondary.code(result.get("secondaryType")))
+            d["strength"].append(strength.code(result.get("strength", {}).get("code")))
+            d["team_id"].append(play.get("team", {}).get("id", 0))
+            d["player1_id"].append(p1.get("player", {}).get("id", 0))
+            d["player1_role"].append(role.code(p1.get("playerType")))
+            d["player2_id"].append(p2.get("player", {}).get("id", 0))
+            d["player2_role"].append(role.code(p2.get("playerType")))
+        return len(plays)
+
+    def __len__(self):
+        return len(self.data["game_pk"])
+
+    def code(self, column, value):
+        """
+        Code of value in a categorical column, or -1 if it never occurs.
+        """
+        return self._category(column).lookup(value)
+
+    def decode(self, column):
+        """
+        Returns the column with categorical codes replaced by their strings.
+        """
+        if column not in EventTable.categorical:
+            return list(self.data[column])
+        values = self._category(column).values
+        return [values[c] for c in self.data[column]]
+
+    def to_numpy(self):
+        if numpy is None:
+            raise ImportError("to_numpy requires numpy. install it with 'pip install numpy'")
+        return dict((name, numpy.frombuffer(self.data[name], dtype=self.data[name].typecode))
+                    for name, _ in EventTable.columns)
+
+    def rows(self):
+        names = [name for name, _ in EventTable.columns]
+        for row in zip(*[self.data[n] for n in names]):
+            yield dict(zip(names, row))
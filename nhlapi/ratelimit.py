@@ -0,0 +1,233 @@
+import random
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from threading import Condition, Lock, local
+from time import monotonic, sleep
+import requests
+from nhlapi import config
+
+
+RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+
+
+class TokenBucket(object):
+    """
+    Thread-safe token bucket. acquire() blocks until a token is available.
+    The refill rate can be changed while in use.
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.tokens = float(burst)
+        self.updated = monotonic()
+        self._lock = Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self):
+        """
+        Takes a token if one is available and returns 0, otherwise returns
+        the seconds to wait before trying again.
+        """
+        with self._lock:
+            self._refill(monotonic())
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self):
+        while True:
+            wait = self.take()
+            if not wait:
+                return
+            sleep(wait)
+
+
+class CircuitBreaker(object):
+    """
+    Opens after threshold consecutive failures and holds every caller until
+    the cooldown has passed, so all workers back off together. It then goes
+    half-open: one trial request is let through while the others keep
+    waiting. The trial's success closes the breaker and its failure opens
+    it for another cooldown; a trial that never reports back is replaced
+    by a new one after a cooldown.
+    """
+
+    def __init__(self, threshold, cooldown):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.open_until = 0.0
+        self.half_open = False
+        self.trial_until = 0.0
+        self._cond = Condition()
+
+    @property
+    def state(self):
+        """
+        'open', 'half-open' or 'closed'.
+        """
+        if self.open_until > monotonic():
+            return "open"
+        return "half-open" if self.half_open else "closed"
+
+    def admit(self):
+        """
+        Returns 0 when the caller may send a request (taking the trial slot
+        when half-open), otherwise the seconds to wait before asking again.
+        """
+        with self._cond:
+            now = monotonic()
+            if self.open_until > now:
+                return self.open_until - now
+            if self.half_open:
+                if self.trial_until > now:
+                    return self.trial_until - now
+                self.trial_until = now + self.cooldown
+            return 0
+
+    def wait(self):
+        with self._cond:
+            while True:
+                wait = self.admit()
+                if wait <= 0:
+                    return
+                self._cond.wait(wait)
+
+    def hold(self, seconds):
+        with self._cond:
+            self.open_until = max(self.open_until, monotonic() + seconds)
+
+    def success(self):
+        with self._cond:
+            self.failures = 0
+            if self.half_open:
+                self.half_open = False
+                self.trial_until = 0.0
+                self._cond.notify_all()
+
+    def failure(self):
+        with self._cond:
+            self.failures += 1
+            if self.half_open or self.failures >= self.threshold:
+                self.open_until = max(self.open_until, monotonic() + self.cooldown)
+                self.failures = 0
+                self.half_open = True
+                self.trial_until = 0.0
+
+
+class RequestScheduler(object):
+    """
+    Shared throttle and retry policy for outgoing requests.
+
+    Requests are paced by a token bucket whose rate adapts: it is halved on
+    each throttling or server error response and creeps back up towards
+    max_rate on success. Retryable failures (429, 5xx, connection errors,
+    timeouts) are retried with exponential backoff and full jitter, honoring
+    Retry-After when the server sends it. Repeated failures open a circuit
+    breaker that pauses every worker using the scheduler until a trial
+    request succeeds.
+    """
+
+    def __init__(self, rate=config.RATE_LIMIT, burst=config.RATE_BURST,
+                 min_rate=config.RATE_MIN, max_retries=config.MAX_RETRIES,
+                 backoff_base=config.BACKOFF_BASE, backoff_max=config.BACKOFF_MAX,
+                 breaker_threshold=config.BREAKER_THRESHOLD,
+                 breaker_cooldown=config.BREAKER_COOLDOWN):
+        self.max_rate = float(rate)
+        self.min_rate = float(min_rate)
+        self.bucket = TokenBucket(rate, burst)
+        self.breaker = CircuitBreaker(breaker_threshold, breaker_cooldown)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retries = 0
+        self._local = local()
+
+    @property
+    def last_retries(self):
+        """
+        Number of retries made by the calling thread's most recent call().
+        """
+        return getattr(self._local, "retries", 0)
+
+    @staticmethod
+    def _retry_after(resp):
+        value = resp.headers.get("Retry-After")
+        if value is None:
+            return None
+        if value.strip().isdigit():
+            return float(value)
+        try:
+            when = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+    def _backoff(self, attempt):
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _slow_down(self):
+        self.bucket.rate = max(self.min_rate, self.bucket.rate / 2)
+
+    def _speed_up(self):
+        if self.bucket.rate < self.max_rate:
+            self.bucket.rate = min(self.max_rate, self.bucket.rate + self.max_rate / 50)
+
+    def _on_response(self, status, resp, attempt):
+        """
+        Updates the rate and breaker for a response. Returns None when resp
+        is final, else the seconds to wait before retrying.
+        """
+        if status not in RETRY_STATUSES:
+            self.breaker.success()
+            self._speed_up()
+            return None
+        self._slow_down()
+        self.breaker.failure()
+        if attempt >= self.max_retries:
+            return None
+        retry_after = RequestScheduler._retry_after(resp)
+        if retry_after is not None:
+            self.breaker.hold(retry_after)
+            return retry_after
+        return self._backoff(attempt)
+
+    def _on_error(self, attempt):
+        """
+        Connection error counterpart of _on_response; None means re-raise.
+        """
+        self.breaker.failure()
+        if attempt >= self.max_retries:
+            return None
+        return self._backoff(attempt)
+
+    def call(self, send):
+        """
+        Calls send() (which performs one request and returns the response)
+        under the rate limit, retrying retryable failures. Returns the last
+        response, or re-raises the last connection error.
+        """
+        attempt = 0
+        while True:
+            self._local.retries = attempt
+            self.breaker.wait()
+            self.bucket.acquire()
+            try:
+                resp = send()
+            except (requests.ConnectionError, requests.Timeout):
+                delay = self._on_error(attempt)
+                if delay is None:
+                    raise
+            else:
+                delay = self._on_response(resp.status_code, resp, attempt)
+                if delay is None:
+                    return resp
+                resp.close()
+            attempt += 1
+            self.retries += 1
+            sleep(min(delay, self.backoff_max))
@@ -0,0 +1,128 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from time import time
+from nhlapi import config
+from nhlapi.transport import default_transport
+
+
+class HistoricalRegistry(object):
+    """
+    Registry of past (inactive) conferences and divisions.
+
+    The API only lists active conferences and divisions; historical ones are
+    found by probing the IDs below the highest active one. Probes run
+    concurrently, missing IDs are skipped, and a complete result is saved
+    as a local JSON snapshot so later processes load it without any
+    requests. Probes go through the transport passed to the lookup, or the
+    registry's own transport when none is.
+    """
+
+    resources = ("conferences", "divisions")
+
+    def __init__(self, transport=None, base_url=None, path=None,
+                 max_workers=config.MAX_WORKERS):
+        self.transport = default_transport() if transport is None else transport
+        self.api_url = config.BASE_URL if base_url is None else base_url
+        self.url_template = "/".join([self.api_url, "v" + str(config.VERSION)])
+        if path is None:
+            digest = hashlib.sha1(self.api_url.encode("utf-8")).hexdigest()[:12]
+            path = os.path.join(config.CACHE_DIR, "registry-%s.json" % digest)
+        self.path = path
+        self.max_workers = max_workers
+        self._lock = Lock()
+        self._snapshot = None
+
+    def _load(self):
+        if self._snapshot is None and os.path.exists(self.path):
+            try:
+                with open(self.path, mode="r") as f:
+                    snap = json.load(f)
+            except (OSError, ValueError):
+                snap = None
+            if snap is not None and snap.get("api_url") == self.api_url:
+                self._snapshot = snap
+        if self._snapshot is None:
+            self._snapshot = {"api_url": self.api_url}
+        return self._snapshot
+
+    def _save(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp = "%s.%d.tmp" % (self.path, os.getpid())
+        with open(tmp, mode="w") as f:
+            json.dump(self._snapshot, f)
+        os.replace(tmp, self.path)
+
+    def _probe(self, transport, resource, i):
+        url = "/".join([self.url_template, resource, str(i)])
+        try:
+            req = transport.get(url)
+        except Exception:
+            return i, None, False
+        if req.status_code == 404:
+            return i, [], True
+        if not req.ok:
+            return i, None, False
+        return i, transport.decoder.loads(req.content).get(resource, []), True
+
+    def _discover(self, transport, resource, current_ids):
+        ids = [i for i in range(1, max(current_ids)) if i not in current_ids]
+        found = []
+        complete = True
+        with ThreadPoolExecutor(max_workers=self.max_workers) as exc:
+            for i, items, ok in sorted(exc.map(lambda i: self._probe(transport, resource, i), ids),
+                                       key=lambda r: r[0]):
+                if not ok:
+                    complete = False
+                    continue
+                for item in items:
+                    found.append(dict(item, active=False))
+        return found, complete
+
+    def get(self, resource, current, refresh=False, transport=None):
+        """
+        Returns the inactive entries for resource ('conferences' or
+        'divisions'), given the current API response for that resource.
+        Any probes needed are made through transport (defaults to the
+        registry's).
+        """
+        if resource not in HistoricalRegistry.resources:
+            raise ValueError("resource must be one of %s" % (HistoricalRegistry.resources,))
+        with self._lock:
+            snap = self._load()
+            if refresh or resource not in snap:
+                current_ids = set(c['id'] for c in current[resource])
+                found, complete = self._discover(self.transport if transport is None
+                                                 else transport, resource, current_ids)
+                if not complete:
+                    # Keep partial results out of the snapshot so the
+                    # failed IDs are probed again next time.
+                    return found
+                snap[resource] = found
+                snap["updated"] = time()
+                self._save()
+            return snap[resource]
+
+    def conferences(self, current, refresh=False, transport=None):
+        return self.get("conferences", current, refresh=refresh, transport=transport)
+
+    def divisions(self, current, refresh=False, transport=None):
+        return self.get("divisions", current, refresh=refresh, transport=transport)
+
+
+_registries = {}
+_registries_lock = Lock()
+
+
+def historical_registry(base_url=None):
+    """
+    Returns the shared registry for base_url, creating it on first use. The
+    registry is shared by every transport; pass yours to its lookups.
+    """
+    key = config.BASE_URL if base_url is None else base_url
+    with _registries_lock:
+        if key not in _registries:
+            _registries[key] = HistoricalRegistry(base_url=key)
+        return _registries[key]
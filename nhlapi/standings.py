@@ -0,0 +1,403 @@
+"""
+Local standings computed from game results.
+
+Results are taken from feed/live, boxscore or schedule responses and
+reduced to GameResult records. StandingsEngine keeps a cumulative snapshot
+of every team's record after each game date, so standings as of any date
+are a lookup plus a sort of the league's teams; adding a game only
+invalidates the snapshots from its date onwards, which are rebuilt from the
+previous snapshot on the next query.
+"""
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, timedelta
+from nhlapi.utils import clock_seconds
+
+
+# record tuple layout
+GP, W, L, OTL, PTS, RW, ROW, GF, GA = range(9)
+EMPTY = (0,) * 9
+
+
+def iso_date(x):
+    """
+    ISO date string (YYYY-MM-DD) from a date, datetime, YYYYMMDD or
+    YYYY-MM-DD value.
+    """
+    if hasattr(x, "strftime"):
+        return x.strftime("%Y-%m-%d")
+    x = str(x)
+    if len(x) == 8 and x.isdigit():
+        return "-".join([x[:4], x[4:6], x[6:]])
+    if len(x) >= 10 and x[4] == "-" and x[7] == "-":
+        return x[:10]
+    raise ValueError("Invalid date %s. please use YYYY-MM-DD" % x)
+
+
+def game_date(utc):
+    """
+    Game date from a UTC start time. Shifting back 8 hours puts every North
+    American (and European) start time on its local calendar date.
+    """
+    start = datetime.strptime(utc[:19], "%Y-%m-%dT%H:%M:%S")
+    return (start - timedelta(hours=8)).strftime("%Y-%m-%d")
+
+
+class GameResult(object):
+    """
+    Final result of one game. Goals include the goal awarded to the
+    shootout winner; ending is 'REG', 'OT' or 'SO'.
+    """
+
+    __slots__ = ("game_pk", "date", "home_id", "away_id", "home_goals", "away_goals", "ending")
+
+    def __init__(self, game_pk, date, home_id, away_id, home_goals, away_goals, ending="REG"):
+        self.game_pk = game_pk
+        self.date = iso_date(date)
+        self.home_id = home_id
+        self.away_id = away_id
+        self.home_goals = home_goals
+        self.away_goals = away_goals
+        self.ending = ending
+
+    @property
+    def key(self):
+        if self.game_pk is not None:
+            return self.game_pk
+        return (self.date, self.home_id, self.away_id)
+
+    @property
+    def winner(self):
+        return self.home_id if self.home_goals > self.away_goals else self.away_id
+
+    @property
+    def loser(self):
+        return self.away_id if self.home_goals > self.away_goals else self.home_id
+
+    def __repr__(self):
+        return "GameResult(%s)" % ", ".join("%s=%r" % (k, getattr(self, k)) for k in self.__slots__)
+
+    @staticmethod
+    def _ending(period, shootout):
+        if shootout:
+            return "SO"
+        return "OT" if period > 3 else "REG"
+
+    @classmethod
+    def from_feed(cls, js, date=None):
+        """
+        From a feed/live response (dict or LazyFeed). Returns None if the
+        game isn't final.
+        """
+        game_data = js.game_data if hasattr(js, "game_data") else js.get("gameData", {})
+        if game_data.get("status", {}).get("abstractGameState") != "Final":
+            return None
+        line = js.linescore if hasattr(js, "linescore") else js.get("liveData", {}).get("linescore")
+        line = line or {}
+        teams = line.get("teams", {})
+        home, away = teams.get("home", {}), teams.get("away", {})
+        home_goals, away_goals = home.get("goals", 0), away.get("goals", 0)
+        shootout = bool(line.get("hasShootout"))
+        if shootout and home_goals == away_goals:
+            so = line.get("shootoutInfo", {})
+            if so.get("home", {}).get("scores", 0) > so.get("away", {}).get("scores", 0):
+                home_goals += 1
+            else:
+                away_goals += 1
+        if date is None:
+            date = game_date(game_data["datetime"]["dateTime"])
+        pk = game_data.get("game", {}).get("pk")
+        return cls(pk, date, home["team"]["id"], away["team"]["id"], home_goals, away_goals,
+                   cls._ending(line.get("currentPeriod", 3), shootout))
+
+    @classmethod
+    def from_boxscore(cls, js, date, game_pk=None, ending=None):
+        """
+        From a boxscore response, which has no date or period information:
+        date must be given, and unless ending is given a game is taken to
+        have gone past regulation when a goalie played more than 60
+        minutes. A tied score means a shootout, won by the team whose
+        goalie got the win.
+        """
+        sides = {}
+        for side in ("home", "away"):
+            team = js["teams"][side]
+            goalie_toi, won = 0, False
+            for p in team.get("players", {}).values():
+                stats = p.get("stats", {}).get("goalieStats")
+                if stats is not None:
+                    goalie_toi = max(goalie_toi, clock_seconds(stats.get("timeOnIce")))
+                    won = won or stats.get("decision") == "W"
+            goals = team.get("teamStats", {}).get("teamSkaterStats", {}).get("goals", 0)
+            sides[side] = (team["team"]["id"], goals, goalie_toi, won)
+        home_goals, away_goals = sides["home"][1], sides["away"][1]
+        if ending is None:
+            if home_goals == away_goals:
+                ending = "SO"
+            elif max(sides["home"][2], sides["away"][2]) > 3600:
+                ending = "OT"
+            else:
+                ending = "REG"
+        if home_goals == away_goals:
+            if sides["home"][3]:
+                home_goals += 1
+            else:
+                away_goals += 1
+        return cls(game_pk, date, sides["home"][0], sides["away"][0], home_goals, away_goals, ending)
+
+    @classmethod
+    def from_schedule(cls, js, date=None):
+        """
+        From a schedule game entry (requested with the schedule.linescore
+        expansion for OT/SO information). Returns None if the game isn't
+        final.
+        """
+        if js.get("status", {}).get("abstractGameState") != "Final":
+            return None
+        teams = js["teams"]
+        line = js.get("linescore", {})
+        home_goals, away_goals = teams["home"].get("score", 0), teams["away"].get("score", 0)
+        shootout = bool(line.get("hasShootout"))
+        if date is None:
+            date = game_date(js["gameDate"])
+        return cls(js.get("gamePk"), date, teams["home"]["team"]["id"],
+                   teams["away"]["team"]["id"], home_goals, away_goals,
+                   cls._ending(line.get("currentPeriod", 3), shootout))
+
+
+class TeamRecord(object):
+
+    __slots__ = ("team_id", "gp", "w", "l", "otl", "pts", "rw", "row", "gf", "ga", "rank")
+
+    def __init__(self, team_id, record, rank=None):
+        self.team_id = team_id
+        (self.gp, self.w, self.l, self.otl, self.pts, self.rw, self.row,
+         self.gf, self.ga) = record
+        self.rank = rank
+
+    @property
+    def diff(self):
+        return self.gf - self.ga
+
+    @property
+    def pts_pct(self):
+        return self.pts / (2.0 * self.gp) if self.gp else 0.0
+
+    def to_dict(self):
+        d = dict((k, getattr(self, k)) for k in self.__slots__)
+        d.update({"diff": self.diff, "pts_pct": self.pts_pct})
+        return d
+
+    def __repr__(self):
+        return "TeamRecord(team_id=%r, gp=%d, w=%d, l=%d, otl=%d, pts=%d, rank=%r)" % (
+            self.team_id, self.gp, self.w, self.l, self.otl, self.pts, self.rank)
+
+
+class StandingsEngine(object):
+    """
+    Incremental standings over a set of game results.
+
+    Points are 2 for a win and 1 for an overtime or shootout loss. Ties in
+    points are broken, in order, by points percentage, regulation wins
+    (RW), regulation plus overtime wins (ROW), wins, points in games
+    between the tied teams, goal differential and goals for. Shootout
+    winning goals count in goals for and against.
+
+    Only game types in game_types are counted when the game id is known.
+    Adding a result for a game already in the engine replaces it.
+    """
+
+    def __init__(self, game_types=("02",)):
+        self.game_types = game_types
+        self.results = {}
+        self.dates = []
+        self._by_date = {}
+        self._pairs = {}
+        self._snapshots = []
+        self._valid = 0
+        self._teams = {}
+
+    def add(self, js, date=None, game_pk=None, ending=None):
+        """
+        Adds a GameResult, or a feed/live, boxscore or schedule game
+        response. Returns the GameResult, or None for games that aren't
+        final or aren't counted.
+        """
+        if isinstance(js, GameResult):
+            result = js
+        elif hasattr(js, "game_data") or "gameData" in js:
+            result = GameResult.from_feed(js, date=date)
+        elif "gamePk" in js and "status" in js:
+            result = GameResult.from_schedule(js, date=date)
+        else:
+            if date is None:
+                raise ValueError("a date is required to add a boxscore")
+            result = GameResult.from_boxscore(js, date, game_pk=game_pk, ending=ending)
+        if result is None:
+            return None
+        if game_pk is not None:
+            result.game_pk = game_pk
+        if result.game_pk is not None and self.game_types is not None \
+                and str(result.game_pk)[4:6] not in self.game_types:
+            return None
+        old = self.results.get(result.key)
+        if old is not None:
+            self._remove(old)
+        self.results[result.key] = result
+        if result.date not in self._by_date:
+            self._by_date[result.date] = []
+            insort(self.dates, result.date)
+        self._by_date[result.date].append(result.key)
+        games = self._pairs.setdefault(StandingsEngine._pair(result), [])
+        games.insert(bisect_right([d for d, _ in games], result.date), (result.date, result.key))
+        self._invalidate(result.date)
+        return result
+
+    def extend(self, results, **kwargs):
+        return [r for r in (self.add(js, **kwargs) for js in results) if r is not None]
+
+    @staticmethod
+    def _pair(result):
+        return tuple(sorted((result.home_id, result.away_id)))
+
+    def _remove(self, result):
+        keys = self._by_date[result.date]
+        keys.remove(result.key)
+        self._pairs[StandingsEngine._pair(result)].remove((result.date, result.key))
+        self._invalidate(result.date)
+        if not keys:
+            del self._by_date[result.date]
+            del self.dates[bisect_left(self.dates, result.date)]
+
+    def _invalidate(self, date):
+        self._valid = min(self._valid, bisect_left(self.dates, date))
+        del self._snapshots[self._valid:]
+
+    @staticmethod
+    def _apply(snapshot, result):
+        for team, gf, ga in ((result.home_id, result.home_goals, result.away_goals),
+                             (result.away_id, result.away_goals, result.home_goals)):
+            gp, w, l, otl, pts, rw, row, f, a = snapshot.get(team, EMPTY)
+            if gf > ga:
+                w += 1
+                pts += 2
+                if result.ending == "REG":
+                    rw += 1
+                if result.ending != "SO":
+                    row += 1
+            elif result.ending == "REG":
+                l += 1
+            else:
+                otl += 1
+                pts += 1
+            snapshot[team] = (gp + 1, w, l, otl, pts, rw, row, f + gf, a + ga)
+
+    def _snapshot(self, i):
+        """
+        Records after the i-th game date, building any missing snapshots
+        from the last valid one.
+        """
+        while self._valid <= i:
+            snapshot = dict(self._snapshots[-1]) if self._snapshots else {}
+            for key in self._by_date[self.dates[self._valid]]:
+                StandingsEngine._apply(snapshot, self.results[key])
+            self._snapshots.append(snapshot)
+            self._valid += 1
+        return self._snapshots[i]
+
+    def records(self, date=None):
+        """
+        dict of team_id -> record tuple (gp, w, l, otl, pts, rw, row, gf,
+        ga) including every game played on or before date (default: all).
+        """
+        i = len(self.dates) - 1 if date is None else bisect_right(self.dates, iso_date(date)) - 1
+        if i < 0:
+            return {}
+        return dict(self._snapshot(i))
+
+    def record(self, team_id, date=None):
+        return TeamRecord(team_id, self.records(date).get(team_id, EMPTY))
+
+    def head_to_head(self, teams, date=None):
+        """
+        Points each of teams earned in games among themselves up to date.
+        """
+        date = None if date is None else iso_date(date)
+        points = dict((t, 0) for t in teams)
+        teams = sorted(teams)
+        for n, a in enumerate(teams):
+            for b in teams[n + 1:]:
+                for d, key in self._pairs.get((a, b), []):
+                    if date is not None and d > date:
+                        break
+                    r = self.results[key]
+                    points[r.winner] += 2
+                    if r.ending != "REG":
+                        points[r.loser] += 1
+        return points
+
+    def set_teams(self, teams):
+        """
+        Registers team -> division/conference membership for grouped
+        standings, from a list of team responses or Team models.
+        """
+        for t in teams:
+            if isinstance(t, dict):
+                self._teams[t["id"]] = (t.get("division", {}).get("id"),
+                                        t.get("conference", {}).get("id"))
+            else:
+                self._teams[t.id] = (t.division_id, t.conference_id)
+
+    def _rank(self, records, date):
+        rows = [TeamRecord(t, r) for t, r in records.items()]
+
+        def primary(x):
+            return (-x.pts, -x.pts_pct, -x.rw, -x.row, -x.w)
+
+        rows.sort(key=primary)
+        out = []
+        i = 0
+        while i < len(rows):
+            j = i + 1
+            while j < len(rows) and primary(rows[j]) == primary(rows[i]):
+                j += 1
+            tied = rows[i:j]
+            if len(tied) > 1:
+                h2h = self.head_to_head([x.team_id for x in tied], date)
+                tied.sort(key=lambda x: (-h2h[x.team_id], -x.diff, -x.gf, x.team_id))
+            out.extend(tied)
+            i = j
+        for n, row in enumerate(out):
+            row.rank = n + 1
+        return out
+
+    def as_of(self, date=None, by=None):
+        """
+        ######
+
+        Standings including every game played on or before date.
+
+        ######
+        :param date:
+            YYYY-MM-DD, YYYYMMDD or date object. defaults to all games added
+        :param by:
+            None for league standings, or "conference" / "division" to rank
+            within each group (requires set_teams())
+        :return:
+            list of TeamRecord sorted by rank, or with by given a dict of
+            group id -> list of TeamRecord
+        """
+        records = self.records(date)
+        if by is None:
+            return self._rank(records, date)
+        if by not in ("division", "conference"):
+            raise ValueError("Invalid by value %s. must be one of None, 'division', 'conference'"
+                             % by)
+        pos = 0 if by == "division" else 1
+        groups = {}
+        for team, record in records.items():
+            group = self._teams.get(team, (None, None))[pos]
+            groups.setdefault(group, {})[team] = record
+        return dict((g, self._rank(r, date)) for g, r in groups.items())
+
+    def __len__(self):
+        return len(self.results)
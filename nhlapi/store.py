@@ -0,0 +1,474 @@
+import os
+import sqlite3
+from threading import Lock
+from nhlapi import config
+from nhlapi.decoder import loads
+from nhlapi.feed import LazyFeed
+from nhlapi.models import Boxscore, Conference, Division, GoalieStats, Team
+from nhlapi.standings import GameResult, game_date
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    game_pk INTEGER PRIMARY KEY,
+    season INTEGER NOT NULL,
+    game_type TEXT NOT NULL,
+    date TEXT,
+    home_id INTEGER,
+    away_id INTEGER,
+    home_goals INTEGER,
+    away_goals INTEGER,
+    ending TEXT,
+    status TEXT
+);
+CREATE INDEX IF NOT EXISTS games_season ON games (season, game_type);
+CREATE INDEX IF NOT EXISTS games_date ON games (date);
+CREATE INDEX IF NOT EXISTS games_home ON games (home_id, season);
+CREATE INDEX IF NOT EXISTS games_away ON games (away_id, season);
+
+CREATE TABLE IF NOT EXISTS team_games (
+    game_pk INTEGER NOT NULL,
+    team_id INTEGER NOT NULL,
+    opponent_id INTEGER,
+    is_home INTEGER NOT NULL,
+    goals INTEGER,
+    goals_against INTEGER,
+    shots INTEGER,
+    pim INTEGER,
+    pp_goals INTEGER,
+    pp_opportunities INTEGER,
+    faceoff_pct REAL,
+    blocked INTEGER,
+    takeaways INTEGER,
+    giveaways INTEGER,
+    hits INTEGER,
+    PRIMARY KEY (game_pk, team_id)
+);
+CREATE INDEX IF NOT EXISTS team_games_team ON team_games (team_id, is_home);
+
+CREATE TABLE IF NOT EXISTS player_games (
+    game_pk INTEGER NOT NULL,
+    player_id INTEGER NOT NULL,
+    team_id INTEGER,
+    position TEXT,
+    toi INTEGER,
+    goals INTEGER,
+    assists INTEGER,
+    shots INTEGER,
+    hits INTEGER,
+    pp_goals INTEGER,
+    pp_assists INTEGER,
+    pim INTEGER,
+    blocked INTEGER,
+    plus_minus INTEGER,
+    takeaways INTEGER,
+    giveaways INTEGER,
+    faceoff_wins INTEGER,
+    faceoffs INTEGER,
+    shots_against INTEGER,
+    saves INTEGER,
+    decision TEXT,
+    PRIMARY KEY (game_pk, player_id)
+);
+CREATE INDEX IF NOT EXISTS player_games_player ON player_games (player_id);
+CREATE INDEX IF NOT EXISTS player_games_team ON player_games (team_id);
+
+CREATE TABLE IF NOT EXISTS players (
+    id INTEGER PRIMARY KEY,
+    name TEXT,
+    position TEXT
+);
+CREATE INDEX IF NOT EXISTS players_name ON players (name COLLATE NOCASE);
+
+CREATE TABLE IF NOT EXISTS teams (
+    id INTEGER PRIMARY KEY,
+    name TEXT,
+    abbreviation TEXT,
+    team_name TEXT,
+    location_name TEXT,
+    division_id INTEGER,
+    conference_id INTEGER,
+    venue TEXT,
+    active INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS divisions (
+    id INTEGER PRIMARY KEY,
+    name TEXT,
+    name_short TEXT,
+    abbreviation TEXT,
+    conference_id INTEGER,
+    active INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS conferences (
+    id INTEGER PRIMARY KEY,
+    name TEXT,
+    abbreviation TEXT,
+    short_name TEXT,
+    active INTEGER
+);
+"""
+
+_GAME_COLUMNS = ("game_pk", "season", "game_type", "date", "home_id", "away_id",
+                 "home_goals", "away_goals", "ending", "status")
+_TEAM_GAME_COLUMNS = ("game_pk", "team_id", "opponent_id", "is_home", "goals", "goals_against",
+                      "shots", "pim", "pp_goals", "pp_opportunities", "faceoff_pct", "blocked",
+                      "takeaways", "giveaways", "hits")
+_PLAYER_GAME_COLUMNS = ("game_pk", "player_id", "team_id", "position", "toi", "goals", "assists",
+                        "shots", "hits", "pp_goals", "pp_assists", "pim", "blocked", "plus_minus",
+                        "takeaways", "giveaways", "faceoff_wins", "faceoffs", "shots_against",
+                        "saves", "decision")
+
+_OPERATORS = {"": "=", "gt": ">", "gte": ">=", "lt": "<", "lte": "<=", "ne": "!="}
+
+
+def _season(value):
+    """
+    8 digit season (20172018) from a first year (2017) or season string.
+    """
+    value = str(value)
+    if len(value) == 4:
+        return int(value + str(int(value) + 1))
+    return int(value)
+
+
+def _game_type(value):
+    value = str(value)
+    return value.zfill(2) if value.isdigit() else {"preseason": "01", "regular": "02",
+                                                    "playoffs": "03", "all-star": "04"}[value]
+
+
+class GameStore(object):
+    """
+    Local SQLite store of fetched games, boxscores, teams, divisions and
+    conferences.
+
+    Endpoints given a store (store=GameStore()) ingest every response they
+    fetch; ingest() can also be called directly with responses pulled
+    earlier. Rows are upserted, so refetching a game updates it, and a
+    boxscore ingested before the game's schedule or feed entry leaves the
+    game's date empty until one of those arrives.
+
+    games, team_games and player_games take keyword filters: plain values
+    for equality and column__gt / __gte / __lt / __lte / __ne for
+    comparisons, plus season, game_type, team, start_date and end_date.
+    Only matching rows are returned, as dicts.
+    """
+
+    def __init__(self, path=config.STORE_PATH):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+
+    def ingest(self, kind, js, game_pk=None):
+        """
+        Stores one response. kind is the game detail ('feed/live',
+        'boxscore') or resource ('schedule', 'teams', 'divisions',
+        'conferences'); other kinds are ignored. Boxscores need game_pk.
+        Lazily fetched responses (LazyFeed) are accepted for any detail.
+        """
+        if js is None:
+            return
+        if kind == "feed/live":
+            self.add_feed(js)
+        elif kind == "boxscore":
+            if isinstance(js, LazyFeed):
+                js = loads(js.raw)
+            self.add_boxscore(js, game_pk)
+        elif kind == "schedule":
+            self.add_schedule(js)
+        elif kind == "teams":
+            self.add_teams(js.get("teams", []))
+        elif kind == "divisions":
+            self.add_divisions(js.get("divisions", []))
+        elif kind == "conferences":
+            self.add_conferences(js.get("conferences", []))
+
+    def _write(self, statements):
+        with self._lock:
+            with self._conn:
+                for sql, rows in statements:
+                    self._conn.executemany(sql, rows)
+
+    @staticmethod
+    def _upsert(table, columns, key, keep_existing=()):
+        """
+        INSERT ... ON CONFLICT DO UPDATE. Columns in keep_existing keep
+        their stored value when the new one is NULL.
+        """
+        updates = []
+        for c in columns:
+            if c in key:
+                continue
+            if c in keep_existing:
+                updates.append("%s = COALESCE(excluded.%s, %s.%s)" % (c, c, table, c))
+            else:
+                updates.append("%s = excluded.%s" % (c, c))
+        return "INSERT INTO %s (%s) VALUES (%s) ON CONFLICT (%s) DO UPDATE SET %s" % (
+            table, ", ".join(columns), ", ".join("?" * len(columns)), ", ".join(key),
+            ", ".join(updates))
+
+    @staticmethod
+    def _game_row(game_pk, date=None, home_id=None, away_id=None, home_goals=None,
+                  away_goals=None, ending=None, status=None):
+        gid = str(game_pk)
+        return (int(game_pk), int(gid[:4] + str(int(gid[:4]) + 1)), gid[4:6], date, home_id,
+                away_id, home_goals, away_goals, ending, status)
+
+    def _game_statement(self, rows):
+        return (GameStore._upsert("games", _GAME_COLUMNS, ("game_pk",),
+                                  keep_existing=_GAME_COLUMNS), rows)
+
+    @staticmethod
+    def _box_rows(game_pk, box):
+        team_rows, player_rows, people = [], [], []
+        for side, other, is_home in ((box.home, box.away, 1), (box.away, box.home, 0)):
+            team_rows.append((game_pk, side.team_id, other.team_id, is_home, side.goals,
+                              other.goals, side.shots, side.pim, side.pp_goals,
+                              side.pp_opportunities, side.faceoff_pct, side.blocked,
+                              side.takeaways, side.giveaways, side.hits))
+            for p in side.players:
+                if type(p) is GoalieStats:
+                    player_rows.append((game_pk, p.player_id, p.team_id, "G", p.toi, None, None,
+                                        None, None, None, None, None, None, None, None, None,
+                                        None, None, p.shots, p.saves, p.decision))
+                    people.append((p.player_id, p.name, "G"))
+                else:
+                    player_rows.append((game_pk, p.player_id, p.team_id, p.position, p.toi,
+                                        p.goals, p.assists, p.shots, p.hits, p.pp_goals,
+                                        p.pp_assists, p.pim, p.blocked, p.plus_minus,
+                                        p.takeaways, p.giveaways, p.faceoff_wins, p.faceoffs,
+                                        None, None, None))
+                    people.append((p.player_id, p.name, p.position))
+        return [(GameStore._upsert("team_games", _TEAM_GAME_COLUMNS, ("game_pk", "team_id")),
+                 team_rows),
+                (GameStore._upsert("player_games", _PLAYER_GAME_COLUMNS, ("game_pk", "player_id")),
+                 player_rows),
+                (GameStore._upsert("players", ("id", "name", "position"), ("id",),
+                                   keep_existing=("name", "position")), people)]
+
+    def add_boxscore(self, js, game_pk, date=None):
+        if game_pk is None:
+            raise ValueError("a game_pk is required to store a boxscore")
+        game_pk = int(game_pk)
+        box = Boxscore.from_json(js, game_pk=game_pk)
+        game = GameStore._game_row(game_pk, date, box.home.team_id, box.away.team_id)
+        self._write([self._game_statement([game])] + GameStore._box_rows(game_pk, box))
+
+    def add_feed(self, js):
+        """
+        Stores a feed/live response (dict or LazyFeed): the game, with its
+        final result once it's over, and its boxscore.
+        """
+        game_data = js.game_data if hasattr(js, "game_data") else js.get("gameData", {})
+        pk = game_data.get("game", {}).get("pk")
+        if pk is None:
+            return
+        result = GameResult.from_feed(js)
+        if result is not None:
+            game = GameStore._game_row(pk, result.date, result.home_id, result.away_id,
+                                       result.home_goals, result.away_goals, result.ending,
+                                       "Final")
+        else:
+            teams = game_data.get("teams", {})
+            start = game_data.get("datetime", {}).get("dateTime")
+            game = GameStore._game_row(pk, None if start is None else game_date(start),
+                                       teams.get("home", {}).get("id"),
+                                       teams.get("away", {}).get("id"),
+                                       status=game_data.get("status", {}).get("abstractGameState"))
+        statements = [self._game_statement([game])]
+        box = js.boxscore if hasattr(js, "boxscore") else js.get("liveData", {}).get("boxscore")
+        if box and box.get("teams"):
+            statements.extend(GameStore._box_rows(int(pk), Boxscore.from_json(box, game_pk=pk)))
+        self._write(statements)
+
+    def add_schedule(self, js):
+        """
+        Stores the games of a schedule response (with results when the
+        schedule.linescore expansion was requested).
+        """
+        rows = []
+        for d in js.get("dates", []):
+            for g in d.get("games", []):
+                result = GameResult.from_schedule(g, date=d.get("date"))
+                teams = g.get("teams", {})
+                if result is not None:
+                    rows.append(GameStore._game_row(g["gamePk"], result.date, result.home_id,
+                                                    result.away_id, result.home_goals,
+                                                    result.away_goals, result.ending, "Final"))
+                else:
+                    rows.append(GameStore._game_row(
+                        g["gamePk"], d.get("date"), teams.get("home", {}).get("team", {}).get("id"),
+                        teams.get("away", {}).get("team", {}).get("id"),
+                        status=g.get("status", {}).get("abstractGameState")))
+        self._write([self._game_statement(rows)])
+
+    def add_teams(self, teams):
+        rows = []
+        for js in teams:
+            t = Team.from_json(js)
+            rows.append((t.id, t.name, t.abbreviation, t.team_name, t.location_name,
+                         t.division_id, t.conference_id, t.venue, int(bool(t.active))))
+        columns = ("id", "name", "abbreviation", "team_name", "location_name", "division_id",
+                   "conference_id", "venue", "active")
+        self._write([(GameStore._upsert("teams", columns, ("id",), keep_existing=columns), rows)])
+
+    def add_divisions(self, divisions):
+        rows = []
+        for js in divisions:
+            d = Division.from_json(js)
+            rows.append((d.id, d.name, d.name_short, d.abbreviation, d.conference_id,
+                         int(bool(d.active))))
+        columns = ("id", "name", "name_short", "abbreviation", "conference_id", "active")
+        self._write([(GameStore._upsert("divisions", columns, ("id",), keep_existing=columns), rows)])
+
+    def add_conferences(self, conferences):
+        rows = []
+        for js in conferences:
+            c = Conference.from_json(js)
+            rows.append((c.id, c.name, c.abbreviation, c.short_name, int(bool(c.active))))
+        columns = ("id", "name", "abbreviation", "short_name", "active")
+        self._write([(GameStore._upsert("conferences", columns, ("id",), keep_existing=columns),
+                      rows)])
+
+    def query(self, sql, params=()):
+        with self._lock:
+            return [dict(r) for r in self._conn.execute(sql, params).fetchall()]
+
+    def team_id(self, team):
+        """
+        Team id from an id, abbreviation ('TOR'), team name ('Maple Leafs'),
+        full name or short nickname ('Leafs').
+        """
+        if type(team) is int or (type(team) is str and team.isdigit()):
+            return int(team)
+        rows = self.query("SELECT id FROM teams WHERE abbreviation = ? COLLATE NOCASE "
+                          "OR team_name = ? COLLATE NOCASE OR name = ? COLLATE NOCASE", (team,) * 3)
+        if not rows:
+            rows = self.query("SELECT id FROM teams WHERE team_name LIKE ? ORDER BY active DESC",
+                              ("%" + team,))
+        if not rows:
+            raise ValueError("Unknown team %s" % team)
+        return rows[0]["id"]
+
+    @staticmethod
+    def _filters(filters, columns, alias):
+        clauses, params = [], []
+        for name, value in filters.items():
+            column, _, op = name.partition("__")
+            if column not in columns or op not in _OPERATORS:
+                raise ValueError("Invalid filter %s. columns are %s, operators %s"
+                                 % (name, list(columns), [o for o in _OPERATORS if o]))
+            if value is None and op == "":
+                clauses.append("%s.%s IS NULL" % (alias, column))
+                continue
+            clauses.append("%s.%s %s ?" % (alias, column, _OPERATORS[op]))
+            params.append(value)
+        return clauses, params
+
+    def _game_filters(self, season, game_type, start_date, end_date):
+        clauses, params = [], []
+        if season is not None:
+            clauses.append("g.season = ?")
+            params.append(_season(season))
+        if game_type is not None:
+            clauses.append("g.game_type = ?")
+            params.append(_game_type(game_type))
+        if start_date is not None:
+            clauses.append("g.date >= ?")
+            params.append(str(start_date))
+        if end_date is not None:
+            clauses.append("g.date <= ?")
+            params.append(str(end_date))
+        return clauses, params
+
+    @staticmethod
+    def _select(sql, clauses, order):
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        return sql + " ORDER BY " + order
+
+    def games(self, season=None, game_type=None, team=None, start_date=None, end_date=None,
+              **filters):
+        """
+        Games, optionally involving team (home or away).
+        """
+        clauses, params = self._game_filters(season, game_type, start_date, end_date)
+        if team is not None:
+            tid = self.team_id(team)
+            clauses.append("(g.home_id = ? OR g.away_id = ?)")
+            params.extend([tid, tid])
+        more, more_params = GameStore._filters(filters, _GAME_COLUMNS, "g")
+        sql = GameStore._select("SELECT g.* FROM games g", clauses + more, "g.date, g.game_pk")
+        return self.query(sql, params + more_params)
+
+    def team_games(self, team=None, season=None, game_type=None, start_date=None,
+                   end_date=None, home=None, **filters):
+        """
+        One row per team per game (boxscore team stats joined with the
+        game), e.g. team_games(team="TOR", season=2017, home=False,
+        pp_goals__gt=0) for the Leafs' road games with a power play goal.
+        """
+        clauses, params = self._game_filters(season, game_type, start_date, end_date)
+        if team is not None:
+            clauses.append("t.team_id = ?")
+            params.append(self.team_id(team))
+        if home is not None:
+            clauses.append("t.is_home = ?")
+            params.append(int(bool(home)))
+        more, more_params = GameStore._filters(filters, _TEAM_GAME_COLUMNS, "t")
+        sql = GameStore._select("SELECT t.*, g.season, g.game_type, g.date, g.ending, g.status "
+                                "FROM team_games t JOIN games g ON g.game_pk = t.game_pk",
+                                clauses + more, "g.date, t.game_pk")
+        return self.query(sql, params + more_params)
+
+    def player_games(self, player=None, team=None, season=None, game_type=None,
+                     start_date=None, end_date=None, **filters):
+        """
+        One row per player per game. player is an id or a full name.
+        """
+        clauses, params = self._game_filters(season, game_type, start_date, end_date)
+        if player is not None:
+            if type(player) is int or str(player).isdigit():
+                clauses.append("p.player_id = ?")
+                params.append(int(player))
+            else:
+                clauses.append("p.player_id IN (SELECT id FROM players WHERE name = ? COLLATE NOCASE)")
+                params.append(player)
+        if team is not None:
+            clauses.append("p.team_id = ?")
+            params.append(self.team_id(team))
+        more, more_params = GameStore._filters(filters, _PLAYER_GAME_COLUMNS, "p")
+        sql = GameStore._select("SELECT p.*, g.season, g.game_type, g.date "
+                                "FROM player_games p JOIN games g ON g.game_pk = p.game_pk",
+                                clauses + more, "g.date, p.game_pk")
+        return self.query(sql, params + more_params)
+
+    def teams(self, **filters):
+        columns = ("id", "name", "abbreviation", "team_name", "location_name", "division_id",
+                   "conference_id", "venue", "active")
+        clauses, params = GameStore._filters(filters, columns, "t")
+        return self.query(GameStore._select("SELECT t.* FROM teams t", clauses, "t.id"), params)
+
+    def divisions(self, **filters):
+        columns = ("id", "name", "name_short", "abbreviation", "conference_id", "active")
+        clauses, params = GameStore._filters(filters, columns, "d")
+        return self.query(GameStore._select("SELECT d.* FROM divisions d", clauses, "d.id"), params)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,237 @@
+import hashlib
+from collections import OrderedDict
+from threading import Lock, local
+from time import perf_counter
+import requests
+from requests.adapters import HTTPAdapter
+from nhlapi import config
+from nhlapi.decoder import default_decoder, freeze
+from nhlapi.metrics import Instrumentation, RequestEvent
+from nhlapi.ratelimit import RequestScheduler
+
+
+class ValidatorStore(object):
+    """
+    Bounded LRU of (etag, last_modified, body digest, decoded data, body
+    size) per request, used to make conditional requests. The least recently used
+    entries are dropped once there are more than max_entries or their
+    response bodies add up to more than max_bytes.
+    """
+
+    def __init__(self, max_entries=config.CONDITIONAL_MAX_ENTRIES,
+                 max_bytes=config.CONDITIONAL_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, entry):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= old[4]
+            if self.max_bytes is not None and entry[4] > self.max_bytes:
+                return
+            self._entries[key] = entry
+            self.size += entry[4]
+            while len(self._entries) > self.max_entries or \
+                    (self.max_bytes is not None and self.size > self.max_bytes):
+                self.size -= self._entries.popitem(last=False)[1][4]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+
+class Transport(object):
+    """
+    Pooled HTTP transport shared by the endpoint classes.
+
+    Wraps a requests.Session so connections are kept alive and reused
+    across requests instead of paying TCP+TLS setup on every call. Requests
+    are paced and retried by scheduler; pass scheduler=False to send them
+    directly. Attach sinks to instrumentation to receive a RequestEvent per
+    request.
+    """
+
+    def __init__(self, pool_size=config.POOL_SIZE, timeout=config.TIMEOUT,
+                 compress=True, headers=None, session=None, scheduler=None,
+                 decoder=None, instrumentation=None):
+        self.session = requests.Session() if session is None else session
+        self.instrumentation = Instrumentation() if instrumentation is None else instrumentation
+        self.decoder = default_decoder if decoder is None else decoder
+        if scheduler is None:
+            scheduler = RequestScheduler()
+        self.scheduler = scheduler or None
+        self.validators = ValidatorStore()
+        self._local = local()
+        self.pool_size = pool_size
+        self.timeout = timeout
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        if compress:
+            self.session.headers.update({"Accept-Encoding": "gzip, deflate"})
+        else:
+            self.session.headers.update({"Accept-Encoding": "identity"})
+        if headers is not None:
+            self.session.headers.update(headers)
+
+    def _send(self, url, params=None, headers=None):
+        return self.session.get(url, params=params, headers=headers,
+                                timeout=self.timeout)
+
+    def get(self, url, params=None, headers=None):
+        if self.scheduler is None:
+            return self._send(url, params=params, headers=headers)
+        return self.scheduler.call(lambda: self._send(url, params=params, headers=headers))
+
+    def _observed_get(self, url, params=None, headers=None):
+        """
+        get() that also returns the start time of the request's final
+        attempt and the time its body was received, for instrumentation.
+        Time spent waiting on the scheduler before that attempt is recorded
+        for emit(). Failed requests are reported before the exception
+        propagates.
+        """
+        queued = perf_counter()
+        attempt = [queued]
+
+        def send():
+            attempt[0] = perf_counter()
+            return self._send(url, params=params, headers=headers)
+
+        try:
+            if self.scheduler is None:
+                req = send()
+            else:
+                req = self.scheduler.call(send)
+        except Exception:
+            self._local.wait = attempt[0] - queued
+            self.emit(url, None, "error", attempt[0], perf_counter())
+            raise
+        fetched = perf_counter()
+        self._local.wait = attempt[0] - queued
+        if req.status_code >= 400:
+            self.emit(req.url, req, "http_error", attempt[0], fetched)
+        return req, attempt[0], fetched
+
+    def emit(self, url, req, outcome, start, fetched, decoded=None):
+        total = fetched - start
+        connect = total if req is None else min(total, req.elapsed.total_seconds())
+        retries = 0 if self.scheduler is None else self.scheduler.last_retries
+        self.instrumentation.emit(RequestEvent(
+            url, status=None if req is None else req.status_code, outcome=outcome,
+            connect=connect, transfer=total - connect,
+            decode=0.0 if decoded is None else decoded - fetched,
+            bytes=0 if req is None else len(req.content), retries=retries,
+            wait=getattr(self._local, "wait", 0.0)))
+
+    def get_json(self, url, params=None, headers=None, type_=None):
+        if not self.instrumentation:
+            req = self.get(url, params=params, headers=headers)
+            req.raise_for_status()
+            return self.decoder.decode(req.content, type_=type_)
+        req, start, fetched = self._observed_get(url, params=params, headers=headers)
+        req.raise_for_status()
+        data = self.decoder.decode(req.content, type_=type_)
+        self.emit(req.url, req, "ok", start, fetched, perf_counter())
+        return data
+
+    def get_raw(self, url, params=None, headers=None):
+        if not self.instrumentation:
+            req = self.get(url, params=params, headers=headers)
+            req.raise_for_status()
+            return req.content
+        req, start, fetched = self._observed_get(url, params=params, headers=headers)
+        req.raise_for_status()
+        self.emit(req.url, req, "ok", start, fetched)
+        return req.content
+
+    def get_conditional(self, url, params=None, headers=None, prepare=None):
+        """
+        GET url sending If-None-Match / If-Modified-Since from the previous
+        response to the same request. Returns (data, changed). On a 304, or a
+        200 whose body is byte-identical to the stored one, the previously
+        decoded data is returned as-is with changed=False and nothing is
+        re-parsed.
+
+        prepare, if given, is applied to newly decoded data before it is
+        stored. The returned data is read-only (see decoder.freeze), since
+        the same object is handed out again on every revalidation; copy it
+        with decoder.thaw() to modify it.
+        """
+        key = (url, tuple(sorted((params or {}).items())))
+        entry = self.validators.get(key)
+        hdrs = dict(headers or {})
+        if entry is not None:
+            etag, modified = entry[0], entry[1]
+            if etag is not None:
+                hdrs["If-None-Match"] = etag
+            if modified is not None:
+                hdrs["If-Modified-Since"] = modified
+        observed = bool(self.instrumentation)
+        if observed:
+            req, start, fetched = self._observed_get(url, params=params, headers=hdrs)
+        else:
+            req = self.get(url, params=params, headers=hdrs)
+        if req.status_code == 304 and entry is not None:
+            if observed:
+                self.emit(req.url, req, "not_modified", start, fetched)
+            return entry[3], False
+        req.raise_for_status()
+        digest = hashlib.sha1(req.content).digest()
+        if entry is not None and entry[2] == digest:
+            if observed:
+                self.emit(req.url, req, "unchanged", start, fetched)
+            return entry[3], False
+        data = self.decoder.loads(req.content)
+        if prepare is not None:
+            data = prepare(data)
+        data = freeze(data)
+        self.validators.put(key, (req.headers.get("ETag"), req.headers.get("Last-Modified"),
+                                  digest, data, len(req.content)))
+        if observed:
+            self.emit(req.url, req, "ok", start, fetched, perf_counter())
+        return data, True
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+_default = None
+_default_lock = Lock()
+
+
+def default_transport():
+    """
+    Returns the process-wide transport used by endpoints that were not
+    given one explicitly, creating it on first use.
+    """
+    global _default
+    if _default is None:
+        with _default_lock:
+            if _default is None:
+                _default = Transport()
+    return _default
+
+
+def set_default_transport(transport):
+    global _default
+    with _default_lock:
+        _default = transport
@@ -1,29 +1,133 @@
+import unicodedata
 from csv import DictReader
-import os
+from functools import lru_cache
+from nhlapi import config
+
+
+PLAYOFF_ROUNDS = {1: 8, 2: 4, 3: 2, 4: 1}
+PLAYOFF_GAMES_PER_SERIES = 7
+
+
+class SeasonIndex(object):
+    """
+    In-memory index over seasons_info.csv.
+
+    Game numbers are the last four digits of a game ID. Regular season
+    games run from 0001 to the season's game count; playoff numbers encode
+    round, matchup and game as 0RMG. Preseason and all-star counts aren't
+    recorded per season, so they are bounded by config.PRESEASON_MAX_GAMES
+    and config.ALLSTAR_MAX_GAMES.
+    """
+
+    def __init__(self, path=config.SEASONS_INFO):
+        self.seasons = {}
+        with open(path, mode='r', newline='') as f:
+            for row in DictReader(f):
+                self.seasons[row['season']] = (int(row['num_teams']),
+                                               int(row['reg_season_games']),
+                                               int(row['total_games']))
+        self.max_games = max(v[2] for v in self.seasons.values())
+        self.playoff_numbers = frozenset(
+            r * 100 + m * 10 + g
+            for r, matchups in PLAYOFF_ROUNDS.items()
+            for m in range(1, matchups + 1)
+            for g in range(1, PLAYOFF_GAMES_PER_SERIES + 1))
+
+    @staticmethod
+    def _season_key(season):
+        s = str(season)
+        if len(s) == 4:
+            return "".join([s, str(int(s) + 1)])
+        return s.replace("-", "")
+
+    def num_games(self, season):
+        """
+        Number of regular season games in season, or None for seasons not
+        in the index.
+        """
+        info = self.seasons.get(SeasonIndex._season_key(season))
+        return None if info is None else info[2]
+
+    def num_teams(self, season):
+        info = self.seasons.get(SeasonIndex._season_key(season))
+        return None if info is None else info[0]
+
+    def games_per_team(self, season):
+        info = self.seasons.get(SeasonIndex._season_key(season))
+        return None if info is None else info[1]
+
+    def regular_range(self, season):
+        n = self.num_games(season)
+        if n is None:
+            # Unknown (usually newer) seasons: allow room beyond the largest
+            # known schedule.
+            n = self.max_games + 100
+        return range(1, n + 1)
+
+    def is_valid(self, season, game_type, number):
+        n = int(number)
+        if game_type in ("02", 2):
+            return n in self.regular_range(season)
+        elif game_type in ("03", 3):
+            return n in self.playoff_numbers
+        elif game_type in ("01", 1):
+            return 1 <= n <= config.PRESEASON_MAX_GAMES
+        elif game_type in ("04", 4):
+            return 1 <= n <= config.ALLSTAR_MAX_GAMES
+        return False
+
+    def game_numbers(self, season, game_type="02"):
+        """
+        All candidate zero-padded game numbers for season and game_type.
+        """
+        if game_type in ("02", 2):
+            nums = self.regular_range(season)
+        elif game_type in ("03", 3):
+            nums = sorted(self.playoff_numbers)
+        elif game_type in ("01", 1):
+            nums = range(1, config.PRESEASON_MAX_GAMES + 1)
+        elif game_type in ("04", 4):
+            nums = range(1, config.ALLSTAR_MAX_GAMES + 1)
+        else:
+            raise ValueError("game_type must be value in "
+                             '["01", "02", "03", "04"]')
+        return [str(i).zfill(4) for i in nums]
+
+    @staticmethod
+    def playoff_number(round_, matchup, game):
+        if round_ not in PLAYOFF_ROUNDS:
+            raise ValueError("playoff round must be 1-4")
+        if matchup not in range(1, PLAYOFF_ROUNDS[round_] + 1):
+            raise ValueError("round %d has %d matchups" % (round_, PLAYOFF_ROUNDS[round_]))
+        if game not in range(1, PLAYOFF_GAMES_PER_SERIES + 1):
+            raise ValueError("playoff game must be 1-7")
+        return str(round_ * 100 + matchup * 10 + game).zfill(4)
+
+
+@lru_cache(maxsize=None)
+def season_index(path=config.SEASONS_INFO):
+    return SeasonIndex(path)
 
 
 def get_num_games(season):
-    file_header = ["num", "season", "num_teams",
-                   "reg_season_games", "total_games"]
-
-    f = open(os.path.join(os.getcwd(), "seasons_info.csv"), mode='r')
-    readr = DictReader(f, fieldnames=file_header)
-    n_games = 0
-    max_n_games = 0
-    if season == "2004-2005":
-        return []
-    else:
-        for row in readr:
-            if row['season'] == season:
-                n_games += row['total_games']
-            else:
-                pass
-            if row['total_games'] > max_n_games:
-                max_n_games = row['total_games']
-            else:
-                pass
-
-        if n_games == 0:
-            n_games = max_n_games + 100
-
-        return [str(i).zfill(4-len(str(i))) for i in range(1, n_games)]
+    return season_index().game_numbers(season, "02")
+
+
+def name_key(name):
+    """
+    Case and accent insensitive form of a name, e.g. 'Stützle' -> 'stutzle',
+    for name lookups.
+    """
+    decomposed = unicodedata.normalize("NFKD", str(name))
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold().strip()
+
+
+def clock_seconds(clock, default=0):
+    """
+    Seconds in an 'mm:ss' clock or time on ice string, e.g. '18:32' -> 1112.
+    Returns default for a missing or empty value.
+    """
+    if not clock:
+        return default
+    m, _, s = str(clock).partition(":")
+    return int(m) * 60 + int(s or 0)
@@ -3,8 +3,13 @@ from setuptools import setup, find_packages
 setup(
     name='python-nhlapi',
     version='1',
-    packages=find_packages(),
+    packages=find_packages(exclude=['benchmarks']),
+    package_data={'nhlapi': ['seasons_info.csv']},
     install_requires=[i for i in open('requirements.txt', mode='r').readlines()],
+    extras_require={'aio': ['aiohttp'],
+                    'parquet': ['pyarrow'],
+                    'fast': ['orjson'],
+                    'typed': ['msgspec']},
     url='www.github.com/python-nhlapi',
     license='LGPL',
     author='Daniel Temkin',
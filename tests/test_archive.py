@@ -0,0 +1,97 @@
+import os
+import pytest
+import requests
+from benchmarks.server import FakeStatsAPI
+from nhlapi.archive import Archive, RecordingTransport, ReplayTransport, _ENTRY
+from nhlapi.cache import MemoryCache
+from nhlapi.endpoints import Game, Teams
+
+URL = "http://api/v1/game/2017020001/boxscore"
+
+
+def _segments(path):
+    return sorted(n for n in os.listdir(path) if n.startswith("segment-"))
+
+
+def test_segments_roll_over(tmp_path):
+    path = str(tmp_path)
+    bodies = [os.urandom(100) for _ in range(4)]
+    with Archive(path, segment_bytes=64) as archive:
+        for i, body in enumerate(bodies):
+            archive.put(URL, {"n": i}, body)
+    assert len(_segments(path)) == 4
+    with Archive(path, segment_bytes=64) as archive:
+        assert [archive.get(URL, {"n": i}) for i in range(4)] == [(200, b) for b in bodies]
+        archive.put(URL, {"n": 4}, b"y")
+    assert len(_segments(path)) == 5
+
+
+@pytest.mark.parametrize("tail", [b"\x01" * 5, b"\xff" * _ENTRY.size,
+                                  _ENTRY.pack(b"\x00" * 16, 0, 0, 1, 200)])
+def test_reopening_drops_a_damaged_index_tail(tmp_path, tail):
+    path = str(tmp_path)
+    with Archive(path) as archive:
+        archive.put(URL, None, b"first")
+        archive.put(URL, {"n": 1}, b"second")
+    with open(os.path.join(path, "index.bin"), mode="ab") as f:
+        f.write(tail)
+    with Archive(path) as archive:
+        assert len(archive) == 2
+        assert archive.get(URL) == (200, b"first")
+        archive.put(URL, {"n": 2}, b"third")
+    assert os.path.getsize(os.path.join(path, "index.bin")) == 3 * _ENTRY.size
+    assert _segments(path) == ["segment-000000.dat"]
+    with Archive(path) as archive:
+        assert archive.get(URL, {"n": 2}) == (200, b"third")
+
+
+def test_truncated_index_keeps_whole_entries(tmp_path):
+    path = str(tmp_path)
+    with Archive(path) as archive:
+        archive.put(URL, None, b"first")
+        archive.put(URL, {"n": 1}, b"second")
+    index = os.path.join(path, "index.bin")
+    with open(index, mode="r+b") as f:
+        f.truncate(2 * _ENTRY.size - 3)
+    with Archive(path) as archive:
+        assert len(archive) == 1 and (URL, {"n": 1}) not in archive
+        assert archive.get(URL) == (200, b"first")
+
+
+def test_params_order_does_not_matter(tmp_path):
+    with Archive(str(tmp_path)) as archive:
+        archive.put(URL, {"a": 1, "b": "x"}, b"body")
+        assert archive.get(URL, {"b": "x", "a": 1}) == (200, b"body")
+        assert (URL, {"b": "x", "a": 1}) in archive
+        assert archive.get(URL, {"a": 1}) is None
+
+
+def test_latest_put_wins(tmp_path):
+    path = str(tmp_path)
+    with Archive(path) as archive:
+        archive.put(URL, None, b"old")
+        archive.put(URL, None, b"new", status=404)
+        assert archive.get(URL) == (404, b"new") and len(archive) == 1
+    with Archive(path) as archive:
+        assert archive.get(URL) == (404, b"new")
+        assert list(archive.requests()) == [URL]
+
+
+def test_recorded_endpoints_replay_offline(tmp_path):
+    ids = ["2017020001", "2017020002"]
+    with Archive(str(tmp_path)) as archive:
+        with FakeStatsAPI() as srv:
+            kwargs = dict(base_url=srv.url, reference_cache=MemoryCache(),
+                          transport=RecordingTransport(archive, scheduler=False))
+            teams = Teams(**kwargs).get()['teams']
+            games = list(Game(use_schedule=False, **kwargs).fetch_many(ids, "boxscore"))
+            base_url = srv.url
+
+        kwargs = dict(base_url=base_url, reference_cache=MemoryCache(),
+                      transport=ReplayTransport(archive))
+        assert Teams(**kwargs).get()['teams'] == teams
+        game = Game(use_schedule=False, **kwargs)
+        assert sorted(game.fetch_many(ids, "boxscore")) == sorted(games)
+        # Unrecorded requests answer 404 instead of reaching the network.
+        with pytest.raises(requests.HTTPError):
+            kwargs["transport"].get_json(base_url + "/v1/teams/99")
@@ -0,0 +1,66 @@
+import os
+from datetime import date
+from nhlapi.cache import DiskCache
+from nhlapi.endpoints import Game
+
+
+SEASON = str(date.today().year)
+GAMES = ["%s02%04d" % (SEASON, i) for i in range(1, 5)]
+FINAL = GAMES[:3]
+
+
+class FakeTransport(object):
+    """
+    Serves boxscores for a season in progress (the last game is still
+    being played) and its schedule, counting the requests made.
+    """
+
+    instrumentation = None
+
+    def __init__(self):
+        self.fetched = []
+
+    def get_json(self, url, params=None, headers=None, type_=None):
+        self.fetched.append(url)
+        return {"teams": {}}
+
+    def get_conditional(self, url, params=None, headers=None, prepare=None):
+        self.fetched.append(url)
+        games = [{"gamePk": int(g),
+                  "status": {"abstractGameState": "Final" if g in FINAL else "Live"}}
+                 for g in GAMES]
+        return {"dates": [{"date": "%s-10-10" % SEASON, "games": games}]}, True
+
+
+def _run(path, live_ttl=60):
+    transport = FakeTransport()
+    game = Game(transport=transport, cache=DiskCache(path, live_ttl=live_ttl))
+    results = list(game.fetch_many(GAMES, "boxscore"))
+    assert [r[2] for r in results] == [None] * len(GAMES)
+    return transport.fetched
+
+
+def test_boxscores_of_final_games_are_cached_as_final(tmp_path):
+    path = str(tmp_path)
+    first = _run(path)
+    assert sum(u.endswith("/schedule") for u in first) == 1
+    assert sum(u.endswith("/boxscore") for u in first) == len(GAMES)
+    names = os.listdir(path)
+    assert sorted(n for n in names if ".final." in n) == \
+        sorted("%s_boxscore.final.json.gz" % g for g in FINAL)
+
+    # Once the live entry is stale, a re-run only downloads the game still
+    # in progress.
+    second = _run(path, live_ttl=0)
+    assert [u for u in second if u.endswith("/boxscore")] == ["/".join(
+        [Game(transport=FakeTransport()).base_url, GAMES[-1], "boxscore"])]
+
+
+def test_callers_can_mark_games_final(tmp_path):
+    transport = FakeTransport()
+    game = Game(transport=transport, cache=DiskCache(str(tmp_path)), use_schedule=False)
+    game.mark_final(GAMES[:1])
+    list(game.fetch_many(GAMES[:2], "boxscore"))
+    assert not any(u.endswith("/schedule") for u in transport.fetched)
+    assert sorted(os.listdir(str(tmp_path))) == ["%s_boxscore.final.json.gz" % GAMES[0],
+                                                  "%s_boxscore.live.json.gz" % GAMES[1]]
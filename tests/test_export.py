@@ -0,0 +1,79 @@
+import glob
+import gzip
+import json
+import multiprocessing
+import os
+import pytest
+from nhlapi.export import SeasonExporter
+
+
+GAME_IDS = ["20170200%02d" % i for i in range(1, 21)]
+
+
+class FakeGame(object):
+    """
+    Stands in for Game: yields a small boxscore-like payload per game, and
+    kills the process without any cleanup after die_after games.
+    """
+
+    def __init__(self, die_after=None):
+        self.die_after = die_after
+
+    def season_game_ids(self, season, game_type):
+        return list(GAME_IDS)
+
+    def fetch_many(self, game_ids, detail):
+        for n, gid in enumerate(game_ids):
+            if n == self.die_after:
+                os._exit(1)
+            yield gid, {"gamePk": int(gid), "teams": {"home": {"goals": n}}}, None
+
+
+def _export(root, compress, die_after=None):
+    SeasonExporter(root, compress=compress, game=FakeGame(die_after)).export(
+        "boxscore", 2017, "02")
+
+
+def _read(part, compress):
+    rows = []
+    for path in sorted(glob.glob(os.path.join(part, "boxscore-*.ndjson*"))):
+        with (gzip.open(path, mode="rb") if compress else open(path, mode="rb")) as f:
+            rows.extend(json.loads(line) for line in f)
+    return rows
+
+
+@pytest.mark.parametrize("compress", [True, False])
+def test_resume_after_kill(tmp_path, compress):
+    root = str(tmp_path)
+    ctx = multiprocessing.get_context("fork")
+    proc = ctx.Process(target=_export, args=(root, compress, 7))
+    proc.start()
+    proc.join()
+    assert proc.exitcode == 1
+
+    exporter = SeasonExporter(root, compress=compress, game=FakeGame())
+    summary = exporter.export("boxscore", 2017, "02")
+    assert summary["skipped"] == 7
+    assert summary["written"] == 13
+
+    rows = _read(exporter.partition("20172018", "02"), compress)
+    assert sorted(r["gamePk"] for r in rows) == [int(g) for g in GAME_IDS]
+
+    again = exporter.export("boxscore", 2017, "02")
+    assert again["written"] == 0 and again["skipped"] == 20
+
+
+def test_unfinished_part_is_cut_to_recorded_games(tmp_path):
+    exporter = SeasonExporter(str(tmp_path), game=FakeGame())
+    part = exporter.partition("20172018", "02")
+    os.makedirs(part)
+    # A run that wrote three games but was killed before recording the third.
+    with gzip.open(os.path.join(part, "boxscore-00000.ndjson.gz"), mode="wb") as f:
+        for gid in GAME_IDS[:3]:
+            f.write(json.dumps({"gamePk": int(gid)}).encode("utf-8") + b"\n")
+    with open(os.path.join(part, "boxscore.ids"), mode="w") as f:
+        f.write("# part boxscore-00000.ndjson.gz\n%s\n%s\n" % tuple(GAME_IDS[:2]))
+
+    summary = exporter.export("boxscore", 2017, "02")
+    assert summary["skipped"] == 2 and summary["written"] == 18
+    assert sorted(r["gamePk"] for r in _read(part, True)) == [int(g) for g in GAME_IDS]
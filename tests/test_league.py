@@ -0,0 +1,81 @@
+import pytest
+from benchmarks import fixtures
+from benchmarks.server import FakeStatsAPI
+from nhlapi.cache import MemoryCache
+from nhlapi.endpoints import League, Teams
+from nhlapi.league import LeagueIndex
+from nhlapi.transport import Transport
+
+
+def test_shared_reference_data_is_read_only():
+    with FakeStatsAPI() as srv:
+        kwargs = dict(transport=Transport(scheduler=False), base_url=srv.url,
+                      reference_cache=MemoryCache())
+        team = Teams(**kwargs).get()['teams'][0]
+        name = team['name']
+        with pytest.raises(TypeError):
+            team['name'] = "Renamed"
+        with pytest.raises(TypeError):
+            team['division'].update(id=0)
+        assert Teams(**kwargs).get()['teams'][0]['name'] == name
+
+        index = League(**kwargs).index()
+        assert index.team(name).id == team['id']
+        raw = index.raw("team", team['id'])
+        with pytest.raises(TypeError):
+            raw['name'] = "Renamed"
+        assert index.raw("team", name)['name'] == name
+
+
+def _index():
+    # Detroit (team 17) in the 2012-13 alignment: Central division, Western
+    # conference, while division 17 (Atlantic) is in the Eastern conference.
+    teams = [dict(t) for t in fixtures.teams()["teams"]]
+    for t in teams:
+        if t["id"] == 17:
+            t["division"] = {"id": 16, "name": "Central"}
+            t["conference"] = {"id": 5, "name": "Western"}
+    return LeagueIndex.from_json(teams, fixtures.divisions()["divisions"],
+                                 fixtures.conferences()["conferences"], season=2012)
+
+
+def test_conference_of_team_and_division_are_separate():
+    index = _index()
+    assert index.conference_of_team(17).name == "Western"
+    assert index.conference_of_division(17).name == "Eastern"
+    assert index.conference_of_team("DET") is index.conference_of_team(index.team(17))
+    assert index.conference_of_division("Atlantic").id == 6
+    assert index.conference_of_team("nobody") is None
+    assert index.conference_of_division(None) is None
+
+
+def test_lookups_by_id_abbreviation_and_name():
+    index = _index()
+    tor = index.team(10)
+    assert tor.abbreviation == "TOR"
+    assert index.team("TOR") is index.team("toronto maple leafs") is index.team("10") is tor
+    assert index.team("Maple Leafs") is tor
+    assert index.team("XYZ") is None and 10 in index and "XYZ" not in index
+    assert index.division_of("TOR").name == "Atlantic"
+    assert index.division("a").id == 17 and index.conference("eastern").id == 6
+    assert index.team_division[17] == 16 and index.team_conference[17] == 5
+    assert len(index) == len(fixtures.TEAMS)
+
+
+def test_groups_and_raw_entries():
+    index = _index()
+    atlantic = index.teams_of("Atlantic")
+    assert 10 in [t.id for t in atlantic] and 17 not in [t.id for t in atlantic]
+    assert 17 in [t.id for t in index.teams_of(index.conference(5))]
+    assert sorted(d.id for d in index.divisions_of("Western")) == [15, 16]
+    assert index.raw("team", "DET")["division"]["id"] == 16
+    assert index.raw("conference", 99) is None
+
+
+def test_divisions_only_referenced_by_teams_are_added():
+    teams = [{"id": 1, "name": "Team", "abbreviation": "TM",
+              "division": {"id": 9, "name": "Old"}, "conference": {"id": 3, "name": "Conf"}}]
+    index = LeagueIndex.from_json(teams)
+    assert index.division(9).name == "Old"
+    assert index.conference_of_division(9).name == "Conf"
+    assert index.conference_of_team(1).id == 3
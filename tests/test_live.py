@@ -0,0 +1,108 @@
+import copy
+import pytest
+from nhlapi.live import LiveTracker, apply_patch
+
+
+def _doc():
+    return {"a": {"b": [1, 2, 3]}, "c": "x", "m~n": 1, "p/q": 2}
+
+
+@pytest.mark.parametrize("op, expected", [
+    ({"op": "add", "path": "/d", "value": 4}, dict(_doc(), d=4)),
+    ({"op": "add", "path": "/a/b/1", "value": 9}, dict(_doc(), a={"b": [1, 9, 2, 3]})),
+    ({"op": "add", "path": "/a/b/3", "value": 9}, dict(_doc(), a={"b": [1, 2, 3, 9]})),
+    ({"op": "add", "path": "/a/b/-", "value": 9}, dict(_doc(), a={"b": [1, 2, 3, 9]})),
+    ({"op": "remove", "path": "/a/b/0"}, dict(_doc(), a={"b": [2, 3]})),
+    ({"op": "replace", "path": "/c", "value": "y"}, dict(_doc(), c="y")),
+    ({"op": "replace", "path": "/a/b/2", "value": 0}, dict(_doc(), a={"b": [1, 2, 0]})),
+    ({"op": "move", "from": "/c", "path": "/a/c"},
+     {"a": {"b": [1, 2, 3], "c": "x"}, "m~n": 1, "p/q": 2}),
+    ({"op": "move", "from": "/a/b/0", "path": "/a/b/-"}, dict(_doc(), a={"b": [2, 3, 1]})),
+    ({"op": "copy", "from": "/a/b", "path": "/e"}, dict(_doc(), e=[1, 2, 3])),
+    ({"op": "test", "path": "/a/b", "value": [1, 2, 3]}, _doc()),
+    ({"op": "replace", "path": "/m~0n", "value": 5}, dict(_doc(), **{"m~n": 5})),
+    ({"op": "remove", "path": "/p~1q"}, {"a": {"b": [1, 2, 3]}, "c": "x", "m~n": 1}),
+    ({"op": "replace", "path": "", "value": {"z": 1}}, {"z": 1}),
+])
+def test_apply_patch_ops(op, expected):
+    assert apply_patch(_doc(), [op]) == expected
+
+
+def test_copy_is_independent():
+    doc = apply_patch(_doc(), [{"op": "copy", "from": "/a", "path": "/f"}])
+    doc["f"]["b"].append(4)
+    assert doc["a"]["b"] == [1, 2, 3]
+
+
+@pytest.mark.parametrize("op", [
+    {"op": "test", "path": "/c", "value": "y"},
+    {"op": "remove", "path": "/missing"},
+    {"op": "replace", "path": "/missing", "value": 1},
+    {"op": "replace", "path": "/a/b/3", "value": 1},
+    {"op": "add", "path": "/a/b/5", "value": 1},
+    {"op": "remove", "path": "/a/b/-1"},
+    {"op": "add", "path": "/a/b/01", "value": 1},
+    {"op": "remove", "path": ""},
+    {"op": "frobnicate", "path": "/c"},
+])
+def test_invalid_ops_raise(op):
+    with pytest.raises((KeyError, IndexError, ValueError)):
+        apply_patch(_doc(), [op])
+
+
+def _feed(timecode, plays, state="Live"):
+    return {"copyright": "NHL", "metaData": {"timeStamp": timecode},
+            "gameData": {"status": {"abstractGameState": state}},
+            "liveData": {"plays": {"allPlays": list(plays)}}}
+
+
+class FakeTransport(object):
+    """
+    Serves one game's full feed and the diffPatch responses queued in
+    patches, recording the urls requested.
+    """
+
+    def __init__(self, feed, patches):
+        self.feed = feed
+        self.patches = list(patches)
+        self.urls = []
+
+    def get_json(self, url, params=None, headers=None):
+        self.urls.append(url.rsplit("/", 1)[-1])
+        if url.endswith("/diffPatch"):
+            return self.patches.pop(0)
+        return copy.deepcopy(self.feed)
+
+
+def _diff(timecode, *ops):
+    return {"diff": [{"op": "replace", "path": "/metaData/timeStamp", "value": timecode}]
+            + list(ops)}
+
+
+def test_tracker_applies_patches_until_final():
+    transport = FakeTransport(_feed("t1", [1]), [
+        [_diff("t2", {"op": "add", "path": "/liveData/plays/allPlays/-", "value": 2})],
+        [],
+        [_diff("t3", {"op": "replace", "path": "/gameData/status/abstractGameState",
+                      "value": "Final"})],
+    ])
+    tracker = LiveTracker([2017020001], transport=transport, interval=0)
+    games = tracker.run()
+    game = games["2017020001"]
+    assert "copyright" not in game
+    assert game["liveData"]["plays"]["allPlays"] == [1, 2]
+    assert tracker.timecodes["2017020001"] == "t3" and tracker.active == []
+    assert transport.urls == ["live", "diffPatch", "diffPatch", "diffPatch"]
+
+
+def test_tracker_refetches_the_feed_when_a_patch_fails():
+    transport = FakeTransport(_feed("t1", [1]), [
+        [_diff("t2", {"op": "remove", "path": "/liveData/plays/allPlays/5"})],
+    ])
+    tracker = LiveTracker(["2017020001"], transport=transport)
+    tracker.poll()
+    transport.feed = _feed("t5", [1, 2, 3])
+    assert tracker.poll() == {"2017020001": True}
+    assert transport.urls == ["live", "diffPatch", "live"]
+    assert tracker.games["2017020001"]["liveData"]["plays"]["allPlays"] == [1, 2, 3]
+    assert tracker.timecodes["2017020001"] == "t5"
@@ -0,0 +1,50 @@
+import pytest
+from nhlapi.endpoints import People
+
+
+class FakeTransport(object):
+    """
+    Answers people and people stats requests, recording the urls.
+    """
+
+    instrumentation = None
+
+    def __init__(self):
+        self.urls = []
+
+    def get_json(self, url, params=None, headers=None, type_=None):
+        self.urls.append(url)
+        pid = int(url.split("/people/")[1].split("/")[0])
+        if url.endswith("/stats"):
+            return {"stats": [{"splits": [{"season": params["season"],
+                                           "stat": {"games": 82, "goals": 30}}]}]}
+        return {"people": [{"id": pid, "fullName": "Player %d" % pid,
+                            "primaryPosition": {"abbreviation": "C"}}]}
+
+
+def _people():
+    return People(transport=FakeTransport())
+
+
+@pytest.mark.parametrize("ID", [8478402, "8478402", [8478402], ("8478402",)])
+def test_get_accepts_any_id_form(ID):
+    people = _people()
+    data = people.get(ID)
+    assert data["errors"] == []
+    assert [p["id"] for p in data["people"]] == [8478402]
+    assert people.transport.urls[0].endswith("/people/8478402")
+
+
+@pytest.mark.parametrize("ID", [8478402, "8478402", ["8478402", 8471214]])
+def test_stats_accepts_any_id_form(ID):
+    people = _people()
+    data = people.stats(ID=ID, season=2017)
+    expected = sorted(People._ids(ID))
+    assert sorted(s["id"] for s in data["stats"]) == expected
+    assert people.index.stats(expected[0], 20172018)[0]["goals"] == 30
+
+
+def test_fetch_many_and_constructor_ids():
+    people = People(ID="8478402", transport=FakeTransport())
+    assert people.ID == [8478402]
+    assert [r[0] for r in people.fetch_many("8478402")] == [8478402]
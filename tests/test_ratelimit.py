@@ -0,0 +1,120 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+import pytest
+from nhlapi import ratelimit
+from nhlapi.ratelimit import CircuitBreaker, RequestScheduler, TokenBucket
+
+NOW = datetime(2018, 1, 1, 12, tzinfo=timezone.utc)
+
+
+class FakeClock(object):
+    """
+    Stands in for time.monotonic and time.sleep: sleeping advances the
+    clock instantly and is recorded.
+    """
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class FixedDatetime(datetime):
+
+    @classmethod
+    def now(cls, tz=None):
+        return NOW
+
+
+class Response(object):
+
+    def __init__(self, status_code, retry_after=None):
+        self.status_code = status_code
+        self.headers = {} if retry_after is None else {"Retry-After": retry_after}
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(ratelimit, "monotonic", clock.monotonic)
+    monkeypatch.setattr(ratelimit, "sleep", clock.sleep)
+    monkeypatch.setattr(ratelimit, "datetime", FixedDatetime)
+    # Full jitter always drawing its upper bound.
+    monkeypatch.setattr(ratelimit.random, "uniform", lambda a, b: b)
+    return clock
+
+
+def _call(scheduler, *responses):
+    responses = list(responses)
+    return scheduler.call(lambda: responses.pop(0))
+
+
+def test_token_bucket_paces_after_the_burst(clock):
+    bucket = TokenBucket(rate=2, burst=2)
+    done = []
+    for _ in range(5):
+        bucket.acquire()
+        done.append(clock.now - 1000.0)
+    assert done == [0.0, 0.0, 0.5, 1.0, 1.5]
+    clock.now += 10
+    assert bucket.take() == 0 and bucket.take() == 0
+    assert bucket.take() == pytest.approx(0.5)
+
+
+def test_retry_after_seconds_and_http_date(clock):
+    scheduler = RequestScheduler(rate=1000, backoff_max=600, breaker_threshold=100)
+    when = format_datetime(NOW + timedelta(seconds=90), usegmt=True)
+    resp = _call(scheduler, Response(429, "12"), Response(503, when), Response(200))
+    assert resp.status_code == 200
+    assert clock.sleeps == [12.0, 90.0]
+    assert scheduler.retries == 2
+    assert RequestScheduler._retry_after(Response(429, "soon")) is None
+
+
+def test_backoff_is_exponential_and_capped(clock):
+    scheduler = RequestScheduler(rate=1000, backoff_base=0.5, backoff_max=3,
+                                 max_retries=5, breaker_threshold=100)
+    resp = _call(scheduler, *[Response(503)] * 6)
+    assert resp.status_code == 503
+    assert clock.sleeps == [0.5, 1.0, 2.0, 3.0, 3.0]
+    assert scheduler.bucket.rate == 1000 / 2 ** 6
+
+
+def test_breaker_opens_goes_half_open_and_closes(clock):
+    breaker = CircuitBreaker(threshold=2, cooldown=30)
+    breaker.failure()
+    assert breaker.state == "closed" and breaker.admit() == 0
+    breaker.failure()
+    assert breaker.state == "open" and breaker.admit() == 30
+
+    # After the cooldown only one trial request is let through.
+    clock.now += 30
+    assert breaker.state == "half-open"
+    assert breaker.admit() == 0
+    assert breaker.admit() == 30
+
+    # A failed trial re-opens it straight away.
+    breaker.failure()
+    assert breaker.state == "open"
+    clock.now += 30
+    assert breaker.admit() == 0
+    breaker.success()
+    assert breaker.state == "closed"
+    assert breaker.admit() == 0 and breaker.admit() == 0
+
+    # A trial that never reports back is replaced after a cooldown.
+    breaker.failure()
+    breaker.failure()
+    clock.now += 30
+    assert breaker.admit() == 0
+    clock.now += 30
+    assert breaker.admit() == 0
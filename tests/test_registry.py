@@ -0,0 +1,50 @@
+import json
+from nhlapi.decoder import Decoder
+from nhlapi.registry import HistoricalRegistry, historical_registry
+
+
+class Response(object):
+
+    def __init__(self, status_code, body=None):
+        self.status_code = status_code
+        self.ok = status_code < 400
+        self.content = json.dumps(body).encode("utf-8")
+
+
+class FakeTransport(object):
+    """
+    Answers division probes: division 1 existed, division 2 never did.
+    """
+
+    decoder = Decoder()
+
+    def __init__(self):
+        self.urls = []
+
+    def get(self, url):
+        self.urls.append(url)
+        if url.endswith("/divisions/1"):
+            return Response(200, {"divisions": [{"id": 1, "name": "Old", "active": True}]})
+        return Response(404)
+
+
+CURRENT = {"divisions": [{"id": 3, "name": "Current"}]}
+
+
+def test_probes_use_the_lookups_transport(tmp_path):
+    own, mine = FakeTransport(), FakeTransport()
+    registry = HistoricalRegistry(transport=own, base_url="http://api",
+                                  path=str(tmp_path / "registry.json"))
+    assert registry.divisions(CURRENT, transport=mine) == [{"id": 1, "name": "Old",
+                                                           "active": False}]
+    assert own.urls == []
+    assert sorted(u.rsplit("/", 1)[-1] for u in mine.urls) == ["1", "2"]
+
+    # Later lookups are served from the snapshot, whatever the transport.
+    assert registry.divisions(CURRENT)[0]["id"] == 1
+    assert own.urls == []
+
+
+def test_registries_are_shared_per_base_url():
+    assert historical_registry("http://a") is historical_registry("http://a")
+    assert historical_registry("http://a") is not historical_registry("http://b")
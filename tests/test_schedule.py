@@ -0,0 +1,17 @@
+from benchmarks.server import FakeStatsAPI
+from nhlapi.endpoints import Game, Schedule
+from nhlapi.transport import Transport
+
+
+def test_season_game_ids_come_from_the_schedule():
+    with FakeStatsAPI(season_games=20) as srv:
+        transport = Transport(scheduler=False)
+        game = Game(transport=transport, base_url=srv.url)
+        assert game.season_game_ids(2017, 2) == ["201702%04d" % n for n in range(1, 21)]
+        assert srv.requests == 1
+
+        srv.go_live(["2017020003"])
+        games = Schedule(transport=transport, base_url=srv.url).games(date="2017-10-04")
+        assert [g["gamePk"] for g in games] == [2017020000 + n for n in range(1, 9)]
+        assert [g["status"]["abstractGameState"] for g in games][1:4] == \
+            ["Final", "Live", "Final"]
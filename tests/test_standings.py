@@ -0,0 +1,57 @@
+from nhlapi.cache import MemoryCache
+from nhlapi.endpoints import Standings
+
+
+def _team(tid, division):
+    return {"id": tid, "name": "Team %d" % tid, "division": {"id": division},
+            "conference": {"id": 1 if division < 20 else 2}}
+
+
+def _game(pk, home, away, home_goals, away_goals):
+    return {"gamePk": pk, "status": {"abstractGameState": "Final"},
+            "teams": {"home": {"team": {"id": home}, "score": home_goals},
+                      "away": {"team": {"id": away}, "score": away_goals}},
+            "linescore": {"currentPeriod": 3}}
+
+
+class FakeTransport(object):
+    """
+    Answers the schedule and teams requests Standings.load makes. Teams 1
+    and 2 shared a division in 1997 and are in different ones today.
+    """
+
+    instrumentation = None
+
+    def __init__(self):
+        self.requests = []
+
+    def get_conditional(self, url, params=None, headers=None, prepare=None):
+        params = dict(params or {})
+        self.requests.append((url.rsplit("/", 1)[-1], params))
+        if url.endswith("/schedule"):
+            return {"dates": [{"date": "1997-10-10",
+                               "games": [_game(1997020001, 1, 2, 3, 1),
+                                         _game(1997020002, 3, 4, 2, 1)]}]}, True
+        if params.get("season") == "19971998":
+            teams = [_team(1, 10), _team(2, 10), _team(3, 20), _team(4, 20)]
+        else:
+            teams = [_team(1, 10), _team(2, 11), _team(3, 20), _team(4, 21)]
+        return {"teams": teams}, True
+
+
+def _divisions(by_division):
+    return dict((d, sorted(r.team_id for r in rows)) for d, rows in by_division.items())
+
+
+def test_load_groups_by_the_seasons_alignment():
+    standings = Standings(transport=FakeTransport(), reference_cache=MemoryCache())
+    assert standings.load(season=1997) == 2
+    assert _divisions(standings.as_of(by="division")) == {10: [1, 2], 20: [3, 4]}
+
+
+def test_load_date_range_uses_the_ranges_season():
+    transport = FakeTransport()
+    standings = Standings(transport=transport, reference_cache=MemoryCache())
+    standings.load(start_date="1997-10-01", end_date="1998-04-30")
+    assert ("teams", {"season": "19971998"}) in transport.requests
+    assert _divisions(standings.as_of(by="division")) == {10: [1, 2], 20: [3, 4]}
@@ -0,0 +1,90 @@
+import json
+import pytest
+from benchmarks import fixtures
+from benchmarks.server import FakeStatsAPI
+from nhlapi.cache import MemoryCache
+from nhlapi.endpoints import Game, Teams
+from nhlapi.feed import LazyFeed
+from nhlapi.store import GameStore
+from nhlapi.transport import Transport
+
+
+GAME_PK = 2017020001
+
+
+@pytest.fixture
+def store():
+    with GameStore(":memory:") as s:
+        s.add_teams(fixtures.teams()["teams"])
+        s.add_divisions(fixtures.divisions()["divisions"])
+        s.add_conferences(fixtures.conferences()["conferences"])
+        yield s
+
+
+def _feed(gid=GAME_PK):
+    return json.loads(json.dumps(fixtures.feed_live()).replace(
+        str(fixtures.GAME_PK_SENTINEL), str(gid)))
+
+
+def test_ingest_boxscore_dict_and_lazy(store):
+    box = fixtures.boxscore()
+    store.ingest("boxscore", box, game_pk=GAME_PK)
+    store.ingest("boxscore", LazyFeed(json.dumps(box).encode("utf-8")), game_pk=GAME_PK + 1)
+    games = store.games(season=2017)
+    assert [g["game_pk"] for g in games] == [GAME_PK, GAME_PK + 1]
+    rows = store.team_games(season=2017)
+    assert len(rows) == 4
+    home = box["teams"]["home"]
+    assert store.team_games(team=home["team"]["id"], home=True)[0]["goals"] == \
+        home["teamStats"]["teamSkaterStats"]["goals"]
+    assert len(store.player_games()) == 2 * len(store.player_games(game_pk=GAME_PK))
+
+
+def test_ingest_feed_records_result(store):
+    store.ingest("feed/live", _feed())
+    store.ingest("feed/live", LazyFeed(json.dumps(_feed(GAME_PK + 1)).encode("utf-8")))
+    games = store.games()
+    assert [g["game_pk"] for g in games] == [GAME_PK, GAME_PK + 1]
+    assert all(g["status"] == "Final" and g["date"] == "2017-10-04" for g in games)
+    assert all(g["home_goals"] == 3 and g["away_goals"] == 2 for g in games)
+
+
+def test_ignores_other_kinds(store):
+    store.ingest("content", fixtures.content(), game_pk=GAME_PK)
+    assert store.games() == []
+
+
+def test_query_api(store):
+    store.ingest("boxscore", fixtures.boxscore(), game_pk=GAME_PK)
+    assert store.team_id("TOR") == 10
+    assert store.team_id("Leafs") == 10
+    assert store.team_id("Toronto Maple Leafs") == 10
+    assert store.team_id(10) == 10
+    shots = [r["shots"] for r in store.team_games()]
+    assert [r["shots"] for r in store.team_games(shots__gt=min(shots))] == \
+        [s for s in shots if s > min(shots)]
+    assert store.team_games(season=2016) == []
+    assert len(store.teams(division_id=17)) == 8
+    with pytest.raises(ValueError):
+        store.team_games(nope=1)
+    with pytest.raises(ValueError):
+        store.team_games(shots__between=1)
+
+
+def test_endpoints_ingest_without_failing_fetches(store):
+    ids = [str(GAME_PK + i) for i in range(3)]
+    with FakeStatsAPI() as srv:
+        kwargs = dict(transport=Transport(scheduler=False), base_url=srv.url,
+                      reference_cache=MemoryCache(), store=store)
+        game = Game(use_schedule=False, **kwargs)
+        results = list(game.fetch_many(ids, "boxscore", raw=True))
+        assert [r[2] for r in results] == [None] * 3
+        assert sorted(g["game_pk"] for g in store.games()) == [int(g) for g in ids]
+
+        Teams(**kwargs).get()
+        assert len(store.teams()) == len(fixtures.TEAMS)
+
+        # A store that can't write doesn't turn fetched games into errors.
+        store.close()
+        results = list(game.fetch_many(ids, "feed/live"))
+        assert [r[2] for r in results] == [None] * 3
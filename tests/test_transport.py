@@ -0,0 +1,52 @@
+import pytest
+from benchmarks.server import FakeStatsAPI
+from nhlapi.decoder import thaw
+from nhlapi.endpoints import Game
+from nhlapi.metrics import Instrumentation
+from nhlapi.ratelimit import RequestScheduler
+from nhlapi.transport import Transport, ValidatorStore
+
+
+def test_conditional_game_calls_serve_read_only_data_without_reparsing():
+    with FakeStatsAPI() as srv:
+        transport = Transport(scheduler=False)
+        game = Game(transport=transport, base_url=srv.url, use_schedule=False)
+        first = game.boxscore(2017, 2, 5)['games'][-1]
+        assert game.changed is True
+        decoded = []
+        loads = transport.decoder.loads
+        transport.decoder.loads = lambda raw: decoded.append(raw) or loads(raw)
+        second = game.boxscore(2017, 2, 5)['games'][-1]
+        assert game.changed is False
+        assert decoded == []
+        assert second is first and "copyright" not in second
+        with pytest.raises(TypeError):
+            second["teams"]["home"]["players"].clear()
+        copy = thaw(second)
+        copy["teams"]["home"]["players"].clear()
+        assert second["teams"]["home"]["players"]
+
+
+def test_validator_store_is_bounded_by_bytes():
+    store = ValidatorStore(max_entries=10, max_bytes=100)
+    for i in range(5):
+        store.put(i, (None, None, b"", None, 40))
+    assert list(store._entries) == [3, 4] and store.size == 80
+    store.put("big", (None, None, b"", None, 101))
+    assert "big" not in store._entries and store.size == 80
+    store.put(4, (None, None, b"", None, 10))
+    assert store.size == 50
+
+
+def test_scheduler_wait_is_reported_apart_from_latency():
+    events = []
+    with FakeStatsAPI() as srv:
+        transport = Transport(scheduler=RequestScheduler(rate=2, burst=1),
+                              instrumentation=Instrumentation([events.append]))
+        for _ in range(3):
+            transport.get_json(srv.url + "/v1/teams")
+    assert [e.outcome for e in events] == ["ok"] * 3
+    assert events[0].wait < 0.1
+    for e in events[1:]:
+        assert e.wait > 0.3
+        assert e.connect + e.transfer < 0.2
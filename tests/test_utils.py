@@ -0,0 +1,63 @@
+import pytest
+from nhlapi import config
+from nhlapi.utils import SeasonIndex, clock_seconds, name_key, season_index
+
+
+def test_clock_seconds():
+    assert clock_seconds("18:32") == 1112
+    assert clock_seconds("65:00") == 3900
+    assert clock_seconds("7") == 420
+    assert clock_seconds(None) == 0
+    assert clock_seconds("", -1) == -1
+
+
+def test_name_key():
+    assert name_key(" Stützle ") == "stutzle"
+    assert name_key("MARC-ANDRÉ Fleury") == name_key("marc-andre fleury")
+
+
+@pytest.mark.parametrize("season", [2017, "2017", 20172018, "20172018", "2017-2018"])
+def test_season_lookup_by_start_year_or_id(season):
+    index = season_index()
+    assert index.num_games(season) == 1271
+    assert index.num_teams(season) == 31
+    assert index.games_per_team(season) == 82
+
+
+def test_regular_season_bounds():
+    index = season_index()
+    numbers = index.game_numbers(2017, "02")
+    assert numbers[0] == "0001" and numbers[-1] == "1271" and len(numbers) == 1271
+    assert index.game_numbers(2012, 2)[-1] == "0720"
+    assert index.is_valid("20172018", "02", 1271)
+    assert not index.is_valid("20172018", "02", 1272)
+    assert not index.is_valid("20172018", "02", 0)
+    # The 2004-05 season was cancelled.
+    assert index.game_numbers(2004, "02") == []
+
+
+def test_other_game_type_bounds():
+    index = season_index()
+    playoffs = index.game_numbers(2017, "03")
+    assert len(playoffs) == 105 and playoffs[0] == "0111" and playoffs[-1] == "0417"
+    assert index.is_valid(2017, "03", "0417") and not index.is_valid(2017, "03", "0421")
+    assert not index.is_valid(2017, "03", "0191")
+    assert len(index.game_numbers(2017, "01")) == config.PRESEASON_MAX_GAMES
+    assert len(index.game_numbers(2017, 4)) == config.ALLSTAR_MAX_GAMES
+    assert SeasonIndex.playoff_number(4, 1, 7) == "0417"
+    with pytest.raises(ValueError):
+        SeasonIndex.playoff_number(2, 5, 1)
+    with pytest.raises(ValueError):
+        index.game_numbers(2017, "05")
+    assert not index.is_valid(2017, "05", 1)
+
+
+def test_unknown_seasons():
+    index = season_index()
+    for season in (2090, "20902091", "1890-1891"):
+        assert index.num_games(season) is None
+        assert index.num_teams(season) is None
+    # Seasons newer than the index get room beyond the largest schedule.
+    numbers = index.game_numbers(2090, "02")
+    assert len(numbers) == index.max_games + 100
+    assert index.is_valid(2090, "02", index.max_games + 1)